@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import Counter
+
+
+@admin.register(Counter)
+class CounterAdmin(admin.ModelAdmin):
+    list_display = ("dimension", "value", "count")
+    list_filter = ("dimension",)
+    readonly_fields = ("dimension", "value", "count")
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class CountersConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "src.apps.counters"
+    label = "counters"
+    verbose_name = "Счётчики"
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from src.apps.counters.models import Counter
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized dashboard counters from the source tables and repair drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dimension",
+            action="append",
+            choices=Counter.Dimension.values,
+            help="Only recount this dimension (may be repeated)",
+        )
+
+    def handle(self, *args, **options):
+        corrections = Counter.objects.recount(options["dimension"])
+        for dimension, drift in corrections.items():
+            for value, (before, after) in sorted(drift.items()):
+                self.stdout.write(f"{dimension}={value}: {before} -> {after}")
+        total = sum(len(drift) for drift in corrections.values())
+        self.stdout.write(self.style.SUCCESS(f"Counters are consistent ({total} corrected)."))
@@ -0,0 +1,51 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Счётчики переехали из inventory: таблица inventory_counter остаётся на месте, меняется только состояние."""
+
+    initial = True
+
+    dependencies = (
+        ("inventory", "0015_assetcategory_useful_life_months"),
+    )
+
+    operations = (
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="Counter",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID"),
+                        ),
+                        (
+                            "dimension",
+                            models.CharField(
+                                choices=[
+                                    ("asset.status", "Оборудование по статусам"),
+                                    ("asset.category", "Оборудование по категориям"),
+                                    ("task.status", "Задачи по статусам"),
+                                    ("task.priority", "Задачи по приоритетам"),
+                                ],
+                                max_length=32,
+                                verbose_name="Измерение",
+                            ),
+                        ),
+                        ("value", models.CharField(max_length=64, verbose_name="Значение")),
+                        ("count", models.BigIntegerField(default=0, verbose_name="Количество")),
+                    ],
+                    options={
+                        "verbose_name": "Счётчик",
+                        "verbose_name_plural": "Счётчики",
+                        "db_table": "inventory_counter",
+                        "constraints": [
+                            models.UniqueConstraint(fields=("dimension", "value"), name="inventory_counter_unique")
+                        ],
+                    },
+                ),
+            ],
+            database_operations=[],
+        ),
+    )
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from typing import ClassVar
+
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Value, When
+
+
+class CounterQuerySet(models.QuerySet):
+    def tracked_fields(self, model) -> list[tuple[str, str]]:
+        """Пары (измерение, атрибут), которые считаются для модели ``model``."""
+        label = model._meta.label
+        return [(dimension, attname) for dimension, (source, attname) in Counter.SOURCES.items() if source == label]
+
+    def bump(self, dimension: str, deltas: dict) -> None:
+        """Атомарно прибавляет ``{значение: дельта}`` к счётчикам измерения: один INSERT и один UPDATE с F()."""
+        merged: dict[str, int] = {}
+        for value, delta in deltas.items():
+            merged[str(value)] = merged.get(str(value), 0) + delta
+        merged = {value: delta for value, delta in merged.items() if delta}
+        if not merged:
+            return
+        self.bulk_create(
+            [Counter(dimension=dimension, value=value) for value in merged],
+            ignore_conflicts=True,
+        )
+        self.filter(dimension=dimension, value__in=merged).update(
+            count=F("count")
+            + Case(
+                *(When(value=value, then=Value(delta)) for value, delta in merged.items()),
+                default=Value(0),
+                output_field=models.BigIntegerField(),
+            )
+        )
+
+    def record_transitions(self, dimension: str, transitions: dict[tuple, int]) -> None:
+        """Учитывает массовое изменение: ``{(было, стало): сколько строк}``."""
+        deltas: dict = {}
+        for (before, after), total in transitions.items():
+            if before == after:
+                continue
+            if before is not None:
+                deltas[before] = deltas.get(before, 0) - total
+            deltas[after] = deltas.get(after, 0) + total
+        self.bump(dimension, deltas)
+
+    def record_save(self, instance: models.Model, previous: dict | None) -> None:
+        for dimension, attname in self.tracked_fields(type(instance)):
+            current = getattr(instance, attname)
+            if previous is None:
+                self.bump(dimension, {current: 1})
+            elif attname in previous and previous[attname] != current:
+                self.bump(dimension, {previous[attname]: -1, current: 1})
+
+    def record_delete(self, instance: models.Model) -> None:
+        values = getattr(instance, "_counted_values", {})
+        for dimension, attname in self.tracked_fields(type(instance)):
+            self.bump(dimension, {values.get(attname, getattr(instance, attname)): -1})
+
+    def breakdowns(self, *dimensions: str) -> dict[str, dict[str, int]]:
+        """Значения нескольких измерений одним запросом; пустые корзины пропускаются."""
+        result: dict[str, dict[str, int]] = {dimension: {} for dimension in dimensions}
+        rows = self.filter(dimension__in=dimensions, count__gt=0).values_list("dimension", "value", "count")
+        for dimension, value, count in rows:
+            result[dimension][value] = count
+        return result
+
+    def recount(self, dimensions=None) -> dict[str, dict[str, tuple[int, int]]]:
+        """Пересчитывает измерения GROUP BY-запросом и правит разошедшиеся строки на месте.
+
+        Строки измерения блокируются до подсчёта, поэтому параллельные инкременты не теряются:
+        они дождутся фиксации и применятся поверх пересчитанного значения.
+        Возвращает исправления ``{измерение: {значение: (было, стало)}}``.
+        """
+        corrections = {}
+        for dimension in dimensions or Counter.SOURCES:
+            source, attname = Counter.SOURCES[dimension]
+            with transaction.atomic():
+                current = dict(
+                    self.select_for_update().filter(dimension=dimension).values_list("value", "count")
+                )
+                totals = {
+                    str(value): total
+                    for value, total in apps.get_model(source)
+                    .objects.order_by()
+                    .values_list(attname)
+                    .annotate(total=Count("pk"))
+                }
+                drift = {
+                    value: (current.get(value, 0), totals.get(value, 0))
+                    for value in current.keys() | totals.keys()
+                    if current.get(value, 0) != totals.get(value, 0)
+                }
+                self.bulk_create(
+                    Counter(dimension=dimension, value=value, count=total)
+                    for value, total in totals.items()
+                    if value not in current
+                )
+                for value, (_, total) in drift.items():
+                    if value in current:
+                        self.filter(dimension=dimension, value=value).update(count=total)
+            corrections[dimension] = drift
+        return corrections
+
+
+class Counter(models.Model):
+    """Денормализованные счётчики для дашбордов, обновляются инкрементально при записи."""
+
+    class Dimension(models.TextChoices):
+        ASSET_STATUS = "asset.status", "Оборудование по статусам"
+        ASSET_CATEGORY = "asset.category", "Оборудование по категориям"
+        TASK_STATUS = "task.status", "Задачи по статусам"
+        TASK_PRIORITY = "task.priority", "Задачи по приоритетам"
+
+    SOURCES: ClassVar[dict[str, tuple[str, str]]] = {
+        Dimension.ASSET_STATUS: ("inventory.Asset", "status"),
+        Dimension.ASSET_CATEGORY: ("inventory.Asset", "category_id"),
+        Dimension.TASK_STATUS: ("tasks.Task", "status"),
+        Dimension.TASK_PRIORITY: ("tasks.Task", "priority"),
+    }
+
+    dimension = models.CharField("Измерение", max_length=32, choices=Dimension.choices)
+    value = models.CharField("Значение", max_length=64)
+    count = models.BigIntegerField("Количество", default=0)
+
+    objects = CounterQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Счётчик"
+        verbose_name_plural = "Счётчики"
+        # таблица осталась от приложения inventory, где счётчики появились раньше
+        db_table = "inventory_counter"
+        constraints = (models.UniqueConstraint(fields=("dimension", "value"), name="inventory_counter_unique"),)
+
+    def __str__(self) -> str:
+        return f"{self.dimension}={self.value}: {self.count}"
+
+
+class CountedModel(models.Model):
+    """Модель, поля которой учитываются в Counter: помнит загруженные значения и правит счётчики при save()."""
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._counted_values = instance._current_counted_values()
+        return instance
+
+    def _current_counted_values(self) -> dict:
+        return {
+            attname: self.__dict__[attname]
+            for _, attname in Counter.objects.tracked_fields(type(self))
+            if attname in self.__dict__
+        }
+
+    def save(self, *args, **kwargs) -> None:
+        previous = None
+        if not self._state.adding:
+            previous = dict(getattr(self, "_counted_values", {}))
+            update_fields = kwargs.get("update_fields")
+            saved = [
+                attname
+                for _, attname in Counter.objects.tracked_fields(type(self))
+                if update_fields is None or attname in update_fields or attname.removesuffix("_id") in update_fields
+            ]
+            missing = [attname for attname in saved if attname not in previous]
+            if missing and self.pk is not None:
+                previous.update(type(self)._base_manager.filter(pk=self.pk).values(*missing).first() or {})
+            previous = {attname: value for attname, value in previous.items() if attname in saved}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Counter.objects.record_save(self, previous)
+        self._counted_values = self._current_counted_values()
@@ -1,17 +1,34 @@
 from __future__ import annotations
 
-from django.contrib import admin
-from django.db.models import Count
+import io
 
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.forms.models import BaseInlineFormSet
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .forms import AssetImportForm
+from .importer import import_assets
 from .models import (
     Asset,
     AssetAttachment,
     AssetCategory,
     AssetLogEntry,
+    AssetMovement,
+    AssetUnavailable,
+    ExpiryNotice,
+    InventorySnapshot,
     Location,
+    LocationTransfer,
     MaintenanceRecord,
+    MaintenanceRule,
+    Stocktake,
+    StocktakeItem,
     Vendor,
 )
+from .search import search_assets
 
 
 class AssetAttachmentInline(admin.TabularInline):
@@ -21,12 +38,28 @@ class AssetAttachmentInline(admin.TabularInline):
     readonly_fields = ("uploaded_at",)
 
 
+class LatestEntriesFormSet(BaseInlineFormSet):
+    """Показывает только последние ``max_shown`` записей: у общих устройств журнал бывает на десятки тысяч строк."""
+
+    max_shown = 50
+
+    def get_queryset(self):
+        if not hasattr(self, "_latest"):
+            self._latest = super().get_queryset().order_by("-created_at", "-pk")[: self.max_shown]
+        return self._latest
+
+
 class AssetLogInline(admin.TabularInline):
     model = AssetLogEntry
+    formset = LatestEntriesFormSet
     extra = 0
     fields = ("created_at", "action", "performed_by", "from_status", "to_status", "notes")
     readonly_fields = fields
     can_delete = False
+    verbose_name_plural = f"Журнал операций (последние {LatestEntriesFormSet.max_shown})"
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 class MaintenanceInline(admin.TabularInline):
@@ -71,6 +104,9 @@ class AssetAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at", "updated_at")
     actions = ("mark_available", "mark_in_use", "mark_maintenance")
     list_select_related = ("category", "location", "assigned_to", "custodian")
+    show_full_result_count = False
+    import_copy_threshold = 5 * 1024 * 1024
+    import_error_limit = 200
     date_hierarchy = "purchase_date"
 
     fieldsets = (
@@ -111,31 +147,80 @@ class AssetAdmin(admin.ModelAdmin):
 
     @admin.action(description="Пометить как доступное")
     def mark_available(self, request, queryset):
-        updated = queryset.update(status=Asset.Status.AVAILABLE)
-        self.message_user(request, f"Статус обновлён для {updated} позиций")
+        self._set_status(request, queryset, Asset.Status.AVAILABLE)
 
     @admin.action(description="Пометить как выданное")
     def mark_in_use(self, request, queryset):
-        updated = queryset.update(status=Asset.Status.IN_USE)
-        self.message_user(request, f"Статус обновлён для {updated} позиций")
+        self._set_status(request, queryset, Asset.Status.IN_USE)
 
     @admin.action(description="Отправить на обслуживание")
     def mark_maintenance(self, request, queryset):
-        updated = queryset.update(status=Asset.Status.MAINTENANCE)
-        self.message_user(request, f"Статус обновлён для {updated} позиций")
+        self._set_status(request, queryset, Asset.Status.MAINTENANCE)
 
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        return qs.annotate(_maintenance_count=Count("maintenance"))
+    def get_search_results(self, request, queryset, search_term):
+        # полнотекстовый и триграммный поиск вместо icontains по search_fields
+        return search_assets(queryset, search_term), False
+
+    def get_urls(self):
+        return [
+            path("import/", self.admin_site.admin_view(self.import_view), name="inventory_asset_import"),
+            *super().get_urls(),
+        ]
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = AssetImportForm(request.POST or None, request.FILES or None)
+        result = None
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            with io.TextIOWrapper(upload.open("rb"), encoding="utf-8-sig", newline="") as stream:
+                result = import_assets(
+                    stream,
+                    form.cleaned_data["format"],
+                    user=request.user,
+                    dry_run=form.cleaned_data["dry_run"],
+                    use_copy=upload.size > self.import_copy_threshold,
+                )
+            level = messages.WARNING if result.errors else messages.SUCCESS
+            verb = "будет создано" if result.dry_run else "создано"
+            self.message_user(request, f"{verb.capitalize()} позиций: {result.created}, отклонено строк: {result.failed}", level)
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Импорт оборудования",
+            "form": form,
+            "result": result,
+            "errors": result.errors[: self.import_error_limit] if result else [],
+        }
+        return TemplateResponse(request, "admin/inventory/asset/import.html", context)
+
+    def _set_status(self, request, queryset, status):
+        updated = queryset.bulk_mark_status(status, by=request.user, note="Массовое изменение в админке")
+        self.message_user(request, f"Статус обновлён для {updated} позиций")
 
 
 @admin.register(AssetCategory)
 class AssetCategoryAdmin(admin.ModelAdmin):
-    list_display = ("name", "parent", "created_at")
+    list_display = ("name", "parent", "subtree_assets", "subtree_value", "created_at")
     search_fields = ("name", "description")
     prepopulated_fields = {"slug": ("name",)}
     list_filter = ("parent",)
 
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request).select_related("parent")
+        if request.resolver_match and request.resolver_match.url_name.endswith("changelist"):
+            queryset = queryset.with_subtree_totals()
+        return queryset
+
+    @admin.display(description="Оборудования в ветке", ordering="subtree_assets")
+    def subtree_assets(self, obj):
+        return obj.subtree_assets
+
+    @admin.display(description="Стоимость ветки", ordering="subtree_value")
+    def subtree_value(self, obj):
+        return obj.subtree_value
+
 
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
@@ -151,6 +236,17 @@ class VendorAdmin(admin.ModelAdmin):
     search_fields = ("name", "email", "phone")
 
 
+class OverdueFilter(admin.SimpleListFilter):
+    title = "просрочка"
+    parameter_name = "overdue"
+
+    def lookups(self, request, model_admin):
+        return (("1", "Просрочено"),)
+
+    def queryset(self, request, queryset):
+        return queryset.overdue() if self.value() == "1" else queryset
+
+
 @admin.register(MaintenanceRecord)
 class MaintenanceRecordAdmin(admin.ModelAdmin):
     list_display = (
@@ -159,19 +255,161 @@ class MaintenanceRecordAdmin(admin.ModelAdmin):
         "kind",
         "status",
         "scheduled_for",
+        "overdue",
         "completed_at",
         "responsible",
     )
-    list_filter = ("kind", "status", "scheduled_for")
+    list_filter = (OverdueFilter, "kind", "status", "scheduled_for", "rule")
     search_fields = ("title", "asset__name", "asset__inventory_code")
     autocomplete_fields = ("asset", "responsible", "contractor")
-    readonly_fields = ("created_at", "updated_at", "is_overdue")
+    readonly_fields = ("created_at", "updated_at", "overdue", "rule")
+    list_select_related = ("asset", "responsible")
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_overdue()
+
+    @admin.display(description="Просрочено", boolean=True, ordering="overdue")
+    def overdue(self, obj):
+        return obj.overdue
+
+
+@admin.register(MaintenanceRule)
+class MaintenanceRuleAdmin(admin.ModelAdmin):
+    list_display = ("title", "asset", "category", "every", "unit", "starts_on", "lead_days", "is_active")
+    list_filter = ("is_active", "kind", "unit", "category")
+    search_fields = ("title",)
+    autocomplete_fields = ("asset", "category", "responsible", "contractor")
+    actions = ("generate_now",)
+
+    @admin.action(description="Запланировать работы сейчас")
+    def generate_now(self, request, queryset):
+        created = queryset.active().generate()
+        self.message_user(request, f"Создано записей обслуживания: {sum(created.values())}")
+
+
+@admin.register(ExpiryNotice)
+class ExpiryNoticeAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "kind", "due_on", "sent_at")
+    list_filter = ("kind",)
+    date_hierarchy = "sent_at"
+    readonly_fields = ("kind", "object_id", "due_on", "sent_at")
+
+
+@admin.register(LocationTransfer)
+class LocationTransferAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "source", "destination", "status", "created_by", "created_at", "posted_at")
+    list_filter = ("status", "source", "destination")
+    autocomplete_fields = ("source", "destination", "assets", "created_by")
+    readonly_fields = ("status", "created_at", "posted_at")
+    actions = ("post_transfers",)
+
+    def save_model(self, request, obj, form, change):
+        if not change and obj.created_by is None:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj and obj.status == LocationTransfer.Status.POSTED:
+            return (*self.readonly_fields, "source", "destination", "assets")
+        return self.readonly_fields
+
+    @admin.action(description="Провести перемещение")
+    def post_transfers(self, request, queryset):
+        for transfer in queryset.select_related("source", "destination"):
+            try:
+                moved = transfer.post(by=request.user)
+            except AssetUnavailable as exc:
+                codes = ", ".join(Asset.objects.filter(pk__in=exc.asset_ids).values_list("inventory_code", flat=True))
+                self.message_user(request, f"{transfer}: {exc} {codes}".strip(), messages.ERROR)
+            except ValueError as exc:
+                self.message_user(request, f"{transfer}: {exc}", messages.WARNING)
+            else:
+                self.message_user(request, f"{transfer}: перемещено позиций: {moved}")
+
+
+@admin.register(AssetMovement)
+class AssetMovementAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "asset", "from_location", "to_location", "transfer", "moved_by")
+    list_filter = ("to_location", "from_location")
+    search_fields = ("asset__name", "asset__inventory_code")
+    list_select_related = ("asset", "from_location", "to_location", "transfer", "moved_by")
+    readonly_fields = ("asset", "from_location", "to_location", "transfer", "moved_by", "created_at")
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(Stocktake)
+class StocktakeAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "location", "status", "started_by", "created_at", "closed_at", "applied_at")
+    list_filter = ("status", "location")
+    autocomplete_fields = ("location", "started_by")
+    readonly_fields = ("status", "created_at", "closed_at", "applied_at", "items_link")
+    actions = ("reconcile", "apply_resolutions")
+
+    def save_model(self, request, obj, form, change):
+        if not change and obj.started_by is None:
+            obj.started_by = request.user
+        super().save_model(request, obj, form, change)
+
+    @admin.display(description="Строки")
+    def items_link(self, obj):
+        if not obj.pk:
+            return "—"
+        url = reverse("admin:inventory_stocktakeitem_changelist") + f"?stocktake__id__exact={obj.pk}"
+        summary = ", ".join(f"{StocktakeItem.Result(result).label}: {total}" for result, total in obj.summary().items() if total)
+        return format_html('<a href="{}">{}</a>', url, summary or "нет строк")
+
+    @admin.action(description="Закрыть и сверить")
+    def reconcile(self, request, queryset):
+        self._run(request, queryset, lambda stocktake: stocktake.reconcile())
+
+    @admin.action(description="Применить результаты сверки")
+    def apply_resolutions(self, request, queryset):
+        self._run(request, queryset, lambda stocktake: stocktake.apply_resolutions(by=request.user))
+
+    def _run(self, request, queryset, operation):
+        for stocktake in queryset.select_related("location"):
+            try:
+                result = operation(stocktake)
+            except ValueError as exc:
+                self.message_user(request, f"{stocktake}: {exc}", messages.WARNING)
+                continue
+            details = ", ".join(f"{key}: {value}" for key, value in result.items())
+            self.message_user(request, f"{stocktake}: {details}")
+
+
+@admin.register(StocktakeItem)
+class StocktakeItemAdmin(admin.ModelAdmin):
+    list_display = ("inventory_code", "stocktake", "result", "asset", "recorded_location", "scanned_at")
+    list_filter = ("result", "stocktake")
+    search_fields = ("inventory_code",)
+    list_select_related = ("stocktake__location", "asset", "recorded_location")
+    readonly_fields = ("stocktake", "inventory_code", "asset", "recorded_location", "result", "scanned_at")
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
 
 
 @admin.register(AssetLogEntry)
 class AssetLogEntryAdmin(admin.ModelAdmin):
-    list_display = ("created_at", "asset", "action", "performed_by", "from_status", "to_status")
+    list_display = ("created_at", "asset", "action", "performed_by", "from_status", "to_status", "assignee")
     list_filter = ("action", "from_status", "to_status", "created_at")
     search_fields = ("asset__name", "asset__inventory_code", "notes")
-    autocomplete_fields = ("asset", "performed_by")
+    autocomplete_fields = ("asset", "performed_by", "assignee")
     readonly_fields = ("created_at",)
+    list_select_related = ("asset", "performed_by", "assignee")
+    show_full_result_count = False
+
+
+@admin.register(InventorySnapshot)
+class InventorySnapshotAdmin(admin.ModelAdmin):
+    list_display = ("taken_at", "asset_count")
+    readonly_fields = ("taken_at", "asset_count")
+    date_hierarchy = "taken_at"
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Exists, OuterRef, QuerySet
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Asset, ExpiryNotice, MaintenanceRecord
+
+WARRANTY_WINDOW_DAYS = 30
+MAINTENANCE_WINDOW_DAYS = 7
+DIGEST_SUBJECT = "Инвентарь: истекающие гарантии и плановое обслуживание"
+
+
+@dataclass(frozen=True)
+class ExpiryAlert:
+    kind: str
+    object_id: int
+    due_on: date
+    inventory_code: str
+    asset_name: str
+    title: str = ""
+
+
+@dataclass
+class AlertRun:
+    alerts: int = 0
+    sent: int = 0
+    skipped_recipients: int = 0
+    digests: dict = field(default_factory=dict)
+
+
+def not_notified(queryset: QuerySet, kind: str, due_field: str) -> QuerySet:
+    """Антиджойн с отметками: уже сообщённые сроки не читаются повторно, и работа повторного запуска пропорциональна новому."""
+    sent = ExpiryNotice.objects.filter(kind=kind, object_id=OuterRef("pk"), due_on=OuterRef(due_field))
+    return queryset.filter(~Exists(sent))
+
+
+def warranty_alerts(today: date, days: int) -> list[tuple[ExpiryAlert, tuple]]:
+    """Гарантии, истекающие в окне; диапазон по индексу на warranty_expiration. Адресаты — ответственный и контакт локации."""
+    assets = Asset.objects.filter(warranty_expiration__range=(today, today + timedelta(days=days))).exclude(
+        status__in=(Asset.Status.RETIRED, Asset.Status.LOST)
+    )
+    rows = (
+        not_notified(assets, ExpiryNotice.Kind.WARRANTY, "warranty_expiration")
+        .order_by("warranty_expiration", "pk")
+        .values_list("pk", "warranty_expiration", "inventory_code", "name", "custodian_id", "location__contact_id")
+    )
+    return [
+        (ExpiryAlert(ExpiryNotice.Kind.WARRANTY, pk, due_on, code, name), (custodian_id, contact_id))
+        for pk, due_on, code, name, custodian_id, contact_id in rows
+    ]
+
+
+def maintenance_alerts(today: date, days: int) -> list[tuple[ExpiryAlert, tuple]]:
+    """Незавершённые работы в окне; читаются по частичному индексу (status, scheduled_for).
+
+    Адресат — ответственный за работу, без него — ответственный за позицию.
+    """
+    records = MaintenanceRecord.objects.open().filter(scheduled_for__range=(today, today + timedelta(days=days)))
+    rows = (
+        not_notified(records, ExpiryNotice.Kind.MAINTENANCE, "scheduled_for")
+        .order_by("scheduled_for", "pk")
+        .values_list(
+            "pk", "scheduled_for", "asset__inventory_code", "asset__name", "title", "responsible_id", "asset__custodian_id"
+        )
+    )
+    return [
+        (ExpiryAlert(ExpiryNotice.Kind.MAINTENANCE, pk, due_on, code, name, title), (responsible_id or custodian_id,))
+        for pk, due_on, code, name, title, responsible_id, custodian_id in rows
+    ]
+
+
+def send_expiry_alerts(
+    *,
+    today: date | None = None,
+    warranty_days: int = WARRANTY_WINDOW_DAYS,
+    maintenance_days: int = MAINTENANCE_WINDOW_DAYS,
+    dry_run: bool = False,
+) -> AlertRun:
+    """Одна сводка на адресата через общий почтовый backend; затем отметки об отправке одним INSERT.
+
+    Число запросов не зависит от числа позиций. Сроки без адресата с почтой тоже отмечаются —
+    повторный запуск их всё равно не доставит. Если отправка упала, отметки не пишутся и
+    следующий запуск повторит сводки целиком.
+    """
+    today = today or timezone.localdate()
+    found = warranty_alerts(today, warranty_days) + maintenance_alerts(today, maintenance_days)
+    run = AlertRun(alerts=len(found))
+
+    by_recipient: dict[int, list[ExpiryAlert]] = defaultdict(list)
+    for alert, recipients in found:
+        for user_id in dict.fromkeys(recipients):
+            if user_id is not None:
+                by_recipient[user_id].append(alert)
+    users = get_user_model().objects.in_bulk(list(by_recipient)) if by_recipient else {}
+
+    messages = []
+    for user_id, alerts in by_recipient.items():
+        user = users.get(user_id)
+        if user is None or not user.email:
+            run.skipped_recipients += 1
+            continue
+        run.digests[user.email] = alerts
+        context = {
+            "user": user,
+            "today": today,
+            "warranty": [alert for alert in alerts if alert.kind == ExpiryNotice.Kind.WARRANTY],
+            "maintenance": [alert for alert in alerts if alert.kind == ExpiryNotice.Kind.MAINTENANCE],
+        }
+        body = render_to_string("inventory/email/expiry_digest.txt", context)
+        messages.append(EmailMessage(DIGEST_SUBJECT, body, to=[user.email]))
+
+    if dry_run:
+        return run
+    if messages:
+        run.sent = get_connection().send_messages(messages) or 0
+    if found:
+        ExpiryNotice.objects.bulk_create(
+            [ExpiryNotice(kind=alert.kind, object_id=alert.object_id, due_on=alert.due_on) for alert, _ in found],
+            ignore_conflicts=True,
+        )
+    # прошедшие сроки в окно больше не попадут — их отметки не нужны
+    ExpiryNotice.objects.filter(due_on__lt=today).delete()
+    return run
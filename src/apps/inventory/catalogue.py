@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+
+from django.db.models import Q, QuerySet
+
+from .models import Asset
+
+CATALOGUE_PAGE_SIZE = 50
+CATALOGUE_ORDERING = ("name", "inventory_code")
+
+
+def is_ranked(assets: QuerySet) -> bool:
+    """Результат поиска: сначала по релевантности ``search_rank``, затем в обычном порядке каталога."""
+    return "search_rank" in assets.query.annotations
+
+
+def encode_cursor(asset: Asset, *, ranked: bool = False) -> str:
+    values = [asset.name, asset.inventory_code]
+    if ranked:
+        values.insert(0, asset.search_rank)
+    raw = json.dumps(values, ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(value: str, *, ranked: bool = False) -> tuple:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != (3 if ranked else 2):
+        raise ValueError("Invalid cursor")
+    if ranked and (isinstance(values[0], bool) or not isinstance(values[0], (int, float))):
+        raise ValueError("Invalid cursor")
+    if not all(isinstance(item, str) for item in values[-2:]):
+        raise ValueError("Invalid cursor")
+    return tuple(values)
+
+
+def after_cursor(cursor: tuple) -> Q:
+    """Условие «строго после курсора» для порядка ([-search_rank,] name, inventory_code).
+
+    Избыточное ``name >= …`` даёт планировщику диапазон по ведущей колонке индекса.
+    """
+    if len(cursor) == 3:
+        rank, name, inventory_code = cursor
+        return Q(search_rank__lt=rank) | (Q(search_rank=rank) & after_cursor((name, inventory_code)))
+    name, inventory_code = cursor
+    return Q(name__gte=name) & (Q(name__gt=name) | Q(name=name, inventory_code__gt=inventory_code))
+
+
+def get_asset_page(
+    assets: QuerySet,
+    *,
+    after: str | None = None,
+    limit: int = CATALOGUE_PAGE_SIZE,
+) -> tuple[list[Asset], str | None]:
+    """Страница каталога по keyset-курсору без COUNT(*); возвращает позиции и курсор следующей страницы."""
+    ranked = is_ranked(assets)
+    if after:
+        assets = assets.filter(after_cursor(decode_cursor(after, ranked=ranked)))
+    ordering = ("-search_rank", *CATALOGUE_ORDERING) if ranked else CATALOGUE_ORDERING
+    items = list(assets.order_by(*ordering)[: limit + 1])
+    if len(items) > limit:
+        items = items[:limit]
+        return items, encode_cursor(items[-1], ranked=ranked)
+    return items, None
+
+
+def serialize_asset(asset: Asset) -> dict:
+    return {
+        "id": asset.pk,
+        "name": asset.name,
+        "inventory_code": asset.inventory_code,
+        "status": asset.status,
+        "condition": asset.condition,
+        "category_id": asset.category_id,
+        "location_id": asset.location_id,
+        "vendor_id": asset.vendor_id,
+        "assigned_to_id": asset.assigned_to_id,
+    }
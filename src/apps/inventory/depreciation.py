@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from datetime import date
+from decimal import Decimal
+from itertools import batched
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import FloatField, TextChoices, Value
+from django.db.models.functions import Cast, Coalesce
+
+from .models import Asset, AssetCategory, Location, Vendor
+from .stats import REPORTS_GENERATION_KEY
+
+DEPRECIATION_CHUNK_SIZE = 20000
+DEPRECIATION_CACHE_TIMEOUT = 60 * 60
+DEFAULT_USEFUL_LIFE_MONTHS = 60
+# двойной уменьшаемый остаток: месячная норма 2 / срок
+DECLINING_FACTOR = 2.0
+DAYS_PER_MONTH = 365.25 / 12
+
+
+class DepreciationMethod(TextChoices):
+    STRAIGHT_LINE = "straight_line", "Линейный"
+    DECLINING_BALANCE = "declining_balance", "Уменьшаемого остатка"
+
+
+GROUPINGS = {"category": "Категория", "location": "Локация", "vendor": "Поставщик"}
+CSV_HEADER = ("group", "assets", "cost", "depreciation", "book_value")
+
+
+def book_values(
+    cost: np.ndarray, age_months: np.ndarray, life_months: np.ndarray, salvage_share: np.ndarray, method: str
+) -> np.ndarray:
+    """Остаточная стоимость позиций; не опускается ниже ликвидационной (доля ``salvage_share`` от стоимости).
+
+    Линейный метод списывает стоимость за вычетом ликвидационной равными долями за срок;
+    уменьшаемый остаток убывает геометрически и останавливается на ликвидационной стоимости.
+    """
+    age = np.clip(age_months, 0, None)
+    salvage = cost * salvage_share
+    if method == DepreciationMethod.STRAIGHT_LINE:
+        return cost - (cost - salvage) * np.clip(age / life_months, 0, 1)
+    rate = np.minimum(DECLINING_FACTOR / life_months, 1)
+    return np.maximum(cost * (1 - rate) ** age, salvage)
+
+
+def asset_columns(as_of: date, chunk_size: int) -> Iterator[tuple[np.ndarray, ...]]:
+    """Колонки учитываемых позиций пачками: id разрезов (0 — не указано), стоимость и дата закупки."""
+    rows = (
+        Asset.objects.filter(purchase_price__gt=0, purchase_date__lte=as_of)
+        .exclude(status=Asset.Status.RETIRED)
+        .order_by()
+        .values_list(
+            "category_id",
+            Coalesce("location_id", Value(0)),
+            Coalesce("vendor_id", Value(0)),
+            Cast("purchase_price", FloatField()),
+            "purchase_date",
+        )
+    )
+    for chunk in batched(rows.iterator(chunk_size=chunk_size), chunk_size):
+        category, location, vendor, cost, purchased = zip(*chunk)
+        yield (
+            np.array(category, dtype=np.int64),
+            np.array(location, dtype=np.int64),
+            np.array(vendor, dtype=np.int64),
+            np.array(cost, dtype=np.float64),
+            np.array(purchased, dtype="datetime64[D]"),
+        )
+
+
+class GroupTotals:
+    """Суммы (позиций, стоимость, остаточная стоимость) по id разреза, накапливаемые по пачкам."""
+
+    def __init__(self) -> None:
+        self.totals: dict[int, np.ndarray] = defaultdict(lambda: np.zeros(3))
+
+    def add(self, ids: np.ndarray, cost: np.ndarray, book: np.ndarray) -> None:
+        keys, inverse = np.unique(ids, return_inverse=True)
+        sums = np.column_stack(
+            (
+                np.bincount(inverse, minlength=len(keys)),
+                np.bincount(inverse, weights=cost, minlength=len(keys)),
+                np.bincount(inverse, weights=book, minlength=len(keys)),
+            )
+        )
+        for key, row in zip(keys.tolist(), sums):
+            self.totals[key] += row
+
+    def rows(self, names: dict[int, str]) -> list[dict]:
+        rows = [report_row(names.get(key, "—"), sums) for key, sums in self.totals.items()]
+        return sorted(rows, key=lambda row: -row["book_value"])
+
+
+def money(value: float) -> Decimal:
+    return Decimal(f"{value:.2f}")
+
+
+def report_row(name: str, sums) -> dict:
+    count, cost, book = sums
+    return {
+        "name": name,
+        "assets": int(count),
+        "cost": money(cost),
+        "depreciation": money(cost - book),
+        "book_value": money(book),
+    }
+
+
+def compute_depreciation_report(as_of: date, method: str, *, chunk_size: int = DEPRECIATION_CHUNK_SIZE) -> dict:
+    """Стоимость, накопленная амортизация и остаточная стоимость по категориям, локациям и поставщикам.
+
+    Позиции читаются колонками через values_list пачками, расчёт и суммы по разрезам — операции
+    над массивами NumPy на пачку; экземпляры моделей не создаются. Срок и ликвидационная доля
+    берутся из категории.
+    """
+    category_names, lives, salvage = {}, {}, {}
+    categories = AssetCategory.objects.order_by().values_list("pk", "name", "useful_life_months", "salvage_percent")
+    for pk, name, life, salvage_percent in categories:
+        category_names[pk] = name
+        lives[pk] = life or DEFAULT_USEFUL_LIFE_MONTHS
+        salvage[pk] = salvage_percent / 100
+    life_table = np.full(max(lives, default=0) + 1, DEFAULT_USEFUL_LIFE_MONTHS, dtype=np.float64)
+    life_table[list(lives)] = list(lives.values())
+    salvage_table = np.zeros(len(life_table))
+    salvage_table[list(salvage)] = list(salvage.values())
+
+    totals = {group: GroupTotals() for group in GROUPINGS}
+    overall = np.zeros(3)
+    reference = np.datetime64(as_of, "D")
+    for category, location, vendor, cost, purchased in asset_columns(as_of, chunk_size):
+        age = (reference - purchased).astype(np.float64) / DAYS_PER_MONTH
+        book = book_values(cost, age, life_table[category], salvage_table[category], method)
+        for group, ids in (("category", category), ("location", location), ("vendor", vendor)):
+            totals[group].add(ids, cost, book)
+        overall += (len(cost), cost.sum(), book.sum())
+
+    names = {"category": category_names}
+    for group, model in (("location", Location), ("vendor", Vendor)):
+        names[group] = dict(model.objects.filter(pk__in=list(totals[group].totals)).values_list("pk", "name"))
+    return {
+        "as_of": as_of,
+        "method": method,
+        "groups": {group: totals[group].rows(names[group]) for group in GROUPINGS},
+        "total": report_row("Итого", overall),
+    }
+
+
+def get_depreciation_report(as_of: date, method: str) -> dict:
+    """Отчёт из кэша по дате и методу; изменения позиций, категорий, локаций и поставщиков сбрасывают все даты сразу."""
+    generation = cache.get_or_set(REPORTS_GENERATION_KEY, time.time_ns, None)
+    key = f"inventory:depreciation:{generation}:{as_of:%Y%m%d}:{method}"
+    report = cache.get(key)
+    if report is None:
+        report = compute_depreciation_report(as_of, method)
+        cache.set(key, report, DEPRECIATION_CACHE_TIMEOUT)
+    return report
+
+
+def report_csv_rows(report: dict, group: str) -> Iterator[tuple]:
+    yield CSV_HEADER
+    for row in (*report["groups"][group], report["total"]):
+        yield row["name"], row["assets"], row["cost"], row["depreciation"], row["book_value"]
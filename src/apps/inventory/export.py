@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import csv
+import json
+from collections.abc import AsyncIterator, Iterable, Iterator
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+from .catalogue import CATALOGUE_ORDERING
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+
+# (ключ в выгрузке, поле для values_list); ответственный собирается из трёх полей пользователя
+EXPORT_FIELDS = (
+    ("inventory_code", "inventory_code"),
+    ("name", "name"),
+    ("serial_number", "serial_number"),
+    ("category", "category__name"),
+    ("status", "status"),
+    ("condition", "condition"),
+    ("location", "location__name"),
+    ("vendor", "vendor__name"),
+    ("purchase_date", "purchase_date"),
+    ("purchase_price", "purchase_price"),
+    ("warranty_expiration", "warranty_expiration"),
+)
+CUSTODIAN_FIELDS = ("custodian__first_name", "custodian__last_name", "custodian__username")
+EXPORT_HEADER = (*(key for key, _ in EXPORT_FIELDS), "custodian")
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def export_rows(assets: QuerySet, *, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[tuple]:
+    """Строки выгрузки через серверный курсор: без экземпляров моделей, память не растёт с объёмом."""
+    lookups = (*(lookup for _, lookup in EXPORT_FIELDS), *CUSTODIAN_FIELDS)
+    if "status_as_of" in assets.query.annotations:
+        # выгрузка «на дату» — статус восстановлен history.with_state_as_of
+        lookups = tuple("status_as_of" if lookup == "status" else lookup for lookup in lookups)
+    rows = assets.order_by(*CATALOGUE_ORDERING).values_list(*lookups).iterator(chunk_size=chunk_size)
+    for row in rows:
+        *values, first_name, last_name, username = row
+        custodian = f"{first_name or ''} {last_name or ''}".strip() or username
+        yield (*values, custodian)
+
+
+def stream_csv(rows: Iterable[tuple]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield "\ufeff" + writer.writerow(EXPORT_HEADER)
+    for row in rows:
+        yield writer.writerow(["" if value is None else value for value in row])
+
+
+def stream_jsonl(rows: Iterable[tuple]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_HEADER, row)), ensure_ascii=False, cls=DjangoJSONEncoder) + "\n"
+
+
+def stream_export(assets: QuerySet, export_format: str, *, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    rows = export_rows(assets, chunk_size=chunk_size)
+    return stream_csv(rows) if export_format == "csv" else stream_jsonl(rows)
+
+
+async def aiterate(iterable: Iterable[str], *, batch_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[str]:
+    """Отдаёт синхронный поток под ASGI пачками.
+
+    Синхронный итератор Django под ASGI сначала собирает целиком в список; здесь пачки
+    читаются в одном потоке (thread_sensitive), где живёт соединение с серверным курсором.
+    """
+    iterator = iter(iterable)
+    next_batch = sync_to_async(lambda: "".join(islice(iterator, batch_size)), thread_sensitive=True)
+    while chunk := await next_batch():
+        yield chunk
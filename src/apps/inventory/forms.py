@@ -1,7 +1,13 @@
 from django import forms
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
+from .depreciation import GROUPINGS, DepreciationMethod
+from .history import as_of_moment, with_state_as_of
+from .importer import IMPORT_FORMATS
 from .models import Asset, AssetCategory, Location, MaintenanceRecord, Vendor
+from .search import search_assets
+from .specs import SpecCondition, filter_by_specs, parse_spec_filter
 
 User = get_user_model()
 
@@ -50,6 +56,110 @@ class AssetForm(forms.ModelForm):
                 field.widget.attrs.setdefault("class", "form-control form-control-lg")
 
 
+class AssetFilterForm(forms.Form):
+    q = forms.CharField(
+        label="Поиск",
+        required=False,
+        max_length=200,
+        widget=forms.SearchInput(attrs={"class": "form-control", "placeholder": "Название, номер, серийный…"}),
+    )
+    status = forms.ChoiceField(label="Статус", required=False, choices=[("", "Все статусы"), *Asset.Status.choices])
+    condition = forms.ChoiceField(
+        label="Состояние", required=False, choices=[("", "Любое состояние"), *Asset.Condition.choices]
+    )
+    category = forms.ModelChoiceField(
+        label="Категория", required=False, queryset=AssetCategory.objects.order_by("name"), empty_label="Все категории"
+    )
+    descendants = forms.BooleanField(
+        label="С подкатегориями",
+        required=False,
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
+    location = forms.ModelChoiceField(
+        label="Локация", required=False, queryset=Location.objects.order_by("name"), empty_label="Все локации"
+    )
+    vendor = forms.ModelChoiceField(
+        label="Поставщик", required=False, queryset=Vendor.objects.order_by("name"), empty_label="Все поставщики"
+    )
+    specs = forms.CharField(
+        label="Характеристики",
+        required=False,
+        max_length=500,
+        widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "ram>=16 cpu=M2"}),
+    )
+    as_of = forms.DateField(
+        label="Состояние на дату",
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field in self.fields.values():
+            field.widget.attrs.setdefault("class", "form-select")
+
+    def clean_specs(self) -> list[SpecCondition]:
+        try:
+            return parse_spec_filter(self.cleaned_data["specs"])
+        except ValueError as exc:
+            raise forms.ValidationError(str(exc)) from exc
+
+    def filters(self) -> dict:
+        """Заполненные и прошедшие проверку фильтры; неверные значения просто игнорируются."""
+        if not self.is_bound:
+            return {}
+        self.is_valid()
+        return {name: value for name, value in self.cleaned_data.items() if value not in (None, "", False)}
+
+    def filter(self, assets):
+        filters = self.filters()
+        query = filters.pop("q", "")
+        conditions = filters.pop("specs", [])
+        if as_of := filters.pop("as_of", None):
+            assets = with_state_as_of(assets, as_of_moment(as_of))
+            if "status" in filters:
+                filters["status_as_of"] = filters.pop("status")
+        if filters.pop("descendants", False) and "category" in filters:
+            filters["category__ancestor_links__ancestor"] = filters.pop("category")
+        return search_assets(filter_by_specs(assets.filter(**filters), conditions), query)
+
+
+class DepreciationReportForm(forms.Form):
+    as_of = forms.DateField(
+        label="На дату",
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+    )
+    method = forms.ChoiceField(
+        label="Метод", required=False, choices=DepreciationMethod.choices, widget=forms.Select(attrs={"class": "form-select"})
+    )
+    group = forms.ChoiceField(
+        label="Разрез", required=False, choices=GROUPINGS.items(), widget=forms.Select(attrs={"class": "form-select"})
+    )
+
+    def params(self) -> tuple:
+        """(дата, метод, разрез); незаполненные значения — сегодня, линейный метод, категории."""
+        data = self.cleaned_data if self.is_bound and self.is_valid() else {}
+        return (
+            data.get("as_of") or timezone.localdate(),
+            data.get("method") or DepreciationMethod.STRAIGHT_LINE,
+            data.get("group") or "category",
+        )
+
+
+class AssetImportForm(forms.Form):
+    file = forms.FileField(label="Файл CSV или JSONL", help_text="Колонки как в выгрузке: inventory_code, name, category, …")
+    dry_run = forms.BooleanField(label="Только проверить, ничего не сохранять", required=False, initial=True)
+
+    def clean_file(self):
+        upload = self.cleaned_data["file"]
+        extension = upload.name.rsplit(".", 1)[-1].lower()
+        if extension not in IMPORT_FORMATS:
+            raise forms.ValidationError("Поддерживаются файлы .csv и .jsonl")
+        self.cleaned_data["format"] = extension
+        return upload
+
+
 class LocationForm(forms.ModelForm):
     class Meta:
         model = Location
@@ -91,7 +201,7 @@ class VendorForm(forms.ModelForm):
 class AssetCategoryForm(forms.ModelForm):
     class Meta:
         model = AssetCategory
-        fields = ("name", "slug", "description", "parent")
+        fields = ("name", "slug", "description", "parent", "useful_life_months", "salvage_percent")
         widgets = {
             "description": forms.Textarea(attrs={"rows": 3, "class": "form-control"}),
         }
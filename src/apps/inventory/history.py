@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db.models import (
+    BigIntegerField,
+    Case,
+    Exists,
+    F,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import AssetLogEntry, AssetState, InventorySnapshot
+
+Action = AssetLogEntry.Action
+# записи журнала, меняющие восстанавливаемое состояние
+STATUS_ACTIONS = (Action.CREATED, Action.STATUS_CHANGE)
+ASSIGNMENT_ACTIONS = (Action.ASSIGNED, Action.RETURNED)
+
+
+def as_of_moment(day: date) -> datetime:
+    """Состояние «на дату» — на конец дня, то есть на начало следующего в текущем часовом поясе."""
+    return timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def state_entries(actions, **window) -> QuerySet:
+    """Записи журнала позиции из внешнего запроса; читаются по индексу (asset, created_at, id)."""
+    return AssetLogEntry.objects.filter(asset=OuterRef("pk"), action__in=actions, **window)
+
+
+def with_state_as_of(assets: QuerySet, moment: datetime) -> QuerySet:
+    """Позиции, существовавшие на ``moment``, с аннотациями ``status_as_of`` и ``assigned_as_of``.
+
+    Отсчёт идёт от ближайшего более раннего снимка: последняя запись журнала между снимком и
+    ``moment`` даёт итог проигрывания, без неё берётся состояние из снимка. Позиции без снимка
+    и без записей до ``moment`` восстанавливаются назад — по первой записи после него.
+    """
+    snapshot = InventorySnapshot.objects.nearest(moment)
+    before = {"created_at__lt": moment}
+    if snapshot:
+        before["created_at__gt"] = snapshot.taken_at
+    latest = ("-created_at", "-pk")
+    earliest = ("created_at", "pk")
+    user_id = BigIntegerField()
+
+    status_before = state_entries(STATUS_ACTIONS, **before).order_by(*latest)
+    status_after = state_entries((Action.STATUS_CHANGE,), created_at__gte=moment).order_by(*earliest)
+    assigned_before = state_entries(ASSIGNMENT_ACTIONS, **before).order_by(*latest)
+    assigned_after = state_entries(ASSIGNMENT_ACTIONS, created_at__gte=moment).order_by(*earliest)
+    # после выдачи позиция у assignee, после возврата — ни у кого; до выдачи — ни у кого, до возврата — у вернувшего
+    holder_after_entry = Case(When(action=Action.ASSIGNED, then=F("assignee_id")), output_field=user_id)
+    holder_before_entry = Case(When(action=Action.RETURNED, then=F("assignee_id")), output_field=user_id)
+
+    status_sources = [Subquery(status_before.values("to_status")[:1])]
+    holder_cases = [
+        When(Exists(assigned_before), then=Subquery(assigned_before.annotate(holder=holder_after_entry).values("holder")[:1]))
+    ]
+    if snapshot:
+        states = AssetState.objects.filter(snapshot=snapshot, asset=OuterRef("pk"))
+        status_sources.append(Subquery(states.values("status")[:1]))
+        holder_cases.append(When(Exists(states), then=Subquery(states.values("assigned_to_id")[:1])))
+    status_sources += [Subquery(status_after.values("from_status")[:1]), F("status")]
+    holder_cases.append(
+        When(Exists(assigned_after), then=Subquery(assigned_after.annotate(holder=holder_before_entry).values("holder")[:1]))
+    )
+
+    return assets.filter(created_at__lt=moment).annotate(
+        status_as_of=Coalesce(*status_sources),
+        assigned_as_of=Case(*holder_cases, default=F("assigned_to_id"), output_field=user_id),
+    )
+
+
+def apply_state_as_of(assets: list) -> list:
+    """Подставляет восстановленные статус и получателя в загруженные позиции для отображения."""
+    holder_ids = {asset.assigned_as_of for asset in assets} - {None}
+    holders = get_user_model().objects.in_bulk(holder_ids) if holder_ids else {}
+    for asset in assets:
+        asset.status = asset.status_as_of
+        asset.assigned_to = holders.get(asset.assigned_as_of)
+    return assets
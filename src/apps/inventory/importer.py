@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Value
+from django.db.models.functions import Concat, Trim
+from django.utils.dateparse import parse_date
+
+from src.apps.counters.models import Counter
+
+from .models import Asset, AssetCategory, AssetLogEntry, Location, Vendor
+from .search import refresh_search_vectors
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_FORMATS = ("csv", "jsonl")
+
+
+@dataclass
+class RowError:
+    line: int
+    messages: list[str]
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    dry_run: bool = False
+    errors: list[RowError] = field(default_factory=list)
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+
+def read_rows(stream: Iterable[str], import_format: str) -> Iterator[tuple[int, dict]]:
+    """Строки файла как словари с номером строки; формат совпадает с выгрузкой export_assets."""
+    if import_format == "csv":
+        reader = csv.DictReader(line.lstrip("\ufeff") if index == 0 else line for index, line in enumerate(stream))
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else {"__invalid__": True}
+
+
+class LookupTable:
+    """Один словарь «код или название → id» на связанную таблицу; ключи без учёта регистра.
+
+    Поля ``keys`` перечисляются по старшинству: совпадение по более раннему полю (коду) важнее
+    совпадения по позднему (названию). Значение, которое в одном поле встречается у нескольких
+    записей, считается неоднозначным и не разрешается.
+    """
+
+    def __init__(self, queryset: models.QuerySet, *keys: str) -> None:
+        self.ids: dict[str, int] = {}
+        self.ambiguous: set[str] = set()
+        rows = list(queryset.order_by("pk").values_list("pk", *keys))
+        for index in range(len(keys)):
+            found: dict[str, int] = {}
+            for pk, *values in rows:
+                key = str(values[index] or "").strip().casefold()
+                if not key or key in self.ids:
+                    continue
+                if found.setdefault(key, pk) != pk:
+                    self.ambiguous.add(key)
+            self.ids.update((key, pk) for key, pk in found.items() if key not in self.ambiguous)
+
+    def _key(self, value) -> str | None:
+        return str(value).strip().casefold() if value not in (None, "") else None
+
+    def resolve(self, value) -> int | None:
+        return self.ids.get(self._key(value))
+
+    def is_ambiguous(self, value) -> bool:
+        return self._key(value) in self.ambiguous
+
+
+class AssetImporter:
+    """Пакетный импорт оборудования.
+
+    Связанные записи ищутся в словарях, загруженных один раз на импорт; строки проверяются
+    пачками, вставляются через bulk_create (или COPY на PostgreSQL), журнал CREATED и
+    счётчики пишутся одной операцией на пачку. Строки с ошибками пропускаются и попадают в отчёт.
+    Номера, занятые параллельным импортом между проверкой и вставкой, тоже становятся ошибками строк.
+    """
+
+    def __init__(self, *, user=None, dry_run: bool = False, use_copy: bool = False, chunk_size: int = IMPORT_CHUNK_SIZE):
+        self.user = user
+        self.dry_run = dry_run
+        self.use_copy = use_copy and connection.vendor == "postgresql"
+        self.chunk_size = chunk_size
+        self.categories = LookupTable(AssetCategory.objects.all(), "name", "slug")
+        self.locations = LookupTable(Location.objects.all(), "code", "name")
+        self.vendors = LookupTable(Vendor.objects.all(), "name")
+        # выгрузка пишет ответственного полным именем, поэтому его тоже принимаем
+        self.users = LookupTable(
+            get_user_model().objects.annotate(full_name=Trim(Concat("first_name", Value(" "), "last_name"))),
+            "username",
+            "email",
+            "full_name",
+        )
+        self.statuses = self._choice_lookup(Asset.Status)
+        self.conditions = self._choice_lookup(Asset.Condition)
+        self.seen_codes: set[str] = set()
+
+    @staticmethod
+    def _choice_lookup(choices) -> dict[str, str]:
+        lookup = {}
+        for value, label in choices.choices:
+            lookup[value.casefold()] = value
+            lookup[str(label).casefold()] = value
+        return lookup
+
+    def run(self, rows: Iterable[tuple[int, dict]]) -> ImportResult:
+        result = ImportResult(dry_run=self.dry_run)
+        rows = iter(rows)
+        while chunk := list(islice(rows, self.chunk_size)):
+            valid = self.validate_chunk(chunk, result)
+            if valid and not self.dry_run:
+                valid = self.insert_reconciled(valid, result)
+            result.created += len(valid)
+        if result.created and not self.dry_run:
+            from .stats import invalidate_inventory_stats
+
+            transaction.on_commit(invalidate_inventory_stats)
+        return result
+
+    def validate_chunk(self, chunk: list[tuple[int, dict]], result: ImportResult) -> list[tuple[int, Asset]]:
+        codes = {str(row.get("inventory_code") or "").strip() for _, row in chunk}
+        existing = set(Asset.objects.filter(inventory_code__in=codes - {""}).order_by().values_list("inventory_code", flat=True))
+        valid = []
+        for line, row in chunk:
+            asset, errors = self.build_asset(row, existing)
+            if errors:
+                result.errors.append(RowError(line, errors))
+            else:
+                valid.append((line, asset))
+        return valid
+
+    def insert_reconciled(self, valid: list[tuple[int, Asset]], result: ImportResult) -> list[tuple[int, Asset]]:
+        """Вставляет пачку; если номера заняли после проверки, такие строки уходят в ошибки, остальные вставляются заново."""
+        while valid:
+            try:
+                self.insert([asset for _, asset in valid])
+                return valid
+            except IntegrityError:
+                codes = [asset.inventory_code for _, asset in valid]
+                taken = set(Asset.objects.filter(inventory_code__in=codes).values_list("inventory_code", flat=True))
+                if not taken:
+                    raise
+                for line, asset in valid:
+                    if asset.inventory_code in taken:
+                        result.errors.append(RowError(line, [f"Инвентарный номер {asset.inventory_code} уже существует"]))
+                valid = [(line, asset) for line, asset in valid if asset.inventory_code not in taken]
+        return valid
+
+    def build_asset(self, row: dict, existing: set[str]) -> tuple[Asset | None, list[str]]:
+        if row.get("__invalid__"):
+            return None, ["Строка не является JSON-объектом"]
+        errors = []
+        name = str(row.get("name") or "").strip()
+        code = str(row.get("inventory_code") or "").strip()
+        serial_number = str(row.get("serial_number") or "").strip()
+        if not name:
+            errors.append("Не указано название")
+        if not code:
+            errors.append("Не указан инвентарный номер")
+        elif code in existing or code in self.seen_codes:
+            errors.append(f"Инвентарный номер {code} уже существует")
+        for key, value in (("name", name), ("inventory_code", code), ("serial_number", serial_number)):
+            max_length = Asset._meta.get_field(key).max_length
+            if len(value) > max_length:
+                errors.append(f"Слишком длинное значение поля {key}: больше {max_length} символов")
+
+        category_id = self.categories.resolve(row.get("category"))
+        if category_id is None:
+            errors.append(f"Неизвестная категория: {row.get('category') or '—'}")
+        related = {}
+        for attname, table, key in (
+            ("location_id", self.locations, "location"),
+            ("vendor_id", self.vendors, "vendor"),
+            ("custodian_id", self.users, "custodian"),
+        ):
+            value = row.get(key)
+            related[attname] = table.resolve(value)
+            if table.is_ambiguous(value):
+                errors.append(f"Неоднозначное значение поля {key}: {value}")
+            elif value not in (None, "") and related[attname] is None:
+                errors.append(f"Не найдено значение поля {key}: {value}")
+
+        status = self.statuses.get(str(row.get("status") or Asset.Status.AVAILABLE).strip().casefold())
+        if status is None:
+            errors.append(f"Неизвестный статус: {row.get('status')}")
+        condition = self.conditions.get(str(row.get("condition") or Asset.Condition.NEW).strip().casefold())
+        if condition is None:
+            errors.append(f"Неизвестное состояние: {row.get('condition')}")
+
+        dates = {}
+        for key in ("purchase_date", "warranty_expiration"):
+            dates[key] = self._parse_date(row.get(key))
+            if dates[key] is False:
+                errors.append(f"Неверная дата в поле {key}: {row.get(key)}")
+        price = self._parse_price(row.get("purchase_price"))
+        if price is False:
+            errors.append(f"Неверная стоимость: {row.get('purchase_price')}")
+
+        if errors:
+            return None, errors
+        self.seen_codes.add(code)
+        return (
+            Asset(
+                name=name,
+                inventory_code=code,
+                serial_number=serial_number,
+                category_id=category_id,
+                status=status,
+                condition=condition,
+                purchase_price=price,
+                notes=str(row.get("notes") or ""),
+                **dates,
+                **related,
+            ),
+            [],
+        )
+
+    @staticmethod
+    def _parse_date(value) -> date | None | bool:
+        if value in (None, ""):
+            return None
+        try:
+            return parse_date(str(value).strip()) or False
+        except ValueError:
+            return False
+
+    @staticmethod
+    def _parse_price(value) -> Decimal | None | bool:
+        if value in (None, ""):
+            return None
+        try:
+            price = Decimal(str(value).strip().replace(",", "."))
+        except InvalidOperation:
+            return False
+        return price.quantize(Decimal("0.01")) if price.is_finite() and abs(price) < 10**8 else False
+
+    def insert(self, assets: list[Asset]) -> None:
+        with transaction.atomic():
+            if self.use_copy:
+                self._copy(Asset, assets)
+                ids = dict(
+                    Asset.objects.filter(inventory_code__in=[asset.inventory_code for asset in assets]).values_list(
+                        "inventory_code", "pk"
+                    )
+                )
+                for asset in assets:
+                    asset.pk = ids[asset.inventory_code]
+            else:
+                Asset.objects.bulk_create(assets)
+            refresh_search_vectors(Asset.objects.filter(pk__in=[asset.pk for asset in assets]))
+            entries = [
+                AssetLogEntry(
+                    asset_id=asset.pk,
+                    action=AssetLogEntry.Action.CREATED,
+                    performed_by=self.user,
+                    to_status=asset.status,
+                    notes="Импорт",
+                )
+                for asset in assets
+            ]
+            if self.use_copy:
+                self._copy(AssetLogEntry, entries)
+            else:
+                AssetLogEntry.objects.bulk_create(entries)
+            for dimension, attname in Counter.objects.tracked_fields(Asset):
+                deltas: dict = {}
+                for asset in assets:
+                    value = getattr(asset, attname)
+                    deltas[value] = deltas.get(value, 0) + 1
+                Counter.objects.bump(dimension, deltas)
+
+    @staticmethod
+    def _copy(model, objects: list[models.Model]) -> None:
+        """COPY … FROM STDIN в текстовом формате; значения по умолчанию и auto_now берутся из pre_save()."""
+        fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+        buffer = io.StringIO()
+        for obj in objects:
+            buffer.write("\t".join(_copy_value(f, f.pre_save(obj, True)) for f in fields))
+            buffer.write("\n")
+        buffer.seek(0)
+        columns = ", ".join(connection.ops.quote_name(f.column) for f in fields)
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN", buffer)
+
+
+def _copy_value(model_field: models.Field, value) -> str:
+    if value is None:
+        return r"\N"
+    if isinstance(model_field, models.JSONField):
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, bool):
+        value = "t" if value else "f"
+    elif hasattr(value, "isoformat"):
+        value = value.isoformat()
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def import_assets(stream: Iterable[str], import_format: str, **options) -> ImportResult:
+    return AssetImporter(**options).run(read_rows(stream, import_format))
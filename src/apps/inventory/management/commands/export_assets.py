@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.apps.inventory.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, stream_export
+from src.apps.inventory.forms import AssetFilterForm
+from src.apps.inventory.models import Asset
+
+
+class Command(BaseCommand):
+    help = "Stream the asset register to CSV or JSON Lines using the same filters as the asset list"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv", help="Output format")
+        parser.add_argument("--output", "-o", help="Write to this file instead of stdout")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="Rows fetched per cursor round-trip")
+        for name in AssetFilterForm.base_fields:
+            parser.add_argument(f"--{name}", help=f"Filter by {name} (value or id)")
+
+    def handle(self, *args, **options):
+        form = AssetFilterForm({name: options[name] for name in AssetFilterForm.base_fields if options[name]})
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+        chunks = stream_export(form.filter(Asset.objects.all()), options["format"], chunk_size=options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as output:
+                output.writelines(chunks)
+            self.stderr.write(self.style.SUCCESS(f"Exported to {options['output']}"))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from src.apps.inventory.importer import IMPORT_CHUNK_SIZE, IMPORT_FORMATS, import_assets
+
+
+class Command(BaseCommand):
+    help = "Bulk-import assets from a CSV or JSON Lines file (the export_assets format)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, help="Input format (defaults to the file extension)")
+        parser.add_argument("--dry-run", action="store_true", help="Validate every row without writing anything")
+        parser.add_argument("--copy", action="store_true", help="Insert with PostgreSQL COPY (large files)")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Rows validated and inserted per batch")
+        parser.add_argument("--user", help="Username recorded as the author of the CREATED log entries")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        import_format = options["format"] or path.suffix.lstrip(".").lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError(f"Cannot detect format of {path.name}; pass --format")
+        user = None
+        if options["user"]:
+            user = get_user_model().objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"User {options['user']} not found")
+
+        with path.open(encoding="utf-8-sig", newline="") as stream:
+            result = import_assets(
+                stream,
+                import_format,
+                user=user,
+                dry_run=options["dry_run"],
+                use_copy=options["copy"],
+                chunk_size=options["chunk_size"],
+            )
+
+        for error in result.errors:
+            self.stderr.write(f"line {error.line}: {'; '.join(error.messages)}")
+        verb = "would be created" if result.dry_run else "created"
+        style = self.style.WARNING if result.errors else self.style.SUCCESS
+        self.stdout.write(style(f"{result.created} assets {verb}, {result.failed} rows rejected."))
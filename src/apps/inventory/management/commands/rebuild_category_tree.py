@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from src.apps.inventory.models import CategoryClosure
+
+
+class Command(BaseCommand):
+    help = "Rebuild the category closure table from AssetCategory.parent"
+
+    def handle(self, *args, **options):
+        total = CategoryClosure.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Category tree rebuilt ({total} links)."))
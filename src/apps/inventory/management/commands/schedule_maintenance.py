@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from src.apps.inventory.models import MaintenanceRule
+
+
+class Command(BaseCommand):
+    help = "Create upcoming maintenance records from active recurrence rules; safe to run repeatedly (e.g. daily)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--horizon",
+            type=int,
+            default=None,
+            help="Days ahead to schedule; defaults to each rule's own lead time",
+        )
+        parser.add_argument("--rule", type=int, action="append", help="Only these rule ids")
+
+    def handle(self, *args, **options):
+        rules = MaintenanceRule.objects.active()
+        if options["rule"]:
+            rules = rules.filter(pk__in=options["rule"])
+        created = rules.generate(horizon_days=options["horizon"])
+        for rule_id, total in created.items():
+            if total:
+                self.stdout.write(f"rule {rule_id}: {total} records")
+        self.stdout.write(self.style.SUCCESS(f"Scheduled {sum(created.values())} maintenance records."))
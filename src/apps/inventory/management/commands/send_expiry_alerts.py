@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from src.apps.inventory.alerts import (
+    MAINTENANCE_WINDOW_DAYS,
+    WARRANTY_WINDOW_DAYS,
+    send_expiry_alerts,
+)
+
+
+class Command(BaseCommand):
+    help = "Email one digest per recipient about expiring warranties and upcoming maintenance; safe to run nightly"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--warranty-days", type=int, default=WARRANTY_WINDOW_DAYS, help="Warn about warranties expiring within N days"
+        )
+        parser.add_argument(
+            "--maintenance-days", type=int, default=MAINTENANCE_WINDOW_DAYS, help="Warn about maintenance due within N days"
+        )
+        parser.add_argument("--dry-run", action="store_true", help="List digests without sending or marking them")
+
+    def handle(self, *args, **options):
+        run = send_expiry_alerts(
+            warranty_days=options["warranty_days"],
+            maintenance_days=options["maintenance_days"],
+            dry_run=options["dry_run"],
+        )
+        if options["dry_run"]:
+            for email, alerts in run.digests.items():
+                self.stdout.write(f"{email}: {len(alerts)} items")
+        if run.skipped_recipients:
+            self.stderr.write(f"{run.skipped_recipients} recipients have no email address")
+        self.stdout.write(self.style.SUCCESS(f"{run.alerts} new alerts, {run.sent} digests sent."))
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from src.apps.inventory.models import InventorySnapshot
+
+
+class Command(BaseCommand):
+    help = "Store a snapshot of every asset's status and assignee; run periodically (e.g. nightly from cron)"
+
+    def handle(self, *args, **options):
+        snapshot = InventorySnapshot.objects.take()
+        self.stdout.write(self.style.SUCCESS(f"{snapshot} taken ({snapshot.asset_count} assets)."))
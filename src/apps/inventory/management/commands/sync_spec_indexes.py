@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from src.apps.inventory.models import Asset, AssetCategory
+from src.apps.inventory.specs import SPEC_INDEX_PREFIX, promoted_spec_indexes
+
+
+class Command(BaseCommand):
+    help = "Create or drop partial expression indexes for the promoted spec keys of each category"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only show what would change")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write("Spec indexes are only maintained on PostgreSQL.")
+            return
+        wanted = promoted_spec_indexes(AssetCategory.objects.all())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexname FROM pg_indexes WHERE tablename = %s AND indexname LIKE %s",
+                [Asset._meta.db_table, SPEC_INDEX_PREFIX + "%"],
+            )
+            existing = {name for (name,) in cursor.fetchall()}
+        created = sorted(wanted.keys() - existing)
+        dropped = sorted(existing - wanted.keys())
+        # CONCURRENTLY не блокирует запись в таблицу, но не работает внутри транзакции
+        concurrently = not connection.in_atomic_block
+        with connection.schema_editor(atomic=False) as schema_editor:
+            for name in created:
+                self.stdout.write(f"create {name}")
+                if not options["dry_run"]:
+                    schema_editor.execute(wanted[name].create_sql(Asset, schema_editor, concurrently=concurrently))
+            for name in dropped:
+                self.stdout.write(f"drop {name}")
+                if not options["dry_run"]:
+                    keyword = "CONCURRENTLY " if concurrently else ""
+                    schema_editor.execute(f"DROP INDEX {keyword}IF EXISTS {connection.ops.quote_name(name)}")
+        self.stdout.write(self.style.SUCCESS(f"{len(created)} created, {len(dropped)} dropped."))
@@ -0,0 +1,74 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ("inventory", "0002_remove_asset_tags"),
+    )
+
+    operations = (
+        migrations.AddIndex(
+            model_name="asset",
+            index=models.Index(fields=["name", "inventory_code"], name="inventory_a_name_5d8d0d_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="asset",
+            index=models.Index(fields=["status", "name", "inventory_code"], name="inventory_a_status_cce4c6_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="asset",
+            index=models.Index(fields=["condition", "name", "inventory_code"], name="inventory_a_conditi_0c9fb5_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="asset",
+            index=models.Index(fields=["category", "name", "inventory_code"], name="inventory_a_categor_471fb8_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="asset",
+            index=models.Index(fields=["location", "name", "inventory_code"], name="inventory_a_locatio_d190ed_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="asset",
+            index=models.Index(fields=["vendor", "name", "inventory_code"], name="inventory_a_vendor__4651a8_idx"),
+        ),
+        # the composite indexes above lead with the foreign key, so the single-column ones are redundant
+        migrations.AlterField(
+            model_name="asset",
+            name="category",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="assets",
+                to="inventory.assetcategory",
+                verbose_name="Категория",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="asset",
+            name="location",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="assets",
+                to="inventory.location",
+                verbose_name="Локация",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="asset",
+            name="vendor",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="assets",
+                to="inventory.vendor",
+                verbose_name="Поставщик",
+            ),
+        ),
+    )
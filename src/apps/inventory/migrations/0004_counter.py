@@ -0,0 +1,59 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+SOURCES = {
+    "asset.status": ("inventory", "Asset", "status"),
+    "asset.category": ("inventory", "Asset", "category_id"),
+    "task.status": ("tasks", "Task", "status"),
+    "task.priority": ("tasks", "Task", "priority"),
+}
+
+
+def fill_counters(apps, schema_editor):
+    Counter = apps.get_model("inventory", "Counter")
+    for dimension, (app_label, model_name, attname) in SOURCES.items():
+        model = apps.get_model(app_label, model_name)
+        rows = model.objects.order_by().values_list(attname).annotate(total=Count("pk"))
+        Counter.objects.bulk_create(
+            Counter(dimension=dimension, value=str(value), count=total) for value, total in rows
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ("inventory", "0003_asset_catalogue_indexes"),
+        ("tasks", "0004_task_rank"),
+    )
+
+    operations = (
+        migrations.CreateModel(
+            name="Counter",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "dimension",
+                    models.CharField(
+                        choices=[
+                            ("asset.status", "Оборудование по статусам"),
+                            ("asset.category", "Оборудование по категориям"),
+                            ("task.status", "Задачи по статусам"),
+                            ("task.priority", "Задачи по приоритетам"),
+                        ],
+                        max_length=32,
+                        verbose_name="Измерение",
+                    ),
+                ),
+                ("value", models.CharField(max_length=64, verbose_name="Значение")),
+                ("count", models.BigIntegerField(default=0, verbose_name="Количество")),
+            ],
+            options={
+                "verbose_name": "Счётчик",
+                "verbose_name_plural": "Счётчики",
+                "constraints": [
+                    models.UniqueConstraint(fields=("dimension", "value"), name="inventory_counter_unique")
+                ],
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    )
@@ -0,0 +1,64 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_INDEX = "inventory_asset_search_gin"
+TRIGRAM_INDEX = "inventory_asset_codes_trgm"
+
+
+def fill_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    from django.contrib.postgres.search import SearchVector
+    from django.db.models import OuterRef, Subquery
+
+    Asset = apps.get_model("inventory", "Asset")
+    AssetCategory = apps.get_model("inventory", "AssetCategory")
+    category_name = Subquery(AssetCategory.objects.filter(pk=OuterRef("category_id")).values("name")[:1])
+    Asset.objects.update(
+        search_vector=SearchVector("inventory_code", "serial_number", config="simple", weight="A")
+        + SearchVector("name", config="russian", weight="A")
+        + SearchVector(category_name, config="russian", weight="B")
+        + SearchVector("notes", config="russian", weight="D")
+    )
+
+
+def create_search_indexes(apps, schema_editor):
+    # GIN и pg_trgm есть только в PostgreSQL, поэтому индексы не описаны в Meta модели
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"CREATE INDEX {SEARCH_INDEX} ON inventory_asset USING gin (search_vector)")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX {TRIGRAM_INDEX} ON inventory_asset "
+        "USING gin (inventory_code gin_trgm_ops, serial_number gin_trgm_ops)"
+    )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {TRIGRAM_INDEX}")
+    schema_editor.execute(f"DROP INDEX IF EXISTS {SEARCH_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ("inventory", "0004_counter"),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name="asset",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True, verbose_name="Поисковый индекс"
+            ),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    )
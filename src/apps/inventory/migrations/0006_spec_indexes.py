@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+SPECS_INDEX = "inventory_asset_specs_gin"
+
+
+def create_specs_index(apps, schema_editor):
+    # GIN jsonb_path_ops есть только в PostgreSQL, поэтому индекс не описан в Meta модели
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    from django.contrib.postgres.indexes import GinIndex
+
+    Asset = apps.get_model("inventory", "Asset")
+    schema_editor.add_index(Asset, GinIndex(fields=["specs"], opclasses=["jsonb_path_ops"], name=SPECS_INDEX))
+
+
+def drop_specs_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {SPECS_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ("inventory", "0005_asset_search_vector"),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name="assetcategory",
+            name="promoted_specs",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text='Числовые ключи specs для индексов, например ["ram", "display.size"]; '
+                "индексы создаёт manage.py sync_spec_indexes",
+                verbose_name="Ключевые характеристики",
+            ),
+        ),
+        migrations.RunPython(create_specs_index, drop_specs_index),
+    )
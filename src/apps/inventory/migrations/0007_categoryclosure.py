@@ -0,0 +1,61 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_closure(apps, schema_editor):
+    AssetCategory = apps.get_model("inventory", "AssetCategory")
+    CategoryClosure = apps.get_model("inventory", "CategoryClosure")
+    parents = dict(AssetCategory.objects.values_list("pk", "parent_id"))
+    links = []
+    for category_id in parents:
+        ancestor_id, depth = category_id, 0
+        while ancestor_id is not None and depth <= len(parents):
+            links.append(CategoryClosure(ancestor_id=ancestor_id, descendant_id=category_id, depth=depth))
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    CategoryClosure.objects.bulk_create(links, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ("inventory", "0006_spec_indexes"),
+    )
+
+    operations = (
+        migrations.CreateModel(
+            name="CategoryClosure",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("depth", models.PositiveSmallIntegerField(verbose_name="Глубина")),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="inventory.assetcategory",
+                        verbose_name="Предок",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="inventory.assetcategory",
+                        verbose_name="Потомок",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Связь категорий",
+                "verbose_name_plural": "Связи категорий",
+                "indexes": [models.Index(fields=["descendant", "depth"], name="inventory_c_descend_2d5d76_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("ancestor", "descendant"), name="inventory_categoryclosure_unique")
+                ],
+            },
+        ),
+        migrations.RunPython(fill_closure, migrations.RunPython.noop),
+    )
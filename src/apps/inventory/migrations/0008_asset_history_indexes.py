@@ -0,0 +1,43 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ("inventory", "0007_categoryclosure"),
+    )
+
+    operations = (
+        migrations.AddIndex(
+            model_name="assetlogentry",
+            index=models.Index(fields=["asset", "created_at", "id"], name="inventory_a_asset_i_447b37_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="maintenancerecord",
+            index=models.Index(fields=["asset", "created_at", "id"], name="inventory_m_asset_i_399c91_idx"),
+        ),
+        # the composite indexes above lead with asset_id, so the single-column FK indexes are redundant
+        migrations.AlterField(
+            model_name="assetlogentry",
+            name="asset",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="log_entries",
+                to="inventory.asset",
+                verbose_name="Оборудование",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="maintenancerecord",
+            name="asset",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="maintenance",
+                to="inventory.asset",
+                verbose_name="Оборудование",
+            ),
+        ),
+    )
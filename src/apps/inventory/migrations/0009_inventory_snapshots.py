@@ -0,0 +1,98 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("inventory", "0008_asset_history_indexes"),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name="assetlogentry",
+            name="assignee",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Кому выдано",
+            ),
+        ),
+        migrations.CreateModel(
+            name="InventorySnapshot",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("taken_at", models.DateTimeField(unique=True, verbose_name="Снят")),
+                ("asset_count", models.PositiveIntegerField(default=0, verbose_name="Позиций")),
+            ],
+            options={
+                "verbose_name": "Снимок инвентаря",
+                "verbose_name_plural": "Снимки инвентаря",
+                "ordering": ("-taken_at",),
+            },
+        ),
+        migrations.CreateModel(
+            name="AssetState",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("available", "В наличии"),
+                            ("in_use", "Выдано"),
+                            ("reserved", "Зарезервировано"),
+                            ("maintenance", "Обслуживание"),
+                            ("lost", "Утеряно"),
+                            ("retired", "Списано"),
+                        ],
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="inventory.asset",
+                        verbose_name="Оборудование",
+                    ),
+                ),
+                (
+                    "assigned_to",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Выдан пользователю",
+                    ),
+                ),
+                (
+                    "snapshot",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="states",
+                        to="inventory.inventorysnapshot",
+                        verbose_name="Снимок",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Состояние в снимке",
+                "verbose_name_plural": "Состояния в снимке",
+                "constraints": [models.UniqueConstraint(fields=("snapshot", "asset"), name="inventory_assetstate_unique")],
+            },
+        ),
+    )
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ("inventory", "0009_inventory_snapshots"),
+    )
+
+    operations = (
+        migrations.AddIndex(
+            model_name="asset",
+            index=models.Index(fields=["serial_number"], name="inventory_a_serial__4865f1_idx"),
+        ),
+    )
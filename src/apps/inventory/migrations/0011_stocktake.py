@@ -0,0 +1,128 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("inventory", "0010_asset_serial_number_index"),
+    )
+
+    operations = (
+        migrations.CreateModel(
+            name="Stocktake",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("open", "Идёт подсчёт"), ("closed", "Сверена"), ("applied", "Результаты применены")],
+                        default="open",
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                ("notes", models.TextField(blank=True, verbose_name="Комментарий")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Начата")),
+                ("closed_at", models.DateTimeField(blank=True, null=True, verbose_name="Сверена")),
+                ("applied_at", models.DateTimeField(blank=True, null=True, verbose_name="Применена")),
+                (
+                    "location",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="stocktakes",
+                        to="inventory.location",
+                        verbose_name="Локация",
+                    ),
+                ),
+                (
+                    "started_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Начал",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Инвентаризация",
+                "verbose_name_plural": "Инвентаризации",
+                "ordering": ("-created_at",),
+            },
+        ),
+        migrations.CreateModel(
+            name="StocktakeItem",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("inventory_code", models.CharField(max_length=64, verbose_name="Инвентарный номер")),
+                (
+                    "result",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Не сверено"),
+                            ("found", "На месте"),
+                            ("misplaced", "Числится на другой локации"),
+                            ("unknown", "Неизвестный код"),
+                            ("missing", "Не найдено"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="Результат",
+                    ),
+                ),
+                (
+                    "scanned_at",
+                    models.DateTimeField(
+                        blank=True, default=django.utils.timezone.now, null=True, verbose_name="Отсканировано"
+                    ),
+                ),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="inventory.asset",
+                        verbose_name="Оборудование",
+                    ),
+                ),
+                (
+                    "recorded_location",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="inventory.location",
+                        verbose_name="Локация по учёту",
+                    ),
+                ),
+                (
+                    "stocktake",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="items",
+                        to="inventory.stocktake",
+                        verbose_name="Инвентаризация",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Строка инвентаризации",
+                "verbose_name_plural": "Строки инвентаризации",
+                "indexes": [models.Index(fields=["stocktake", "result"], name="inventory_s_stockta_d9e508_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("stocktake", "inventory_code"), name="inventory_stocktakeitem_unique")
+                ],
+            },
+        ),
+    )
@@ -0,0 +1,145 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("inventory", "0011_stocktake"),
+    )
+
+    operations = (
+        migrations.CreateModel(
+            name="LocationTransfer",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("draft", "Черновик"), ("posted", "Проведён")],
+                        default="draft",
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                ("notes", models.TextField(blank=True, verbose_name="Комментарий")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Создан")),
+                ("posted_at", models.DateTimeField(blank=True, null=True, verbose_name="Проведён")),
+                (
+                    "assets",
+                    models.ManyToManyField(related_name="+", to="inventory.asset", verbose_name="Оборудование"),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Создал",
+                    ),
+                ),
+                (
+                    "destination",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="inventory.location",
+                        verbose_name="Куда",
+                    ),
+                ),
+                (
+                    "source",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="inventory.location",
+                        verbose_name="Откуда",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Перемещение",
+                "verbose_name_plural": "Перемещения",
+                "ordering": ("-created_at",),
+            },
+        ),
+        migrations.CreateModel(
+            name="AssetMovement",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now, verbose_name="Время")),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="movements",
+                        to="inventory.asset",
+                        verbose_name="Оборудование",
+                    ),
+                ),
+                (
+                    "from_location",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="inventory.location",
+                        verbose_name="Откуда",
+                    ),
+                ),
+                (
+                    "moved_by",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Переместил",
+                    ),
+                ),
+                (
+                    "to_location",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="inventory.location",
+                        verbose_name="Куда",
+                    ),
+                ),
+                (
+                    "transfer",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="movements",
+                        to="inventory.locationtransfer",
+                        verbose_name="Документ",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Перемещение позиции",
+                "verbose_name_plural": "Журнал перемещений",
+                "ordering": ("-created_at", "-pk"),
+                "indexes": [
+                    models.Index(fields=["asset", "created_at", "id"], name="inventory_a_asset_i_50d159_idx"),
+                    models.Index(fields=["to_location", "created_at"], name="inventory_a_to_loca_b0b2ac_idx"),
+                    models.Index(fields=["from_location", "created_at"], name="inventory_a_from_lo_19eb74_idx"),
+                ],
+            },
+        ),
+    )
@@ -0,0 +1,144 @@
+import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("inventory", "0012_location_transfers"),
+    )
+
+    operations = (
+        migrations.CreateModel(
+            name="MaintenanceRule",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("title", models.CharField(max_length=160, verbose_name="Название")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("service", "Плановое обслуживание"),
+                            ("repair", "Ремонт"),
+                            ("update", "Обновление ПО"),
+                            ("inspection", "Осмотр"),
+                        ],
+                        default="service",
+                        max_length=20,
+                        verbose_name="Тип",
+                    ),
+                ),
+                ("every", models.PositiveSmallIntegerField(default=1, verbose_name="Каждые")),
+                (
+                    "unit",
+                    models.CharField(
+                        choices=[("days", "дней"), ("months", "месяцев")],
+                        default="months",
+                        max_length=10,
+                        verbose_name="Единица",
+                    ),
+                ),
+                ("starts_on", models.DateField(default=datetime.date.today, verbose_name="Начиная с")),
+                (
+                    "lead_days",
+                    models.PositiveSmallIntegerField(
+                        default=30,
+                        help_text="На сколько дней вперёд создавать записи обслуживания",
+                        verbose_name="Планировать вперёд, дней",
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True, verbose_name="Активно")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="maintenance_rules",
+                        to="inventory.asset",
+                        verbose_name="Оборудование",
+                    ),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="maintenance_rules",
+                        to="inventory.assetcategory",
+                        verbose_name="Категория",
+                    ),
+                ),
+                (
+                    "contractor",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="inventory.vendor",
+                        verbose_name="Подрядчик",
+                    ),
+                ),
+                (
+                    "responsible",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Ответственный",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Правило обслуживания",
+                "verbose_name_plural": "Правила обслуживания",
+                "ordering": ("title",),
+                "constraints": [
+                    models.CheckConstraint(
+                        condition=models.Q(asset__isnull=False, category__isnull=True)
+                        | models.Q(asset__isnull=True, category__isnull=False),
+                        name="inventory_maintenancerule_target",
+                    ),
+                    models.CheckConstraint(condition=models.Q(every__gte=1), name="inventory_maintenancerule_every"),
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="maintenancerecord",
+            name="rule",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="records",
+                to="inventory.maintenancerule",
+                verbose_name="Правило",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="maintenancerecord",
+            index=models.Index(
+                condition=models.Q(status__in=("planned", "in_progress")),
+                fields=["status", "scheduled_for"],
+                name="inventory_maint_open_due_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="maintenancerecord",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(rule__isnull=False),
+                fields=("rule", "asset", "scheduled_for"),
+                name="inventory_maintenance_rule_period",
+            ),
+        ),
+    )
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ("inventory", "0013_maintenance_rules"),
+    )
+
+    operations = (
+        migrations.CreateModel(
+            name="ExpiryNotice",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("warranty", "Окончание гарантии"), ("maintenance", "Обслуживание")],
+                        max_length=20,
+                        verbose_name="Тип",
+                    ),
+                ),
+                ("object_id", models.PositiveBigIntegerField(verbose_name="Объект")),
+                ("due_on", models.DateField(verbose_name="Срок")),
+                ("sent_at", models.DateTimeField(auto_now_add=True, verbose_name="Отправлено")),
+            ],
+            options={
+                "verbose_name": "Отправленное предупреждение",
+                "verbose_name_plural": "Отправленные предупреждения",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="expirynotice",
+            constraint=models.UniqueConstraint(fields=("kind", "object_id", "due_on"), name="inventory_expirynotice_unique"),
+        ),
+        migrations.AddIndex(
+            model_name="asset",
+            index=models.Index(fields=["warranty_expiration"], name="inventory_a_warrant_55e624_idx"),
+        ),
+    )
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ("inventory", "0014_expiry_notices"),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name="assetcategory",
+            name="useful_life_months",
+            field=models.PositiveSmallIntegerField(
+                blank=True,
+                help_text="Для расчёта амортизации; без значения берётся срок по умолчанию",
+                null=True,
+                verbose_name="Срок полезного использования, мес.",
+            ),
+        ),
+    )
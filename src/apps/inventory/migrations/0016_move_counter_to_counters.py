@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ("inventory", "0015_assetcategory_useful_life_months"),
+        ("counters", "0001_initial"),
+    )
+
+    operations = (
+        migrations.SeparateDatabaseAndState(
+            state_operations=[migrations.DeleteModel(name="Counter")],
+            database_operations=[],
+        ),
+    )
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_occurrences(apps, schema_editor):
+    # для уже перенесённых записей исходная дата не сохранилась — берём текущую
+    MaintenanceRecord = apps.get_model("inventory", "MaintenanceRecord")
+    MaintenanceRecord.objects.filter(rule__isnull=False).update(occurrence=F("scheduled_for"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ("inventory", "0016_move_counter_to_counters"),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name="maintenancerecord",
+            name="occurrence",
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name="Дата по правилу"),
+        ),
+        migrations.RunPython(fill_occurrences, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name="maintenancerecord",
+            name="inventory_maintenance_rule_period",
+        ),
+        migrations.AddConstraint(
+            model_name="maintenancerecord",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(rule__isnull=False),
+                fields=("rule", "asset", "occurrence"),
+                name="inventory_maintenance_rule_period",
+            ),
+        ),
+    )
@@ -0,0 +1,22 @@
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ("inventory", "0017_maintenancerecord_occurrence"),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name="assetcategory",
+            name="salvage_percent",
+            field=models.PositiveSmallIntegerField(
+                default=0,
+                help_text="Доля стоимости, ниже которой амортизация не опускает остаточную стоимость",
+                validators=[django.core.validators.MaxValueValidator(100)],
+                verbose_name="Ликвидационная стоимость, %",
+            ),
+        ),
+    )
@@ -1,16 +1,74 @@
 from __future__ import annotations
 
+import calendar
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import batched
+
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator
+from django.db import OperationalError, connection, models, transaction
+from django.db.models import Case, Count, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.text import slugify
 
+from src.apps.counters.models import CountedModel, Counter
+
 User = settings.AUTH_USER_MODEL
 
 
-class AssetCategory(models.Model):
+class LoadedValuesMixin:
+    """Помнит значения полей ``loaded_fields`` на момент загрузки, чтобы сигналы могли понять, что изменилось."""
+
+    loaded_fields: tuple[str, ...] = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_loaded_values()
+        return instance
+
+    def remember_loaded_values(self, update_fields=None) -> None:
+        """После save(): при ``update_fields`` запоминаются только сохранённые поля."""
+        current = {attname: self.__dict__[attname] for attname in self.loaded_fields if attname in self.__dict__}
+        if update_fields is not None:
+            saved = {name for field in update_fields for name in (field, f"{field}_id")}
+            current = {**getattr(self, "_loaded_values", {}), **{a: v for a, v in current.items() if a in saved}}
+        self._loaded_values = current
+
+    def loaded_values_changed(self) -> bool:
+        """Изменилось ли хоть одно из ``loaded_fields``; если исходные значения неизвестны — да."""
+        loaded = getattr(self, "_loaded_values", {})
+        return any(attname not in loaded or loaded[attname] != self.__dict__.get(attname) for attname in self.loaded_fields)
+
+
+class AssetCategoryQuerySet(models.QuerySet):
+    def with_subtree_totals(self) -> AssetCategoryQuerySet:
+        """Число и стоимость оборудования во всей ветке каждой категории — одним запросом через CategoryClosure."""
+        assets = "descendant_links__descendant__assets"
+        return self.annotate(
+            subtree_assets=Count(f"{assets}__id"),
+            subtree_value=Coalesce(Sum(f"{assets}__purchase_price"), Value(Decimal("0.00"))),
+        )
+
+    def subtree(self, category: AssetCategory | int) -> AssetCategoryQuerySet:
+        """Категория и все её потомки."""
+        return self.filter(ancestor_links__ancestor=category)
+
+    def breadcrumbs(self, category: AssetCategory | int) -> AssetCategoryQuerySet:
+        """Предки категории от корня до неё самой, без обхода дерева по parent."""
+        return self.filter(descendant_links__descendant=category).order_by("-descendant_links__depth")
+
+
+class AssetCategory(LoadedValuesMixin, models.Model):
     """Категории оборудования."""
 
+    # имя категории входит в search_vector её позиций
+    loaded_fields = ("name",)
+
     name = models.CharField("Название", max_length=120, unique=True)
     slug = models.SlugField("Код", max_length=150, unique=True, blank=True)
     description = models.TextField("Описание", blank=True)
@@ -22,9 +80,30 @@ class AssetCategory(models.Model):
         related_name="children",
         on_delete=models.CASCADE,
     )
+    promoted_specs = models.JSONField(
+        "Ключевые характеристики",
+        blank=True,
+        default=list,
+        help_text="Числовые ключи specs для индексов, например [\"ram\", \"display.size\"]; "
+        "индексы создаёт manage.py sync_spec_indexes",
+    )
+    useful_life_months = models.PositiveSmallIntegerField(
+        "Срок полезного использования, мес.",
+        null=True,
+        blank=True,
+        help_text="Для расчёта амортизации; без значения берётся срок по умолчанию",
+    )
+    salvage_percent = models.PositiveSmallIntegerField(
+        "Ликвидационная стоимость, %",
+        default=0,
+        validators=[MaxValueValidator(100)],
+        help_text="Доля стоимости, ниже которой амортизация не опускает остаточную стоимость",
+    )
     created_at = models.DateTimeField("Создано", auto_now_add=True)
     updated_at = models.DateTimeField("Обновлено", auto_now=True)
 
+    objects = AssetCategoryQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Категория"
         verbose_name_plural = "Категории"
@@ -33,10 +112,116 @@ class AssetCategory(models.Model):
     def __str__(self) -> str:
         return self.name
 
+    def clean(self) -> None:
+        from .specs import KEY_RE
+
+        keys = self.promoted_specs
+        if not isinstance(keys, list) or not all(isinstance(key, str) and KEY_RE.fullmatch(key) for key in keys):
+            raise ValidationError({"promoted_specs": "Нужен список ключей вида \"ram\" или \"display.size\""})
+        if self.pk and self.parent_id and CategoryClosure.objects.filter(
+            ancestor_id=self.pk, descendant_id=self.parent_id
+        ).exists():
+            raise ValidationError({"parent": "Категорию нельзя вложить в неё саму или в её подкатегорию"})
+
     def save(self, *args, **kwargs) -> None:
         if not self.slug:
             self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        with transaction.atomic():
+            adding = self._state.adding
+            super().save(*args, **kwargs)
+            if adding:
+                CategoryClosure.objects.attach(self)
+            elif (
+                update_fields is None or "parent" in update_fields or "parent_id" in update_fields
+            ) and CategoryClosure.objects.parent_of(self.pk) != self.parent_id:
+                CategoryClosure.objects.move(self)
+
+    def breadcrumbs(self) -> list[AssetCategory]:
+        return list(AssetCategory.objects.breadcrumbs(self))
+
+
+class CategoryClosureQuerySet(models.QuerySet):
+    def parent_of(self, category_id: int) -> int | None:
+        return self.filter(descendant_id=category_id, depth=1).values_list("ancestor_id", flat=True).first()
+
+    def attach(self, category: AssetCategory) -> None:
+        """Связи новой категории: с собой и с каждым предком родителя."""
+        links = [CategoryClosure(ancestor_id=category.pk, descendant_id=category.pk, depth=0)]
+        if category.parent_id:
+            links += [
+                CategoryClosure(ancestor_id=ancestor_id, descendant_id=category.pk, depth=depth + 1)
+                for ancestor_id, depth in self.filter(descendant_id=category.parent_id).values_list("ancestor_id", "depth")
+            ]
+        self.bulk_create(links)
+
+    def move(self, category: AssetCategory) -> None:
+        """Переносит ветку ``category`` под её текущего parent: связи с прежними предками удаляются, с новыми — вставляются."""
+        subtree = dict(self.filter(ancestor_id=category.pk).values_list("descendant_id", "depth"))
+        if category.parent_id in subtree:
+            raise ValueError("Категорию нельзя вложить в неё саму или в её подкатегорию")
+        self.filter(descendant_id__in=list(subtree)).exclude(ancestor_id__in=list(subtree)).delete()
+        if category.parent_id:
+            ancestors = list(self.filter(descendant_id=category.parent_id).values_list("ancestor_id", "depth"))
+            self.bulk_create(
+                CategoryClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=above + below + 1)
+                for ancestor_id, above in ancestors
+                for descendant_id, below in subtree.items()
+            )
+
+    def rebuild(self) -> int:
+        """Пересобирает таблицу по полям parent; возвращает число связей."""
+        parents = dict(AssetCategory.objects.values_list("pk", "parent_id"))
+        links = []
+        for category_id in parents:
+            ancestor_id, depth = category_id, 0
+            while ancestor_id is not None and depth <= len(parents):
+                links.append(CategoryClosure(ancestor_id=ancestor_id, descendant_id=category_id, depth=depth))
+                ancestor_id, depth = parents.get(ancestor_id), depth + 1
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(links, batch_size=5000)
+        return len(links)
+
+    def rollup(self, direct: dict[int, int]) -> dict[int, int]:
+        """Суммирует значения ``{категория: n}`` по веткам: для каждой категории — она и все потомки."""
+        totals = dict.fromkeys(direct, 0)
+        for ancestor_id, descendant_id in self.values_list("ancestor_id", "descendant_id"):
+            totals[ancestor_id] = totals.get(ancestor_id, 0) + direct.get(descendant_id, 0)
+        return totals
+
+
+class CategoryClosure(models.Model):
+    """Замыкание дерева категорий: пара (предок, потомок) для каждой ветки, включая саму категорию с depth=0."""
+
+    ancestor = models.ForeignKey(
+        AssetCategory,
+        verbose_name="Предок",
+        related_name="descendant_links",
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    descendant = models.ForeignKey(
+        AssetCategory,
+        verbose_name="Потомок",
+        related_name="ancestor_links",
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    depth = models.PositiveSmallIntegerField("Глубина")
+
+    objects = CategoryClosureQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Связь категорий"
+        verbose_name_plural = "Связи категорий"
+        constraints = (
+            models.UniqueConstraint(fields=("ancestor", "descendant"), name="inventory_categoryclosure_unique"),
+        )
+        indexes = (models.Index(fields=("descendant", "depth")),)
+
+    def __str__(self) -> str:
+        return f"{self.ancestor_id} → {self.descendant_id} ({self.depth})"
 
 
 class Location(models.Model):
@@ -83,7 +268,131 @@ class Vendor(models.Model):
         return self.name
 
 
-class Asset(models.Model):
+def invalidate_stats_on_commit() -> None:
+    """Массовые UPDATE не вызывают сигналов, поэтому кэш сводки сбрасывается явно."""
+    from .stats import invalidate_inventory_stats
+
+    transaction.on_commit(invalidate_inventory_stats)
+
+
+class AssetUnavailable(Exception):
+    """Выдача или возврат невозможны: часть позиций не в нужном статусе или занята параллельной операцией."""
+
+    def __init__(self, asset_ids: list[int], message: str = "Позиции недоступны") -> None:
+        super().__init__(message)
+        self.asset_ids = asset_ids
+
+
+class AssetQuerySet(models.QuerySet):
+    def bulk_mark_status(self, status: str, *, by: User | None = None, note: str | None = None, chunk_size: int = 500) -> int:
+        """Массовая смена статуса с записью в журнал, как у ``Asset.mark_status``, без save() на каждую позицию.
+
+        Позиции обрабатываются пачками по первичному ключу, каждая пачка — в своей транзакции:
+        прежние статусы читаются под блокировкой, затем один UPDATE, один bulk_create журнала
+        и правка счётчиков. Позиции, уже имеющие этот статус, пропускаются. Возвращает число изменённых.
+        """
+        ids = self.order_by("pk").values_list("pk", flat=True)
+        updated, chunk = 0, list(ids[:chunk_size])
+        while chunk:
+            updated += self._mark_chunk(chunk, status, by=by, note=note)
+            chunk = list(ids.filter(pk__gt=chunk[-1])[:chunk_size]) if len(chunk) == chunk_size else []
+        return updated
+
+    def checkout(self, assignee, *, by: User | None = None, note: str | None = None) -> list[int]:
+        """Выдаёт комплект позиций ``assignee`` в одной транзакции: либо все, либо ни одной.
+
+        Строки блокируются в порядке pk с NOWAIT — второй кладовщик, выдающий ту же позицию,
+        сразу получает AssetUnavailable вместо ожидания; UPDATE дополнительно условен по статусу.
+        """
+        with transaction.atomic():
+            holders = self._lock_for_transfer(Asset.Status.AVAILABLE)
+            Asset.objects.filter(pk__in=holders, status=Asset.Status.AVAILABLE).update(
+                status=Asset.Status.IN_USE, assigned_to=assignee, updated_at=timezone.now()
+            )
+            self._log_transfer(holders, Asset.Status.AVAILABLE, Asset.Status.IN_USE, by=by, note=note, assignee=assignee)
+        return list(holders)
+
+    def check_in(self, *, by: User | None = None, note: str | None = None) -> list[int]:
+        """Принимает выданные позиции обратно: статус «В наличии», получатель сбрасывается."""
+        with transaction.atomic():
+            holders = self._lock_for_transfer(Asset.Status.IN_USE)
+            Asset.objects.filter(pk__in=holders, status=Asset.Status.IN_USE).update(
+                status=Asset.Status.AVAILABLE, assigned_to=None, updated_at=timezone.now()
+            )
+            self._log_transfer(holders, Asset.Status.IN_USE, Asset.Status.AVAILABLE, by=by, note=note)
+        return list(holders)
+
+    def _lock_for_transfer(self, expected_status: str) -> dict[int, int | None]:
+        """Блокирует позиции выборки; возвращает ``{pk: кому выдана}`` или AssetUnavailable."""
+        ids = list(self.order_by("pk").values_list("pk", flat=True))
+        if not ids:
+            raise AssetUnavailable([], "Не выбрано ни одной позиции")
+        try:
+            rows = list(
+                Asset.objects.select_for_update(nowait=True)
+                .filter(pk__in=ids)
+                .order_by("pk")
+                .values_list("pk", "status", "assigned_to_id")
+            )
+        except OperationalError as exc:
+            raise AssetUnavailable(ids, "Позиции заняты другой операцией, повторите попытку") from exc
+        unavailable = [pk for pk, status, _ in rows if status != expected_status]
+        if unavailable or len(rows) != len(ids):
+            raise AssetUnavailable(unavailable or sorted(set(ids) - {pk for pk, _, _ in rows}))
+        return {pk: holder for pk, _, holder in rows}
+
+    @staticmethod
+    def _log_transfer(holders: dict[int, int | None], before: str, after: str, *, by, note, assignee=None) -> None:
+        now = timezone.now()
+        entries = []
+        for pk, holder in holders.items():
+            common = {"asset_id": pk, "performed_by": by, "notes": note or "", "created_at": now}
+            entries.append(
+                AssetLogEntry(action=AssetLogEntry.Action.STATUS_CHANGE, from_status=before, to_status=after, **common)
+            )
+            if assignee is not None:
+                entries.append(AssetLogEntry(action=AssetLogEntry.Action.ASSIGNED, assignee=assignee, **common))
+            elif holder is not None:
+                entries.append(AssetLogEntry(action=AssetLogEntry.Action.RETURNED, assignee_id=holder, **common))
+        AssetLogEntry.objects.bulk_create(entries)
+        Counter.objects.record_transitions(Counter.Dimension.ASSET_STATUS, {(before, after): len(holders)})
+        invalidate_stats_on_commit()
+
+    @staticmethod
+    def _mark_chunk(chunk: list[int], status: str, *, by, note) -> int:
+        with transaction.atomic():
+            previous = dict(
+                Asset.objects.select_for_update()
+                .filter(pk__in=chunk)
+                .exclude(status=status)
+                .order_by("pk")
+                .values_list("pk", "status")
+            )
+            if not previous:
+                return 0
+            now = timezone.now()
+            Asset.objects.filter(pk__in=previous).update(status=status, updated_at=now)
+            AssetLogEntry.objects.bulk_create(
+                AssetLogEntry(
+                    asset_id=pk,
+                    action=AssetLogEntry.Action.STATUS_CHANGE,
+                    performed_by=by,
+                    from_status=before,
+                    to_status=status,
+                    notes=note or "",
+                    created_at=now,
+                )
+                for pk, before in previous.items()
+            )
+            transitions: dict[tuple[str, str], int] = {}
+            for before in previous.values():
+                transitions[(before, status)] = transitions.get((before, status), 0) + 1
+            Counter.objects.record_transitions(Counter.Dimension.ASSET_STATUS, transitions)
+            invalidate_stats_on_commit()
+        return len(previous)
+
+
+class Asset(LoadedValuesMixin, CountedModel):
     class Status(models.TextChoices):
         AVAILABLE = "available", "В наличии"
         IN_USE = "in_use", "Выдано"
@@ -99,11 +408,15 @@ class Asset(models.Model):
         NEEDS_REPAIR = "needs_repair", "Требует ремонта"
         BROKEN = "broken", "Неисправно"
 
+    # поля search_vector (см. search.SEARCH_FIELDS): без их изменения вектор не пересчитывается
+    loaded_fields = ("name", "inventory_code", "serial_number", "notes", "category_id")
+
     name = models.CharField("Название", max_length=160)
     category = models.ForeignKey(
         AssetCategory,
         verbose_name="Категория",
         related_name="assets",
+        db_index=False,
         on_delete=models.PROTECT,
     )
     inventory_code = models.CharField("Инвентарный номер", max_length=64, unique=True)
@@ -114,6 +427,7 @@ class Asset(models.Model):
         Location,
         verbose_name="Локация",
         related_name="assets",
+        db_index=False,
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
@@ -138,6 +452,7 @@ class Asset(models.Model):
         Vendor,
         verbose_name="Поставщик",
         related_name="assets",
+        db_index=False,
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
@@ -147,17 +462,60 @@ class Asset(models.Model):
     warranty_expiration = models.DateField("Гарантия до", null=True, blank=True)
     specs = models.JSONField("Характеристики", blank=True, default=dict)
     notes = models.TextField("Заметки", blank=True)
+    # заполняется search.refresh_search_vectors; GIN-индексы создаются миграцией 0005 только на PostgreSQL
+    search_vector = SearchVectorField("Поисковый индекс", null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = AssetQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Оборудование"
         verbose_name_plural = "Оборудование"
         ordering = ("name", "inventory_code")
+        indexes = (
+            models.Index(fields=("name", "inventory_code")),
+            models.Index(fields=("status", "name", "inventory_code")),
+            models.Index(fields=("condition", "name", "inventory_code")),
+            models.Index(fields=("category", "name", "inventory_code")),
+            models.Index(fields=("location", "name", "inventory_code")),
+            models.Index(fields=("vendor", "name", "inventory_code")),
+            models.Index(fields=("serial_number",)),
+            models.Index(fields=("warranty_expiration",)),
+        )
 
     def __str__(self) -> str:
         return f"{self.name} ({self.inventory_code})"
 
+    def log_state_change(self, *, previous_status: str, previous_assignee_id: int | None, by=None) -> None:
+        """Пишет в журнал смену статуса и выдачу/возврат — по ним восстанавливается состояние на дату."""
+        entries = []
+        if self.status != previous_status:
+            entries.append(
+                AssetLogEntry(
+                    asset=self,
+                    action=AssetLogEntry.Action.STATUS_CHANGE,
+                    performed_by=by,
+                    from_status=previous_status,
+                    to_status=self.status,
+                )
+            )
+        if self.assigned_to_id != previous_assignee_id:
+            # передача другому — возврат от прежнего и выдача новому; assignee у возврата — кто вернул
+            if previous_assignee_id:
+                entries.append(
+                    AssetLogEntry(
+                        asset=self, action=AssetLogEntry.Action.RETURNED, performed_by=by, assignee_id=previous_assignee_id
+                    )
+                )
+            if self.assigned_to_id:
+                entries.append(
+                    AssetLogEntry(
+                        asset=self, action=AssetLogEntry.Action.ASSIGNED, performed_by=by, assignee_id=self.assigned_to_id
+                    )
+                )
+        AssetLogEntry.objects.bulk_create(entries)
+
     def mark_status(self, status: str, *, by: User | None = None, note: str | None = None) -> None:
         previous_status = self.status
         self.status = status
@@ -204,7 +562,13 @@ class AssetLogEntry(models.Model):
         MAINTENANCE = "maintenance", "Обслуживание"
         NOTE = "note", "Комментарий"
 
-    asset = models.ForeignKey(Asset, verbose_name="Оборудование", related_name="log_entries", on_delete=models.CASCADE)
+    asset = models.ForeignKey(
+        Asset,
+        verbose_name="Оборудование",
+        related_name="log_entries",
+        db_index=False,
+        on_delete=models.CASCADE,
+    )
     action = models.CharField("Действие", max_length=32, choices=Action.choices)
     performed_by = models.ForeignKey(
         User,
@@ -216,6 +580,15 @@ class AssetLogEntry(models.Model):
     )
     from_status = models.CharField("Статус до", max_length=20, blank=True)
     to_status = models.CharField("Статус после", max_length=20, blank=True)
+    assignee = models.ForeignKey(
+        User,
+        verbose_name="Кому выдано",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,
+    )
     notes = models.TextField("Комментарий", blank=True)
     created_at = models.DateTimeField("Время", default=timezone.now)
 
@@ -223,17 +596,587 @@ class AssetLogEntry(models.Model):
         verbose_name = "Журнал операции"
         verbose_name_plural = "Журнал операций"
         ordering = ("-created_at",)
+        indexes = (models.Index(fields=("asset", "created_at", "id")),)
 
     def __str__(self) -> str:
         return f"{self.get_action_display()} — {self.asset}"
 
 
+class InventorySnapshotQuerySet(models.QuerySet):
+    def take(self) -> InventorySnapshot:
+        """Снимок текущего состояния всех позиций одним INSERT … SELECT."""
+        quote = connection.ops.quote_name
+        with transaction.atomic():
+            snapshot = self.create(taken_at=timezone.now())
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {quote(AssetState._meta.db_table)} (snapshot_id, asset_id, status, assigned_to_id) "
+                    f"SELECT %s, id, status, assigned_to_id FROM {quote(Asset._meta.db_table)}",
+                    [snapshot.pk],
+                )
+                snapshot.asset_count = cursor.rowcount
+            snapshot.save(update_fields=["asset_count"])
+        return snapshot
+
+    def nearest(self, moment) -> InventorySnapshot | None:
+        """Последний снимок, сделанный раньше ``moment``."""
+        return self.filter(taken_at__lt=moment).order_by("-taken_at").first()
+
+
+class InventorySnapshot(models.Model):
+    """Периодический снимок состояния оборудования; от него отсчитывается восстановление на дату."""
+
+    taken_at = models.DateTimeField("Снят", unique=True)
+    asset_count = models.PositiveIntegerField("Позиций", default=0)
+
+    objects = InventorySnapshotQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Снимок инвентаря"
+        verbose_name_plural = "Снимки инвентаря"
+        ordering = ("-taken_at",)
+
+    def __str__(self) -> str:
+        return f"Снимок {timezone.localtime(self.taken_at):%d.%m.%Y %H:%M}"
+
+
+class AssetState(models.Model):
+    snapshot = models.ForeignKey(
+        InventorySnapshot, verbose_name="Снимок", related_name="states", on_delete=models.CASCADE, db_index=False
+    )
+    asset = models.ForeignKey(Asset, verbose_name="Оборудование", related_name="+", on_delete=models.CASCADE, db_index=False)
+    status = models.CharField("Статус", max_length=20, choices=Asset.Status.choices)
+    assigned_to = models.ForeignKey(
+        User,
+        verbose_name="Выдан пользователю",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+
+    class Meta:
+        verbose_name = "Состояние в снимке"
+        verbose_name_plural = "Состояния в снимке"
+        constraints = (models.UniqueConstraint(fields=("snapshot", "asset"), name="inventory_assetstate_unique"),)
+
+    def __str__(self) -> str:
+        return f"{self.asset_id}: {self.status}"
+
+
+class LocationTransfer(models.Model):
+    """Документ перемещения: список позиций с одной локации на другую, проводится одной операцией."""
+
+    class Status(models.TextChoices):
+        DRAFT = "draft", "Черновик"
+        POSTED = "posted", "Проведён"
+
+    source = models.ForeignKey(Location, verbose_name="Откуда", related_name="+", on_delete=models.PROTECT)
+    destination = models.ForeignKey(Location, verbose_name="Куда", related_name="+", on_delete=models.PROTECT)
+    assets = models.ManyToManyField(Asset, verbose_name="Оборудование", related_name="+")
+    status = models.CharField("Статус", max_length=20, choices=Status.choices, default=Status.DRAFT)
+    created_by = models.ForeignKey(
+        User,
+        verbose_name="Создал",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    notes = models.TextField("Комментарий", blank=True)
+    created_at = models.DateTimeField("Создан", auto_now_add=True)
+    posted_at = models.DateTimeField("Проведён", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Перемещение"
+        verbose_name_plural = "Перемещения"
+        ordering = ("-created_at",)
+
+    def __str__(self) -> str:
+        return f"Перемещение №{self.pk}: {self.source} → {self.destination}"
+
+    def clean(self) -> None:
+        super().clean()
+        if self.source_id and self.source_id == self.destination_id:
+            raise ValidationError({"destination": "Локации отправления и назначения совпадают"})
+
+    def post(self, *, by: User | None = None) -> int:
+        """Проводит документ: один UPDATE location_id с условием «ещё на исходной локации» и журнал перемещений.
+
+        Если хоть одна позиция уже не на исходной локации, ничего не меняется (AssetUnavailable).
+        """
+        with transaction.atomic():
+            document = LocationTransfer.objects.select_for_update().get(pk=self.pk)
+            if document.status != self.Status.DRAFT:
+                raise ValueError("Документ уже проведён")
+            ids = list(self.assets.order_by("pk").values_list("pk", flat=True))
+            if not ids:
+                raise AssetUnavailable([], "В документе нет позиций")
+            locations = dict(
+                Asset.objects.select_for_update().filter(pk__in=ids).order_by("pk").values_list("pk", "location_id")
+            )
+            misplaced = [pk for pk in ids if locations.get(pk) != self.source_id]
+            if misplaced:
+                raise AssetUnavailable(misplaced, "Позиции не на исходной локации")
+            now = timezone.now()
+            Asset.objects.filter(pk__in=ids, location_id=self.source_id).update(
+                location_id=self.destination_id, updated_at=now
+            )
+            invalidate_stats_on_commit()
+            AssetMovement.objects.record(
+                ((pk, self.source_id) for pk in ids), self.destination_id, by=by, transfer=self, created_at=now
+            )
+            self.status, self.posted_at = self.Status.POSTED, now
+            self.save(update_fields=["status", "posted_at"])
+        return len(ids)
+
+
+class AssetMovementQuerySet(models.QuerySet):
+    def record(self, moves, to_location_id: int | None, *, by=None, transfer=None, created_at=None) -> list[AssetMovement]:
+        """Пишет перемещения ``(asset_id, откуда)`` одной пачкой."""
+        created_at = created_at or timezone.now()
+        return self.bulk_create(
+            (
+                AssetMovement(
+                    asset_id=asset_id,
+                    from_location_id=from_location_id,
+                    to_location_id=to_location_id,
+                    transfer=transfer,
+                    moved_by=by,
+                    created_at=created_at,
+                )
+                for asset_id, from_location_id in moves
+            ),
+            batch_size=2000,
+        )
+
+    def for_location(self, location) -> models.QuerySet:
+        """Приходы и уходы локации, от новых к старым; читается по индексам (to/from_location, created_at)."""
+        return self.filter(models.Q(to_location=location) | models.Q(from_location=location)).order_by("-created_at", "-pk")
+
+
+class AssetMovement(models.Model):
+    """Журнал перемещений между локациями; «где побывала позиция» — диапазон индекса (asset, created_at, id)."""
+
+    asset = models.ForeignKey(
+        Asset, verbose_name="Оборудование", related_name="movements", on_delete=models.CASCADE, db_index=False
+    )
+    from_location = models.ForeignKey(
+        Location,
+        verbose_name="Откуда",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+    to_location = models.ForeignKey(
+        Location,
+        verbose_name="Куда",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+    transfer = models.ForeignKey(
+        LocationTransfer,
+        verbose_name="Документ",
+        related_name="movements",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    moved_by = models.ForeignKey(
+        User,
+        verbose_name="Переместил",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+    created_at = models.DateTimeField("Время", default=timezone.now)
+
+    objects = AssetMovementQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Перемещение позиции"
+        verbose_name_plural = "Журнал перемещений"
+        ordering = ("-created_at", "-pk")
+        indexes = (
+            models.Index(fields=("asset", "created_at", "id")),
+            models.Index(fields=("to_location", "created_at")),
+            models.Index(fields=("from_location", "created_at")),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.asset_id}: {self.from_location_id or '—'} → {self.to_location_id or '—'}"
+
+
+class Stocktake(models.Model):
+    """Инвентаризация локации: отсканированные коды сверяются с позициями, числящимися на ней."""
+
+    class Status(models.TextChoices):
+        OPEN = "open", "Идёт подсчёт"
+        CLOSED = "closed", "Сверена"
+        APPLIED = "applied", "Результаты применены"
+
+    location = models.ForeignKey(Location, verbose_name="Локация", related_name="stocktakes", on_delete=models.PROTECT)
+    status = models.CharField("Статус", max_length=20, choices=Status.choices, default=Status.OPEN)
+    started_by = models.ForeignKey(
+        User,
+        verbose_name="Начал",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    notes = models.TextField("Комментарий", blank=True)
+    created_at = models.DateTimeField("Начата", auto_now_add=True)
+    closed_at = models.DateTimeField("Сверена", null=True, blank=True)
+    applied_at = models.DateTimeField("Применена", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Инвентаризация"
+        verbose_name_plural = "Инвентаризации"
+        ordering = ("-created_at",)
+
+    def __str__(self) -> str:
+        return f"Инвентаризация {self.location} от {timezone.localtime(self.created_at):%d.%m.%Y}"
+
+    def expected_assets(self) -> models.QuerySet:
+        """Позиции, которые по учёту должны быть на локации; выданные и списанные физически на ней не лежат."""
+        return Asset.objects.filter(location_id=self.location_id).exclude(
+            status__in=(Asset.Status.IN_USE, Asset.Status.RETIRED)
+        )
+
+    def add_codes(self, codes: list[str]) -> int:
+        """Добавляет отсканированные коды; повторы одной сессии игнорируются. Возвращает число новых."""
+        if self.status != self.Status.OPEN:
+            raise ValueError("Инвентаризация уже закрыта")
+        before = self.items.count()
+        StocktakeItem.objects.bulk_create(
+            (StocktakeItem(stocktake=self, inventory_code=code) for code in codes),
+            batch_size=2000,
+            ignore_conflicts=True,
+        )
+        return self.items.count() - before
+
+    def reconcile(self) -> dict[str, int]:
+        """Закрывает подсчёт и сверяет его с учётом несколькими запросами над множествами, без цикла по позициям.
+
+        Коды сопоставляются позициям одним UPDATE, результат строки — вторым; недостачи — позиции
+        локации без строки сканирования — вставляются одним INSERT … SELECT.
+        """
+        with transaction.atomic():
+            stocktake = Stocktake.objects.select_for_update().get(pk=self.pk)
+            if stocktake.status != self.Status.OPEN:
+                raise ValueError("Инвентаризация уже закрыта")
+            items = self.items.all()
+            matched = Asset.objects.filter(inventory_code=OuterRef("inventory_code"))
+            items.update(
+                asset_id=Subquery(matched.values("pk")[:1]),
+                recorded_location_id=Subquery(matched.values("location_id")[:1]),
+            )
+            Result = StocktakeItem.Result
+            items.update(
+                result=Case(
+                    When(asset__isnull=True, then=Value(Result.UNKNOWN)),
+                    When(recorded_location_id=self.location_id, then=Value(Result.FOUND)),
+                    default=Value(Result.MISPLACED),
+                )
+            )
+            missing = self.expected_assets().exclude(
+                models.Exists(StocktakeItem.objects.filter(stocktake=self, asset=OuterRef("pk")))
+            )
+            self._insert_missing(missing)
+            self.status, self.closed_at = self.Status.CLOSED, timezone.now()
+            self.save(update_fields=["status", "closed_at"])
+        return self.summary()
+
+    def _insert_missing(self, missing: models.QuerySet) -> None:
+        quote = connection.ops.quote_name
+        select, params = missing.order_by().values("inventory_code", "pk", "location_id").query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {quote(StocktakeItem._meta.db_table)} "
+                "(stocktake_id, inventory_code, asset_id, recorded_location_id, result) "
+                f"SELECT %s, sub.*, %s FROM ({select}) sub",
+                [self.pk, StocktakeItem.Result.MISSING, *params],
+            )
+
+    def summary(self) -> dict[str, int]:
+        counts = dict(self.items.order_by().values_list("result").annotate(total=Count("pk")))
+        return {result: counts.get(result, 0) for result in StocktakeItem.Result.values}
+
+    def apply_resolutions(self, *, by: User | None = None) -> dict[str, int]:
+        """Применяет сверку: найденное чужое перемещается сюда, недостача помечается утерянной,
+        найденные «утерянные» позиции возвращаются в наличие. Всё — массовыми UPDATE и журналом.
+        """
+        Result = StocktakeItem.Result
+        note = f"{self}"
+        with transaction.atomic():
+            stocktake = Stocktake.objects.select_for_update().get(pk=self.pk)
+            if stocktake.status != self.Status.CLOSED:
+                raise ValueError("Сначала закройте и сверьте инвентаризацию")
+            misplaced = Asset.objects.filter(
+                pk__in=self.items.filter(result=Result.MISPLACED).values("asset_id")
+            ).exclude(location_id=self.location_id)
+            moved = list(misplaced.values_list("pk", "location_id"))
+            Asset.objects.filter(pk__in=[pk for pk, _ in moved]).update(location_id=self.location_id, updated_at=timezone.now())
+            if moved:
+                invalidate_stats_on_commit()
+            AssetMovement.objects.record(moved, self.location_id, by=by)
+            # перемещение — в журнал движения, решение по инвентаризации — в журнал позиции
+            AssetLogEntry.objects.bulk_create(
+                (
+                    AssetLogEntry(
+                        asset_id=pk,
+                        action=AssetLogEntry.Action.UPDATED,
+                        performed_by=by,
+                        notes=f"{note}: перемещено на локацию (было: {location_id or '—'})",
+                    )
+                    for pk, location_id in moved
+                ),
+                batch_size=2000,
+            )
+            lost = Asset.objects.filter(pk__in=self.items.filter(result=Result.MISSING).values("asset_id"))
+            recovered = Asset.objects.filter(
+                pk__in=self.items.filter(result__in=(Result.FOUND, Result.MISPLACED)).values("asset_id"),
+                status=Asset.Status.LOST,
+            )
+            result = {
+                "moved": len(moved),
+                "lost": lost.bulk_mark_status(Asset.Status.LOST, by=by, note=f"{note}: не найдено"),
+                "recovered": recovered.bulk_mark_status(Asset.Status.AVAILABLE, by=by, note=f"{note}: найдено"),
+            }
+            self.status, self.applied_at = self.Status.APPLIED, timezone.now()
+            self.save(update_fields=["status", "applied_at"])
+        return result
+
+
+class StocktakeItem(models.Model):
+    class Result(models.TextChoices):
+        PENDING = "pending", "Не сверено"
+        FOUND = "found", "На месте"
+        MISPLACED = "misplaced", "Числится на другой локации"
+        UNKNOWN = "unknown", "Неизвестный код"
+        MISSING = "missing", "Не найдено"
+
+    stocktake = models.ForeignKey(
+        Stocktake, verbose_name="Инвентаризация", related_name="items", on_delete=models.CASCADE, db_index=False
+    )
+    inventory_code = models.CharField("Инвентарный номер", max_length=64)
+    asset = models.ForeignKey(
+        Asset, verbose_name="Оборудование", related_name="+", on_delete=models.CASCADE, null=True, blank=True
+    )
+    recorded_location = models.ForeignKey(
+        Location,
+        verbose_name="Локация по учёту",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+    result = models.CharField("Результат", max_length=20, choices=Result.choices, default=Result.PENDING)
+    scanned_at = models.DateTimeField("Отсканировано", default=timezone.now, null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Строка инвентаризации"
+        verbose_name_plural = "Строки инвентаризации"
+        constraints = (
+            models.UniqueConstraint(fields=("stocktake", "inventory_code"), name="inventory_stocktakeitem_unique"),
+        )
+        indexes = (models.Index(fields=("stocktake", "result")),)
+
+    def __str__(self) -> str:
+        return f"{self.inventory_code}: {self.get_result_display()}"
+
+
+class MaintenanceKind(models.TextChoices):
+    SERVICE = "service", "Плановое обслуживание"
+    REPAIR = "repair", "Ремонт"
+    UPDATE = "update", "Обновление ПО"
+    INSPECTION = "inspection", "Осмотр"
+
+
+def add_months(day: date, months: int) -> date:
+    """Сдвиг даты на ``months`` месяцев; 31-е число превращается в последний день короткого месяца."""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+class MaintenanceRuleQuerySet(models.QuerySet):
+    def active(self) -> MaintenanceRuleQuerySet:
+        return self.filter(is_active=True)
+
+    def generate(self, *, today: date | None = None, horizon_days: int | None = None) -> dict[int, int]:
+        """Создаёт плановые работы по правилам на горизонт вперёд; повторный запуск ничего не дублирует.
+
+        Записи вставляются пачками через bulk_create(ignore_conflicts=True): уникальность
+        (правило, позиция, дата) делает запуск идемпотентным в пределах периода.
+        Возвращает ``{id правила: сколько записей вставлено}``.
+        """
+        today = today or timezone.localdate()
+        created = {}
+        for rule in self.select_related("category"):
+            horizon = today + timedelta(days=rule.lead_days if horizon_days is None else horizon_days)
+            created[rule.pk] = rule.generate(today, horizon)
+        return created
+
+
+class MaintenanceRule(models.Model):
+    """Правило периодического обслуживания позиции или всех позиций ветки категорий."""
+
+    class Unit(models.TextChoices):
+        DAYS = "days", "дней"
+        MONTHS = "months", "месяцев"
+
+    title = models.CharField("Название", max_length=160)
+    kind = models.CharField("Тип", max_length=20, choices=MaintenanceKind.choices, default=MaintenanceKind.SERVICE)
+    asset = models.ForeignKey(
+        Asset,
+        verbose_name="Оборудование",
+        related_name="maintenance_rules",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+    )
+    category = models.ForeignKey(
+        AssetCategory,
+        verbose_name="Категория",
+        related_name="maintenance_rules",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+    )
+    every = models.PositiveSmallIntegerField("Каждые", default=1)
+    unit = models.CharField("Единица", max_length=10, choices=Unit.choices, default=Unit.MONTHS)
+    starts_on = models.DateField("Начиная с", default=date.today)
+    lead_days = models.PositiveSmallIntegerField(
+        "Планировать вперёд, дней", default=30, help_text="На сколько дней вперёд создавать записи обслуживания"
+    )
+    responsible = models.ForeignKey(
+        User,
+        verbose_name="Ответственный",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    contractor = models.ForeignKey(
+        Vendor,
+        verbose_name="Подрядчик",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    is_active = models.BooleanField("Активно", default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = MaintenanceRuleQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Правило обслуживания"
+        verbose_name_plural = "Правила обслуживания"
+        ordering = ("title",)
+        constraints = (
+            models.CheckConstraint(
+                condition=models.Q(asset__isnull=False, category__isnull=True)
+                | models.Q(asset__isnull=True, category__isnull=False),
+                name="inventory_maintenancerule_target",
+            ),
+            models.CheckConstraint(condition=models.Q(every__gte=1), name="inventory_maintenancerule_every"),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.title}: каждые {self.every} {self.get_unit_display()}"
+
+    def clean(self) -> None:
+        super().clean()
+        if bool(self.asset_id) == bool(self.category_id):
+            raise ValidationError("Укажите либо позицию, либо категорию")
+
+    def occurrences(self, start: date, end: date) -> list[date]:
+        """Даты по правилу в интервале [start, end]; отсчёт всегда от ``starts_on``, поэтому даты стабильны."""
+        step = 0
+        if self.unit == self.Unit.DAYS and start > self.starts_on:
+            step = (start - self.starts_on).days // self.every
+        dates, current = [], self.starts_on + timedelta(days=step * self.every)
+        while current <= end:
+            if current >= start:
+                dates.append(current)
+            step += 1
+            if self.unit == self.Unit.MONTHS:
+                current = add_months(self.starts_on, step * self.every)
+            else:
+                current = self.starts_on + timedelta(days=step * self.every)
+        return dates
+
+    def target_assets(self) -> models.QuerySet:
+        assets = Asset.objects.exclude(status__in=(Asset.Status.RETIRED, Asset.Status.LOST))
+        if self.asset_id:
+            return assets.filter(pk=self.asset_id)
+        return assets.filter(category__ancestor_links__ancestor=self.category_id)
+
+    def generate(self, start: date, end: date, *, batch_size: int = 2000) -> int:
+        dates = self.occurrences(start, end)
+        if not dates:
+            return 0
+        existing = MaintenanceRecord.objects.filter(rule=self)
+        before = existing.count()
+        asset_ids = self.target_assets().order_by("pk").values_list("pk", flat=True)
+        for chunk in batched(asset_ids.iterator(chunk_size=batch_size), batch_size):
+            MaintenanceRecord.objects.bulk_create(
+                (
+                    MaintenanceRecord(
+                        asset_id=asset_id,
+                        rule=self,
+                        title=self.title,
+                        kind=self.kind,
+                        scheduled_for=scheduled_for,
+                        occurrence=scheduled_for,
+                        responsible_id=self.responsible_id,
+                        contractor_id=self.contractor_id,
+                    )
+                    for asset_id in chunk
+                    for scheduled_for in dates
+                ),
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+        inserted = existing.count() - before
+        if inserted:
+            invalidate_stats_on_commit()
+        return inserted
+
+
+class MaintenanceQuerySet(models.QuerySet):
+    def open(self) -> MaintenanceQuerySet:
+        return self.filter(status__in=MaintenanceRecord.OPEN_STATUSES)
+
+    def overdue(self, today: date | None = None) -> MaintenanceQuerySet:
+        """Незавершённые работы с прошедшей датой; читается по частичному индексу (status, scheduled_for)."""
+        return self.filter(overdue_q(today))
+
+    def with_overdue(self, today: date | None = None) -> MaintenanceQuerySet:
+        """Аннотация ``overdue`` вместо вызова свойства на каждой строке."""
+        return self.annotate(
+            overdue=Case(When(overdue_q(today), then=Value(True)), default=Value(False), output_field=models.BooleanField())
+        )
+
+
+def overdue_q(today: date | None = None) -> models.Q:
+    return models.Q(status__in=MaintenanceRecord.OPEN_STATUSES, scheduled_for__lt=today or timezone.localdate())
+
+
 class MaintenanceRecord(models.Model):
-    class Kind(models.TextChoices):
-        SERVICE = "service", "Плановое обслуживание"
-        REPAIR = "repair", "Ремонт"
-        UPDATE = "update", "Обновление ПО"
-        INSPECTION = "inspection", "Осмотр"
+    Kind = MaintenanceKind
 
     class Status(models.TextChoices):
         PLANNED = "planned", "Запланировано"
@@ -241,7 +1184,13 @@ class MaintenanceRecord(models.Model):
         DONE = "done", "Завершено"
         CANCELED = "canceled", "Отменено"
 
-    asset = models.ForeignKey(Asset, verbose_name="Оборудование", related_name="maintenance", on_delete=models.CASCADE)
+    asset = models.ForeignKey(
+        Asset,
+        verbose_name="Оборудование",
+        related_name="maintenance",
+        db_index=False,
+        on_delete=models.CASCADE,
+    )
     title = models.CharField("Название", max_length=160)
     kind = models.CharField("Тип", max_length=20, choices=Kind.choices, default=Kind.SERVICE)
     status = models.CharField("Статус", max_length=20, choices=Status.choices, default=Status.PLANNED)
@@ -265,17 +1214,125 @@ class MaintenanceRecord(models.Model):
         null=True,
         blank=True,
     )
+    rule = models.ForeignKey(
+        MaintenanceRule,
+        verbose_name="Правило",
+        related_name="records",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+    # дата по правилу, для которой создана запись; не меняется при переносе scheduled_for
+    occurrence = models.DateField("Дата по правилу", null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    OPEN_STATUSES = (Status.PLANNED, Status.IN_PROGRESS)
+
+    objects = MaintenanceQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Обслуживание"
         verbose_name_plural = "Обслуживание"
         ordering = ("-scheduled_for", "-created_at")
+        indexes = (
+            models.Index(fields=("asset", "created_at", "id")),
+            models.Index(
+                fields=("status", "scheduled_for"),
+                condition=models.Q(status__in=("planned", "in_progress")),
+                name="inventory_maint_open_due_idx",
+            ),
+        )
+        constraints = (
+            # одна запись на позицию и дату по каждому правилу — планировщик можно запускать повторно,
+            # а перенесённая запись не порождает дубликат
+            models.UniqueConstraint(
+                fields=("rule", "asset", "occurrence"),
+                condition=models.Q(rule__isnull=False),
+                name="inventory_maintenance_rule_period",
+            ),
+        )
 
     def __str__(self) -> str:
         return f"{self.title} — {self.asset}"
 
     @property
     def is_overdue(self) -> bool:
-        return bool(self.scheduled_for and self.status != self.Status.DONE and self.scheduled_for < timezone.now().date())
+        if "overdue" in self.__dict__:
+            return self.overdue
+        return bool(
+            self.scheduled_for and self.status in self.OPEN_STATUSES and self.scheduled_for < timezone.localdate()
+        )
+
+
+class ExpiryNotice(models.Model):
+    """Отметка об отправленном предупреждении: повторный запуск рассылки пропускает уже сообщённое."""
+
+    class Kind(models.TextChoices):
+        WARRANTY = "warranty", "Окончание гарантии"
+        MAINTENANCE = "maintenance", "Обслуживание"
+
+    kind = models.CharField("Тип", max_length=20, choices=Kind.choices)
+    object_id = models.PositiveBigIntegerField("Объект")
+    # дата в ключе: если гарантию продлили или работу перенесли, о новой дате предупредим снова
+    due_on = models.DateField("Срок")
+    sent_at = models.DateTimeField("Отправлено", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Отправленное предупреждение"
+        verbose_name_plural = "Отправленные предупреждения"
+        constraints = (
+            models.UniqueConstraint(fields=("kind", "object_id", "due_on"), name="inventory_expirynotice_unique"),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} #{self.object_id} на {self.due_on:%d.%m.%Y}"
+
+
+# signals to keep the cached dashboard stats and the counters fresh
+from django.db.models.signals import post_delete, post_save  # pylint: disable=wrong-import-position
+from django.dispatch import receiver  # pylint: disable=wrong-import-position
+
+
+@receiver(post_save, sender=Asset)
+@receiver(post_delete, sender=Asset)
+@receiver(post_save, sender=MaintenanceRecord)
+@receiver(post_delete, sender=MaintenanceRecord)
+@receiver(post_save, sender=AssetCategory)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(post_save, sender=Vendor)
+@receiver(post_delete, sender=Vendor)
+def invalidate_dashboard_stats(sender, **kwargs) -> None:
+    from .stats import invalidate_inventory_stats
+
+    transaction.on_commit(invalidate_inventory_stats)
+
+
+@receiver(post_save, sender=Asset)
+def refresh_asset_search_vector(sender, instance: Asset, created: bool, update_fields=None, **kwargs) -> None:
+    from .search import SEARCH_FIELDS, refresh_search_vectors
+
+    if update_fields is not None:
+        changed = bool(SEARCH_FIELDS.intersection(update_fields))
+    else:
+        changed = created or instance.loaded_values_changed()
+    if changed:
+        refresh_search_vectors(Asset.objects.filter(pk=instance.pk))
+    instance.remember_loaded_values(update_fields)
+
+
+@receiver(post_save, sender=AssetCategory)
+def refresh_category_search_vectors(sender, instance: AssetCategory, created: bool, update_fields=None, **kwargs) -> None:
+    from .search import refresh_search_vectors
+
+    # описание, ключевые характеристики или перенос в дереве вектор позиций не меняют
+    if not created and instance.loaded_values_changed():
+        refresh_search_vectors(instance.assets.all())
+    instance.remember_loaded_values(update_fields)
+
+
+@receiver(post_delete, sender=Asset)
+def decrement_asset_counters(sender, instance: Asset, **kwargs) -> None:
+    Counter.objects.record_delete(instance)
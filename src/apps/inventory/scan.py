@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from django.db.models import Q
+
+from .models import Asset
+
+SCAN_BATCH_LIMIT = 500
+SCAN_FIELDS = ("pk", "inventory_code", "serial_number", "status", "location_id", "assigned_to_id")
+
+
+def normalize_codes(raw_codes) -> list[str]:
+    """Коды из пачки сканера без пробелов и повторов, в исходном порядке."""
+    return list(dict.fromkeys(code for code in (str(value).strip() for value in raw_codes) if code))
+
+
+def resolve_codes(codes: list[str]) -> tuple[dict[str, list], list[str]]:
+    """Сопоставляет отсканированные коды позициям одним запросом по двум индексам.
+
+    Инвентарный номер важнее серийного; серийный номер, встречающийся у нескольких позиций,
+    считается ненайденным. Возвращает ``{код: [id, статус, локация, кому выдано]}`` и список
+    ненайденных кодов.
+    """
+    by_code, by_serial = {}, {}
+    rows = Asset.objects.filter(Q(inventory_code__in=codes) | Q(serial_number__in=codes)).order_by().values_list(*SCAN_FIELDS)
+    for pk, inventory_code, serial_number, *state in rows:
+        by_code[inventory_code] = [pk, *state]
+        if serial_number:
+            by_serial.setdefault(serial_number, []).append([pk, *state])
+    found, missing = {}, []
+    for code in codes:
+        if code in by_code:
+            found[code] = by_code[code]
+        elif len(by_serial.get(code, ())) == 1:
+            found[code] = by_serial[code][0]
+        else:
+            missing.append(code)
+    return found, missing
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from functools import cache
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db import connection
+from django.db.models import F, FloatField, OuterRef, Q, QuerySet, Subquery, Value
+from django.db.models.functions import Cast
+
+from .models import AssetCategory
+
+SEARCH_CONFIG = "russian"
+# поля, от которых зависит search_vector; категория подтягивается подзапросом
+SEARCH_FIELDS = frozenset({"name", "inventory_code", "serial_number", "notes", "category", "category_id"})
+
+
+def uses_postgres() -> bool:
+    return connection.vendor == "postgresql"
+
+
+@cache
+def trigram_available() -> bool:
+    """Установлено ли расширение pg_trgm; без него нечёткий поиск по кодам не используется."""
+    if not uses_postgres():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def asset_search_vector() -> SearchVector:
+    """Выражение для хранимого search_vector: коды весят больше всего, заметки меньше всего."""
+    category_name = Subquery(AssetCategory.objects.filter(pk=OuterRef("category_id")).values("name")[:1])
+    return (
+        SearchVector("inventory_code", "serial_number", config="simple", weight="A")
+        + SearchVector("name", config=SEARCH_CONFIG, weight="A")
+        + SearchVector(category_name, config=SEARCH_CONFIG, weight="B")
+        + SearchVector("notes", config=SEARCH_CONFIG, weight="D")
+    )
+
+
+def refresh_search_vectors(assets: QuerySet) -> int:
+    """Пересчитывает search_vector одним UPDATE; вне PostgreSQL ничего не делает."""
+    if not uses_postgres():
+        return 0
+    return assets.order_by().update(search_vector=asset_search_vector())
+
+
+def search_assets(assets: QuerySet, query: str) -> QuerySet:
+    """Отбирает позиции по строке поиска и добавляет аннотацию ``search_rank``.
+
+    На PostgreSQL — полнотекстовый поиск по хранимому вектору (GIN), префикс инвентарного номера и,
+    если есть pg_trgm, похожие инвентарные и серийные номера. На остальных базах — icontains.
+    """
+    query = query.strip()
+    if not query:
+        return assets
+    if not uses_postgres():
+        condition = (
+            Q(name__icontains=query)
+            | Q(inventory_code__icontains=query)
+            | Q(serial_number__icontains=query)
+            | Q(notes__icontains=query)
+            | Q(category__name__icontains=query)
+        )
+        return assets.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch") | SearchQuery(
+        query, config="simple", search_type="websearch"
+    )
+    condition = Q(search_vector=search_query) | Q(inventory_code__startswith=query)
+    rank = SearchRank(F("search_vector"), search_query)
+    if trigram_available():
+        condition |= Q(inventory_code__trigram_similar=query) | Q(serial_number__trigram_similar=query)
+        rank = rank + TrigramSimilarity("inventory_code", query) + TrigramSimilarity("serial_number", query)
+    return assets.filter(condition).annotate(search_rank=Cast(rank, FloatField()))
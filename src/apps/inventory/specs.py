@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass
+
+from django.db import connection
+from django.db.models import FloatField, Func, Index, Q
+from django.db.models.lookups import (
+    GreaterThan,
+    GreaterThanOrEqual,
+    LessThan,
+    LessThanOrEqual,
+)
+
+SPEC_INDEX_PREFIX = "inv_spec_"
+RANGE_LOOKUPS = {">": GreaterThan, ">=": GreaterThanOrEqual, "<": LessThan, "<=": LessThanOrEqual}
+
+# key[.nested] [op value]; значения — число, true/false, слово или строка в кавычках
+CONDITION_RE = re.compile(
+    r"""\s*(?P<path>[^\W\d][\w-]*(?:\.[^\W\d][\w-]*)*)
+        \s*(?:(?P<op>>=|<=|!=|=|>|<)\s*(?P<value>"[^"]*"|[^\s,"]+))?
+        \s*(?:,|(?=\s)|$)""",
+    re.VERBOSE,
+)
+NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+KEY_RE = re.compile(r"[^\W\d][\w-]*(?:\.[^\W\d][\w-]*)*")
+
+
+@dataclass(frozen=True)
+class SpecCondition:
+    path: tuple[str, ...]
+    op: str | None = None
+    value: str | int | float | bool | None = None
+
+    def __str__(self) -> str:
+        key = ".".join(self.path)
+        return key if self.op is None else f"{key}{self.op}{self.value}"
+
+
+class SpecNumber(Func):
+    """Числовое значение характеристики ``specs`` по пути или NULL, если там не число.
+
+    Сравнение через CASE не падает на строках и даёт одно и то же выражение для запросов
+    и для индексов по ключевым характеристикам.
+    """
+
+    output_field = FloatField()
+
+    def __init__(self, *path: str, field: str = "specs") -> None:
+        self.path = path
+        super().__init__(field)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        column, params = compiler.compile(self.source_expressions[0])
+        path = "{" + ",".join(self.path) + "}"
+        sql = f"CASE WHEN jsonb_typeof({column} #> %s) = 'number' THEN ({column} #>> %s)::double precision END"
+        return sql, (*params, path, *params, path)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        column, params = compiler.compile(self.source_expressions[0])
+        path = "$." + ".".join(f'"{key}"' for key in self.path)
+        sql = f"CASE WHEN json_type({column}, %s) IN ('integer', 'real') THEN json_extract({column}, %s) END"
+        return sql, (*params, path, *params, path)
+
+
+def parse_value(raw: str):
+    if raw.startswith('"'):
+        return raw[1:-1]
+    if raw in ("true", "false"):
+        return raw == "true"
+    if NUMBER_RE.fullmatch(raw):
+        return int(raw) if "." not in raw else float(raw)
+    return raw
+
+
+def parse_spec_filter(text: str) -> list[SpecCondition]:
+    """Разбирает строку вида ``ram>=16 cpu=M2 display.size<=14 gpu``; ошибки — ValueError."""
+    conditions = []
+    position, text = 0, text.strip()
+    while position < len(text):
+        match = CONDITION_RE.match(text, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Не удалось разобрать условие: {text[position:]}")
+        position = match.end()
+        path, op, raw = match.group("path", "op", "value")
+        value = parse_value(raw) if op else None
+        if op in RANGE_LOOKUPS and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise ValueError(f"Для сравнения {op} нужно число: {path}")
+        conditions.append(SpecCondition(tuple(path.split(".")), op, value))
+    return conditions
+
+
+def flatten_specs(specs: dict, prefix: str = "") -> list[tuple[str, object, str]]:
+    """Плоский список (ключ через точку, значение, условие DSL для поиска похожих позиций)."""
+    rows = []
+    for key, value in specs.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            rows += flatten_specs(value, f"{path}.")
+            continue
+        condition = ""
+        if KEY_RE.fullmatch(path) and isinstance(value, (str, int, float)):
+            if isinstance(value, bool):
+                literal = "true" if value else "false"
+            elif isinstance(value, str):
+                literal = f'"{value}"' if value and '"' not in value else ""
+            else:
+                literal = str(value)
+            condition = f"{path}={literal}" if literal else ""
+        rows.append((path, value, condition))
+    return rows
+
+
+def nest(path: tuple[str, ...], value) -> dict:
+    for key in reversed(path):
+        value = {key: value}
+    return value
+
+
+def condition_q(condition: SpecCondition) -> Q:
+    """Условие DSL как Q: равенство — containment (GIN jsonb_path_ops), диапазон — SpecNumber."""
+    lookup = "specs__" + "__".join(condition.path)
+    if condition.op is None:
+        *parents, key = condition.path
+        return Q(**{"__".join(("specs", *parents, "has_key")): key})
+    if condition.op in RANGE_LOOKUPS:
+        return Q(RANGE_LOOKUPS[condition.op](SpecNumber(*condition.path), condition.value))
+    if connection.vendor == "postgresql":
+        q = Q(specs__contains=nest(condition.path, condition.value))
+    else:
+        q = Q(**{lookup: condition.value})
+    return ~q if condition.op == "!=" else q
+
+
+def filter_by_specs(assets, conditions: list[SpecCondition]):
+    for condition in conditions:
+        assets = assets.filter(condition_q(condition))
+    return assets
+
+
+def spec_index_name(category_id: int, key: str) -> str:
+    digest = hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()[:8]
+    return f"{SPEC_INDEX_PREFIX}{category_id}_{digest}"
+
+
+def promoted_spec_indexes(categories) -> dict[str, Index]:
+    """Частичные индексы по SpecNumber для ключевых характеристик каждой категории."""
+    indexes = {}
+    for category_id, keys in categories.values_list("pk", "promoted_specs"):
+        for key in keys or []:
+            name = spec_index_name(category_id, key)
+            indexes[name] = Index(SpecNumber(*key.split(".")), name=name, condition=Q(category_id=category_id))
+    return indexes
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from src.apps.counters.models import Counter
+
+from .models import (
+    Asset,
+    AssetCategory,
+    CategoryClosure,
+    MaintenanceRecord,
+    Vendor,
+    overdue_q,
+)
+
+STATS_CACHE_KEY = "inventory:stats"
+STATS_CACHE_TIMEOUT = 60
+# поколение кэша отчётов по датам (амортизация): сброс меняет все ключи сразу
+REPORTS_GENERATION_KEY = "inventory:reports:generation"
+
+OPEN_MAINTENANCE = MaintenanceRecord.OPEN_STATUSES
+ATTENTION_STATUSES = (Asset.Status.RESERVED, Asset.Status.MAINTENANCE)
+
+
+def compute_inventory_stats() -> dict:
+    """Показатели дашбордов: разрезы оборудования из счётчиков, обслуживание — одним условным агрегатом."""
+    today = timezone.now().date()
+    counters = Counter.objects.breakdowns(Counter.Dimension.ASSET_STATUS, Counter.Dimension.ASSET_CATEGORY)
+    status_totals = {value: counters[Counter.Dimension.ASSET_STATUS].get(value, 0) for value in Asset.Status.values}
+    maintenance = MaintenanceRecord.objects.aggregate(
+        planned=Count("id", filter=Q(status=MaintenanceRecord.Status.PLANNED)),
+        in_progress=Count("id", filter=Q(status=MaintenanceRecord.Status.IN_PROGRESS)),
+        overdue=Count("id", filter=overdue_q(today)),
+        next_planned=Min("scheduled_for", filter=Q(status=MaintenanceRecord.Status.PLANNED)),
+    )
+    status_breakdown = sorted(
+        (
+            {"status": value, "label": label, "total": status_totals[value]}
+            for value, label in Asset.Status.choices
+            if status_totals[value]
+        ),
+        key=lambda item: -item["total"],
+    )
+    categories = list(AssetCategory.objects.all())
+    direct = {category.pk: counters[Counter.Dimension.ASSET_CATEGORY].get(str(category.pk), 0) for category in categories}
+    subtree = CategoryClosure.objects.rollup(direct)
+    for category in categories:
+        category.asset_total = direct[category.pk]
+        category.subtree_total = subtree.get(category.pk, 0)
+    return {
+        "asset_total": sum(status_totals.values()),
+        "status_totals": status_totals,
+        "status_breakdown": status_breakdown,
+        "maintenance": maintenance,
+        "vendor_count": Vendor.objects.count(),
+        "category_breakdown": sorted(categories, key=lambda category: -category.subtree_total),
+        "upcoming_maintenance": list(
+            MaintenanceRecord.objects.select_related("asset", "responsible")
+            .filter(status__in=OPEN_MAINTENANCE, scheduled_for__isnull=False)
+            .order_by("scheduled_for")[:6]
+        ),
+        "low_stock_assets": list(
+            Asset.objects.select_related("location", "custodian")
+            .filter(status__in=ATTENTION_STATUSES)
+            .order_by("name", "inventory_code")[:6]
+        ),
+    }
+
+
+def get_inventory_stats() -> dict:
+    """Показатели из кэша; пересчитываются не чаще раза в STATS_CACHE_TIMEOUT или после изменений."""
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        stats = compute_inventory_stats()
+        cache.set(STATS_CACHE_KEY, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_inventory_stats() -> None:
+    cache.delete_many([STATS_CACHE_KEY, REPORTS_GENERATION_KEY])
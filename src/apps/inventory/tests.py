@@ -1,13 +1,63 @@
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
-from .models import Asset, AssetCategory, Location, MaintenanceRecord, Vendor
+from src.apps.counters.models import Counter
+from src.apps.tasks.models import Project, Task
+
+from .admin import LatestEntriesFormSet
+from .alerts import send_expiry_alerts
+from .catalogue import CATALOGUE_PAGE_SIZE, encode_cursor, get_asset_page
+from .depreciation import (
+    DepreciationMethod,
+    compute_depreciation_report,
+    get_depreciation_report,
+)
+from .export import export_rows, stream_jsonl
+from .history import as_of_moment, with_state_as_of
+from .importer import AssetImporter, import_assets, read_rows
+from .models import (
+    Asset,
+    AssetCategory,
+    AssetLogEntry,
+    AssetMovement,
+    AssetUnavailable,
+    CategoryClosure,
+    ExpiryNotice,
+    InventorySnapshot,
+    Location,
+    LocationTransfer,
+    MaintenanceRecord,
+    MaintenanceRule,
+    Stocktake,
+    StocktakeItem,
+    Vendor,
+)
+from .search import search_assets
+from .specs import SpecCondition, filter_by_specs, parse_spec_filter
+from .stats import get_inventory_stats
+from .timeline import TIMELINE_PAGE_SIZE, get_timeline_page
+from .views import AssetTransferView
 
 
 class AssetOverviewViewTests(TestCase):
     def setUp(self):
+        cache.clear()
         user_model = get_user_model()
         self.manager = user_model.objects.create_user(
             username="manager",
@@ -73,3 +123,1138 @@ class AssetOverviewViewTests(TestCase):
         self.client.force_login(self.manager)
         response = self.client.get(reverse("inventory:asset_detail", args=[self.asset.pk]))
         self.assertEqual(response.status_code, 200)
+
+
+class AssetCatalogueTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(username="viewer", email="viewer@example.com", password="pass")
+        self.category = AssetCategory.objects.create(name="Мониторы", slug="monitors")
+        self.other_category = AssetCategory.objects.create(name="Принтеры", slug="printers")
+        self.location = Location.objects.create(name="Офис", code="OF-01")
+        Asset.objects.bulk_create(
+            Asset(
+                name=f"Монитор {index // 3:02d}",
+                inventory_code=f"MON-{index:03d}",
+                category=self.category,
+                status=Asset.Status.IN_USE if index % 2 else Asset.Status.AVAILABLE,
+                location=self.location if index % 5 == 0 else None,
+            )
+            for index in range(23)
+        )
+        Asset.objects.create(name="Принтер", inventory_code="PRN-001", category=self.other_category)
+        self.client.force_login(self.user)
+
+    def test_keyset_pages_cover_filtered_set_in_order(self):
+        assets = Asset.objects.filter(category=self.category, status=Asset.Status.IN_USE)
+        expected = list(assets.values_list("inventory_code", flat=True))
+        codes, cursor = [], None
+        while True:
+            items, cursor = get_asset_page(assets, after=cursor, limit=4)
+            codes.extend(asset.inventory_code for asset in items)
+            if cursor is None:
+                break
+        self.assertEqual(codes, expected)
+        self.assertEqual(len(codes), 11)
+
+    def test_json_endpoint_applies_filters_and_returns_rows(self):
+        response = self.client.get(
+            reverse("inventory:asset_catalogue"), {"location": self.location.pk, "status": Asset.Status.AVAILABLE}
+        )
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual([item["inventory_code"] for item in payload["results"]], ["MON-000", "MON-010", "MON-020"])
+        self.assertIn("MON-010", payload["html"])
+        self.assertIsNone(payload["next"])
+
+    def test_overview_renders_next_page_link(self):
+        Asset.objects.bulk_create(
+            Asset(name="Кабель", inventory_code=f"CAB-{index:03d}", category=self.other_category) for index in range(60)
+        )
+        response = self.client.get(reverse("inventory:asset_list"), {"category": self.other_category.pk})
+        self.assertEqual(len(response.context["assets"]), CATALOGUE_PAGE_SIZE)
+        next_page = self.client.get(f"{reverse('inventory:asset_list')}?{response.context['next_query']}")
+        self.assertEqual(len(next_page.context["assets"]), 61 - CATALOGUE_PAGE_SIZE)
+        self.assertIsNone(next_page.context["next_query"])
+
+    def test_invalid_cursor_and_filter_are_rejected(self):
+        url = reverse("inventory:asset_catalogue")
+        self.assertEqual(self.client.get(url, {"after": "%%%"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"status": "stolen"}).status_code, 400)
+
+
+class InventoryStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = AssetCategory.objects.create(name="Камеры", slug="cameras")
+        self.asset = Asset.objects.create(name="Камера", inventory_code="CAM-001", category=self.category)
+        Asset.objects.create(
+            name="Камера", inventory_code="CAM-002", category=self.category, status=Asset.Status.MAINTENANCE
+        )
+        MaintenanceRecord.objects.create(
+            asset=self.asset, title="Чистка", scheduled_for=timezone.now().date() - timedelta(days=2)
+        )
+
+    def test_stats_are_aggregated_once_and_cached(self):
+        # asset and maintenance aggregates, vendors, categories, category tree, two short lists
+        with self.assertNumQueries(7):
+            stats = get_inventory_stats()
+        self.assertEqual(stats["asset_total"], 2)
+        self.assertEqual(stats["status_totals"][Asset.Status.MAINTENANCE], 1)
+        self.assertEqual(stats["maintenance"]["planned"], 1)
+        self.assertEqual(stats["maintenance"]["overdue"], 1)
+        self.assertEqual([asset.inventory_code for asset in stats["low_stock_assets"]], ["CAM-002"])
+        with self.assertNumQueries(0):
+            get_inventory_stats()
+
+    def test_save_invalidates_cached_stats(self):
+        get_inventory_stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.asset.mark_status(Asset.Status.RESERVED)
+        self.assertEqual(get_inventory_stats()["status_totals"][Asset.Status.RESERVED], 1)
+
+    def test_index_uses_cached_stats(self):
+        self.client.get(reverse("index"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("index"))
+        self.assertEqual(response.context["homepage"]["asset_count"], 2)
+        self.assertEqual(response.context["homepage"]["maintenance_planned"], 1)
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.admin = user_model.objects.create_user(username="root", email="root@example.com", password="pass")
+        self.admin.promote_to_admin()
+        self.laptops = AssetCategory.objects.create(name="Ноутбуки", slug="laptops")
+        self.phones = AssetCategory.objects.create(name="Телефоны", slug="phones")
+        self.asset = Asset.objects.create(name="ThinkPad", inventory_code="TP-001", category=self.laptops)
+        Asset.objects.create(name="Pixel", inventory_code="PX-001", category=self.phones, status=Asset.Status.IN_USE)
+
+    def counters(self):
+        return Counter.objects.breakdowns(Counter.Dimension.ASSET_STATUS, Counter.Dimension.ASSET_CATEGORY)
+
+    def test_saves_and_deletes_update_counters(self):
+        self.asset.mark_status(Asset.Status.MAINTENANCE)
+        self.asset.category = self.phones
+        self.asset.save()
+        counters = self.counters()
+        self.assertEqual(counters[Counter.Dimension.ASSET_STATUS], {"maintenance": 1, "in_use": 1})
+        self.assertEqual(counters[Counter.Dimension.ASSET_CATEGORY], {str(self.phones.pk): 2})
+        Asset.objects.get(pk=self.asset.pk).delete()
+        self.assertEqual(self.counters()[Counter.Dimension.ASSET_STATUS], {"in_use": 1})
+
+    def test_admin_bulk_action_updates_counters(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse("admin:inventory_asset_changelist"),
+            {"action": "mark_maintenance", "_selected_action": list(Asset.objects.values_list("pk", flat=True))},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.counters()[Counter.Dimension.ASSET_STATUS], {"maintenance": 2})
+        entries = AssetLogEntry.objects.filter(action=AssetLogEntry.Action.STATUS_CHANGE)
+        self.assertEqual(
+            sorted(entries.values_list("from_status", "to_status", "performed_by")),
+            [("available", "maintenance", self.admin.pk), ("in_use", "maintenance", self.admin.pk)],
+        )
+
+    def test_bulk_mark_status_in_chunks(self):
+        Asset.objects.bulk_create(
+            Asset(name=f"Galaxy {i}", inventory_code=f"GX-{i:03}", category=self.phones) for i in range(5)
+        )
+        call_command("recount", stdout=StringIO())
+        # 4 пачки: ключи, блокировка, UPDATE, журнал, два запроса счётчиков и SAVEPOINT/RELEASE
+        with self.assertNumQueries(4 * 8):
+            updated = Asset.objects.all().bulk_mark_status(Asset.Status.IN_USE, by=self.admin, chunk_size=2)
+        self.assertEqual(updated, 6)
+        self.assertEqual(self.counters()[Counter.Dimension.ASSET_STATUS], {"in_use": 7})
+        self.assertEqual(AssetLogEntry.objects.filter(to_status="in_use").count(), 6)
+        self.assertEqual(Asset.objects.filter(status="in_use").bulk_mark_status(Asset.Status.IN_USE), 0)
+
+    def test_recount_repairs_drift(self):
+        Asset.objects.bulk_create([Asset(name="Galaxy", inventory_code="GX-001", category=self.phones)])
+        Counter.objects.filter(dimension=Counter.Dimension.ASSET_STATUS, value="in_use").update(count=7)
+        output = StringIO()
+        call_command("recount", dimension=[Counter.Dimension.ASSET_STATUS], stdout=output)
+        self.assertIn("asset.status=in_use: 7 -> 1", output.getvalue())
+        self.assertEqual(self.counters()[Counter.Dimension.ASSET_STATUS], {"available": 2, "in_use": 1})
+
+
+class AssetExportTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(
+            username="auditor", email="auditor@example.com", password="pass", first_name="Анна", last_name="Ревизор"
+        )
+        category = AssetCategory.objects.create(name="Сканеры", slug="scanners")
+        vendor = Vendor.objects.create(name="ScanCo")
+        Asset.objects.create(
+            name="Сканер", inventory_code="SC-001", category=category, vendor=vendor, custodian=self.user
+        )
+        Asset.objects.create(name="Сканер", inventory_code="SC-002", category=category, status=Asset.Status.LOST)
+
+    async def export(self, params):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("inventory:asset_export"), params)
+        if not response.streaming:
+            return response, None
+        return response, b"".join([chunk async for chunk in response.streaming_content])
+
+    async def test_csv_export_streams_filtered_rows(self):
+        response, body = await self.export({"status": Asset.Status.AVAILABLE})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        lines = body.decode("utf-8-sig").splitlines()
+        self.assertEqual(lines[0].split(",")[:2], ["inventory_code", "name"])
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith("SC-001,Сканер,"))
+        self.assertTrue(lines[1].endswith("Анна Ревизор"))
+
+    async def test_jsonl_export_and_bad_format(self):
+        _, body = await self.export({"format": "jsonl"})
+        records = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual([record["inventory_code"] for record in records], ["SC-001", "SC-002"])
+        self.assertEqual(records[0]["vendor"], "ScanCo")
+        self.assertIsNone(records[1]["custodian"])
+        response, _ = await self.export({"format": "xlsx"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_requires_login(self):
+        response = self.client.get(reverse("inventory:asset_export"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_export_command_writes_filtered_rows(self):
+        output = StringIO()
+        call_command("export_assets", format="jsonl", status=Asset.Status.LOST, chunk_size=1, stdout=output)
+        self.assertEqual([json.loads(line)["inventory_code"] for line in output.getvalue().splitlines()], ["SC-002"])
+
+
+class AssetImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_superuser(
+            username="importer", email="importer@example.com", password="pass"
+        )
+        self.category = AssetCategory.objects.create(name="Ноутбуки", slug="laptops")
+        Location.objects.create(name="Склад", code="WH-1")
+        Vendor.objects.create(name="Lenovo")
+        Asset.objects.create(name="Старый", inventory_code="NB-000", category=self.category)
+
+    def csv_file(self, *rows):
+        header = "inventory_code,name,category,status,location,vendor,purchase_price,purchase_date\n"
+        return StringIO("﻿" + header + "".join(row + "\n" for row in rows))
+
+    def test_csv_import_creates_assets_logs_and_counters(self):
+        stream = self.csv_file(
+            "NB-001,ThinkPad,laptops,В наличии,WH-1,lenovo,\"1200,50\",2024-02-01",
+            "NB-002,ThinkPad,Ноутбуки,in_use,Склад,,,",
+        )
+        with self.assertNumQueries(14 if connection.vendor == "postgresql" else 13):
+            result = import_assets(stream, "csv", user=self.user)
+        self.assertEqual((result.created, result.failed), (2, 0))
+        asset = Asset.objects.get(inventory_code="NB-001")
+        self.assertEqual(asset.location.code, "WH-1")
+        self.assertEqual(asset.vendor.name, "Lenovo")
+        self.assertEqual(str(asset.purchase_price), "1200.50")
+        self.assertEqual(asset.log_entries.get().notes, "Импорт")
+        self.assertEqual(Counter.objects.breakdowns("asset.status")["asset.status"][Asset.Status.IN_USE], 1)
+        self.assertFalse(any(Counter.objects.recount().values()))
+
+    def test_rejected_rows_are_reported_and_skipped(self):
+        stream = self.csv_file(
+            "NB-000,Дубликат,laptops,,,,,",
+            "NB-003,,планшеты,broken,,,abc,2024-13-01",
+            "NB-004,Годный,laptops,,,,,",
+            "NB-004,Повтор,laptops,,,,,",
+        )
+        result = import_assets(stream, "csv")
+        self.assertEqual(result.created, 1)
+        self.assertEqual([error.line for error in result.errors], [2, 3, 5])
+        self.assertEqual(len(result.errors[1].messages), 5)
+        self.assertTrue(Asset.objects.filter(inventory_code="NB-004", name="Годный").exists())
+
+    def test_over_long_values_are_row_errors(self):
+        stream = StringIO(
+            json.dumps({"inventory_code": "NB-040", "name": "X1", "category": "laptops", "serial_number": "S" * 129})
+            + "\n"
+            + json.dumps({"inventory_code": "NB-041", "name": "N" * 161, "category": "laptops"})
+            + "\n"
+        )
+        result = import_assets(stream, "jsonl")
+        self.assertEqual(result.created, 0)
+        self.assertEqual(
+            [error.messages for error in result.errors],
+            [
+                ["Слишком длинное значение поля serial_number: больше 128 символов"],
+                ["Слишком длинное значение поля name: больше 160 символов"],
+            ],
+        )
+
+    def test_ambiguous_custodian_name_is_a_row_error(self):
+        for username in ("ivanov1", "ivanov2"):
+            get_user_model().objects.create_user(username=username, first_name="Иван", last_name="Иванов")
+        stream = StringIO(
+            '{"inventory_code": "NB-020", "name": "X1", "category": "laptops", "custodian": "Иван Иванов"}\n'
+            '{"inventory_code": "NB-021", "name": "X1", "category": "laptops", "custodian": "ivanov2"}\n'
+        )
+        result = import_assets(stream, "jsonl")
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.errors[0].messages, ["Неоднозначное значение поля custodian: Иван Иванов"])
+        self.assertEqual(Asset.objects.get(inventory_code="NB-021").custodian.username, "ivanov2")
+
+    def test_codes_taken_after_validation_become_row_errors(self):
+        class RacingImporter(AssetImporter):
+            def validate_chunk(self, chunk, result):
+                valid = super().validate_chunk(chunk, result)
+                Asset.objects.create(name="Параллельно", inventory_code="NB-031", category_id=self.categories.resolve("laptops"))
+                return valid
+
+        rows = read_rows(self.csv_file("NB-030,T14,laptops,,,,,", "NB-031,T14,laptops,,,,,"), "csv")
+        result = RacingImporter().run(rows)
+        self.assertEqual(result.created, 1)
+        self.assertEqual([error.line for error in result.errors], [3])
+        self.assertEqual(Asset.objects.get(inventory_code="NB-031").name, "Параллельно")
+        self.assertTrue(Asset.objects.filter(inventory_code="NB-030").exists())
+
+    def test_dry_run_writes_nothing(self):
+        stream = StringIO('{"inventory_code": "NB-010", "name": "X1", "category": "laptops"}\nnot json\n')
+        result = import_assets(stream, "jsonl", dry_run=True)
+        self.assertEqual((result.created, result.failed), (1, 1))
+        self.assertFalse(Asset.objects.filter(inventory_code="NB-010").exists())
+
+    def test_export_round_trip(self):
+        Asset.objects.create(name="Учёт", inventory_code="NB-100", category=self.category, custodian=self.user)
+        rows = export_rows(Asset.objects.filter(inventory_code="NB-100"))
+        exported = "".join(stream_jsonl(rows)).replace("NB-100", "NB-101")
+        result = import_assets(StringIO(exported), "jsonl")
+        self.assertEqual(result.failed, 0)
+        self.assertEqual(Asset.objects.get(inventory_code="NB-101").custodian, self.user)
+
+    @skipUnless(connection.vendor == "postgresql", "COPY есть только в PostgreSQL")
+    def test_copy_path(self):
+        stream = self.csv_file("NB-200,T14\tс табуляцией,laptops,,WH-1,,,")
+        result = import_assets(stream, "csv", use_copy=True, user=self.user)
+        self.assertEqual(result.created, 1)
+        asset = Asset.objects.get(inventory_code="NB-200")
+        self.assertEqual(asset.name, "T14\tс табуляцией")
+        self.assertEqual(asset.log_entries.get().performed_by, self.user)
+
+    def test_admin_upload(self):
+        self.client.force_login(self.user)
+        url = reverse("admin:inventory_asset_import")
+        self.assertContains(self.client.get(reverse("admin:inventory_asset_changelist")), url)
+        upload = SimpleUploadedFile("assets.csv", self.csv_file("NB-300,Новый,laptops,,,,,").getvalue().encode())
+        response = self.client.post(url, {"file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Asset.objects.filter(inventory_code="NB-300").exists())
+        response = self.client.post(url, {"file": SimpleUploadedFile("assets.xlsx", b"x")})
+        self.assertFormError(response.context["form"], "file", "Поддерживаются файлы .csv и .jsonl")
+
+
+class AssetSearchTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser(
+            username="finder", email="finder@example.com", password="pass"
+        )
+        self.category = AssetCategory.objects.create(name="Проекторы", slug="projectors")
+        other = AssetCategory.objects.create(name="Кабели", slug="cables")
+        self.projector = Asset.objects.create(
+            name="Epson проектор", inventory_code="PR-001", serial_number="EPX7781", category=self.category
+        )
+        self.cable = Asset.objects.create(
+            name="HDMI кабель", inventory_code="CB-001", category=other, notes="Идёт в комплекте с проектором"
+        )
+        Asset.objects.create(name="Удлинитель", inventory_code="CB-002", category=other)
+
+    def codes(self, assets):
+        return [asset.inventory_code for asset in assets]
+
+    def test_matches_name_notes_category_and_code_prefix(self):
+        found = search_assets(Asset.objects.all(), "проектор")
+        self.assertEqual(set(self.codes(found)), {"PR-001", "CB-001"})
+        self.assertEqual(self.codes(search_assets(Asset.objects.all(), "Кабели")), ["CB-001", "CB-002"])
+        self.assertEqual(self.codes(search_assets(Asset.objects.all(), "PR-0")), ["PR-001"])
+        self.assertEqual(self.codes(search_assets(Asset.objects.all(), "EPX7781")), ["PR-001"])
+
+    @skipUnless(connection.vendor == "postgresql", "хранимый вектор есть только в PostgreSQL")
+    def test_rank_and_stored_vector_refresh(self):
+        found = search_assets(Asset.objects.all(), "проектор").order_by("-search_rank")
+        self.assertEqual(self.codes(found), ["PR-001", "CB-001"])
+        self.category.name = "Мультимедиа"
+        self.category.save()
+        self.assertEqual(self.codes(search_assets(Asset.objects.all(), "мультимедиа")), ["PR-001"])
+        Asset.objects.filter(pk=self.cable.pk).update(notes="")
+        self.cable.refresh_from_db()
+        self.cable.save(update_fields=["notes"])
+        self.assertEqual(self.codes(search_assets(Asset.objects.all(), "проектор")), ["PR-001"])
+
+    @skipUnless(connection.vendor == "postgresql", "хранимый вектор есть только в PostgreSQL")
+    def test_unrelated_edits_do_not_rewrite_vectors(self):
+        category = AssetCategory.objects.get(pk=self.category.pk)
+        asset = Asset.objects.get(pk=self.projector.pk)
+        with CaptureQueriesContext(connection) as queries:
+            category.description = "Для переговорных"
+            category.save()
+            asset.purchase_price = Decimal("100.00")
+            asset.save()
+        self.assertFalse([query for query in queries if "to_tsvector" in query["sql"]])
+        with CaptureQueriesContext(connection) as queries:
+            asset.name = "Epson проектор 4K"
+            asset.save()
+        self.assertEqual(len([query for query in queries if "to_tsvector" in query["sql"]]), 1)
+
+    def test_catalogue_pages_through_ranked_results(self):
+        Asset.objects.create(name="Кабель VGA для проектора", inventory_code="CB-003", category=self.category)
+        assets = search_assets(Asset.objects.all(), "проектор")
+        seen, cursor = [], None
+        while True:
+            items, cursor = get_asset_page(assets, after=cursor, limit=1)
+            seen += self.codes(items)
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), ["CB-001", "CB-003", "PR-001"])
+        with self.assertRaises(ValueError):
+            get_asset_page(assets, after=encode_cursor(self.cable))
+
+    def test_catalogue_and_admin_use_search(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("inventory:asset_catalogue"), {"q": "Удлинитель"})
+        self.assertEqual([item["inventory_code"] for item in response.json()["results"]], ["CB-002"])
+        response = self.client.get(reverse("admin:inventory_asset_changelist"), {"q": "PR-001"})
+        self.assertEqual(self.codes(response.context["cl"].result_list), ["PR-001"])
+
+
+class SpecFilterTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser(
+            username="specs", email="specs@example.com", password="pass"
+        )
+        self.laptops = AssetCategory.objects.create(name="Ноутбуки", slug="laptops", promoted_specs=["ram"])
+        specs = [
+            ("NB-1", {"ram": 16, "cpu": "M2", "display": {"size": 13.6}}),
+            ("NB-2", {"ram": 32, "cpu": "M2 Pro", "display": {"size": 16}, "gpu": "integrated"}),
+            ("NB-3", {"ram": 8, "cpu": "i5"}),
+            ("NB-4", {"ram": "16 GB", "cpu": "M2"}),
+        ]
+        for code, value in specs:
+            Asset.objects.create(name=code, inventory_code=code, category=self.laptops, specs=value)
+
+    def codes(self, text):
+        assets = filter_by_specs(Asset.objects.all(), parse_spec_filter(text))
+        return sorted(assets.values_list("inventory_code", flat=True))
+
+    def test_parse_conditions(self):
+        conditions = parse_spec_filter('ram>=16, cpu="M2 Pro" display.size<14.5 gpu')
+        self.assertEqual(
+            conditions,
+            [
+                SpecCondition(("ram",), ">=", 16),
+                SpecCondition(("cpu",), "=", "M2 Pro"),
+                SpecCondition(("display", "size"), "<", 14.5),
+                SpecCondition(("gpu",)),
+            ],
+        )
+        for text in ("ram>=many", "=16", "ram>>16"):
+            with self.assertRaises(ValueError):
+                parse_spec_filter(text)
+
+    def test_filters_by_equality_ranges_and_keys(self):
+        self.assertEqual(self.codes("ram>=16 cpu=M2"), ["NB-1"])
+        self.assertEqual(self.codes("ram<=16"), ["NB-1", "NB-3"])
+        self.assertEqual(self.codes('cpu="M2 Pro"'), ["NB-2"])
+        self.assertEqual(self.codes("cpu!=M2"), ["NB-2", "NB-3"])
+        self.assertEqual(self.codes("display.size>14"), ["NB-2"])
+        self.assertEqual(self.codes("gpu"), ["NB-2"])
+        self.assertEqual(self.codes('ram="16 GB"'), ["NB-4"])
+
+    def test_catalogue_accepts_spec_filter(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("inventory:asset_catalogue"), {"specs": "ram>8", "category": self.laptops.pk})
+        self.assertEqual([item["inventory_code"] for item in response.json()["results"]], ["NB-1", "NB-2"])
+        response = self.client.get(reverse("inventory:asset_catalogue"), {"specs": "ram>=lots"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("specs", response.json()["errors"])
+
+    def test_detail_lists_specs_with_filter_links(self):
+        self.client.force_login(self.user)
+        asset = Asset.objects.get(inventory_code="NB-2")
+        response = self.client.get(reverse("inventory:asset_detail", args=[asset.pk]))
+        self.assertContains(response, "display.size")
+        self.assertContains(response, "?specs=cpu%3D%22M2%20Pro%22")
+
+    def test_promoted_keys_are_validated(self):
+        self.laptops.promoted_specs = ["ram", "bad key"]
+        with self.assertRaises(ValidationError):
+            self.laptops.full_clean()
+
+    @skipUnless(connection.vendor == "postgresql", "индексы по выражениям создаются только в PostgreSQL")
+    def test_sync_spec_indexes(self):
+        connection.check_constraints()  # DDL не выполняется при отложенных проверках FK в транзакции теста
+        out = StringIO()
+        call_command("sync_spec_indexes", stdout=out)
+        self.assertIn("1 created, 0 dropped", out.getvalue())
+        self.laptops.promoted_specs = []
+        self.laptops.save()
+        connection.check_constraints()
+        call_command("sync_spec_indexes", stdout=out)
+        self.assertIn("0 created, 1 dropped", out.getvalue())
+
+
+class CategoryTreeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_superuser(
+            username="tree", email="tree@example.com", password="pass"
+        )
+        self.it = AssetCategory.objects.create(name="ИТ", slug="it")
+        self.computers = AssetCategory.objects.create(name="Компьютеры", slug="computers", parent=self.it)
+        self.laptops = AssetCategory.objects.create(name="Ноутбуки", slug="laptops", parent=self.computers)
+        self.furniture = AssetCategory.objects.create(name="Мебель", slug="furniture")
+        Asset.objects.create(name="Сервер", inventory_code="IT-1", category=self.it, purchase_price=1000)
+        Asset.objects.create(name="ПК", inventory_code="PC-1", category=self.computers, purchase_price=300)
+        Asset.objects.create(name="ThinkPad", inventory_code="NB-1", category=self.laptops, purchase_price=200)
+        Asset.objects.create(name="MacBook", inventory_code="NB-2", category=self.laptops)
+        Asset.objects.create(name="Стол", inventory_code="F-1", category=self.furniture, purchase_price=50)
+
+    def totals(self):
+        return {
+            category.slug: (category.subtree_assets, category.subtree_value)
+            for category in AssetCategory.objects.with_subtree_totals()
+        }
+
+    def test_subtree_totals_in_one_query(self):
+        with self.assertNumQueries(1):
+            totals = self.totals()
+        self.assertEqual(totals["it"], (4, 1500))
+        self.assertEqual(totals["computers"], (3, 500))
+        self.assertEqual(totals["laptops"], (2, 200))
+        self.assertEqual(totals["furniture"], (1, 50))
+
+    def test_breadcrumbs_and_reparenting(self):
+        with self.assertNumQueries(1):
+            self.assertEqual([category.slug for category in self.laptops.breadcrumbs()], ["it", "computers", "laptops"])
+        self.computers.parent = self.furniture
+        self.computers.save()
+        self.assertEqual([category.slug for category in self.laptops.breadcrumbs()], ["furniture", "computers", "laptops"])
+        self.assertEqual(self.totals()["it"], (1, 1000))
+        self.assertEqual(self.totals()["furniture"], (4, 550))
+        self.computers.parent = None
+        self.computers.save(update_fields=["parent"])
+        self.assertEqual(self.totals()["furniture"], (1, 50))
+        links = sorted(CategoryClosure.objects.values_list("ancestor_id", "descendant_id", "depth"))
+        CategoryClosure.objects.rebuild()
+        self.assertEqual(sorted(CategoryClosure.objects.values_list("ancestor_id", "descendant_id", "depth")), links)
+
+    def test_cannot_move_category_into_its_subtree(self):
+        self.it.parent = self.laptops
+        with self.assertRaises(ValidationError):
+            self.it.full_clean()
+        with self.assertRaises(ValueError):
+            self.it.save()
+        self.it.refresh_from_db()
+        self.assertIsNone(self.it.parent_id)
+
+    def test_catalogue_filters_by_descendants_and_stats_roll_up(self):
+        self.client.force_login(self.user)
+        url = reverse("inventory:asset_catalogue")
+        response = self.client.get(url, {"category": self.computers.pk})
+        self.assertEqual([item["inventory_code"] for item in response.json()["results"]], ["PC-1"])
+        response = self.client.get(url, {"category": self.computers.pk, "descendants": "on"})
+        self.assertEqual(sorted(item["inventory_code"] for item in response.json()["results"]), ["NB-1", "NB-2", "PC-1"])
+        breakdown = {category.slug: category.subtree_total for category in get_inventory_stats()["category_breakdown"]}
+        self.assertEqual(breakdown, {"it": 4, "computers": 3, "laptops": 2, "furniture": 1})
+
+
+class AssetTimelineTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser(
+            username="history", email="history@example.com", password="pass"
+        )
+        category = AssetCategory.objects.create(name="Принтеры", slug="printers")
+        self.asset = Asset.objects.create(name="Принтер", inventory_code="PRN-1", category=category)
+        start = timezone.now() - timedelta(days=30)
+        AssetLogEntry.objects.bulk_create(
+            AssetLogEntry(asset=self.asset, action=AssetLogEntry.Action.NOTE, notes=f"n{i}", created_at=start + timedelta(hours=i))
+            for i in range(25)
+        )
+        record = MaintenanceRecord.objects.create(asset=self.asset, title="Замена картриджа")
+        MaintenanceRecord.objects.filter(pk=record.pk).update(created_at=start + timedelta(hours=10))
+        project = Project.objects.create(name="Офис", code="OFF", owner=self.user)
+        task = Task.objects.create(project=project, title="Починить принтер", created_by=self.user)
+        task.assets.add(self.asset)
+        Task.objects.filter(pk=task.pk).update(created_at=start + timedelta(hours=10))
+
+    def test_pages_merge_sources_without_gaps(self):
+        seen, cursor = [], None
+        while True:
+            with self.assertNumQueries(4):
+                entries, cursor = get_timeline_page(self.asset, before=cursor, limit=7)
+            seen += entries
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 25 + 1 + 1)
+        self.assertEqual(len({(entry.kind, entry.pk) for entry in seen}), len(seen))
+        self.assertEqual([entry.sort_key for entry in seen], sorted((entry.sort_key for entry in seen), reverse=True))
+        tied = [entry.kind for entry in seen if entry.created_at == seen[-1].created_at + timedelta(hours=10)]
+        self.assertEqual(tied, ["log", "maintenance", "task"])
+
+    def test_detail_page_and_json_continuation(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("inventory:asset_detail", args=[self.asset.pk]))
+        self.assertEqual(len(response.context["timeline"]), TIMELINE_PAGE_SIZE)
+        self.assertContains(response, "timeline-load-more")
+        self.assertContains(response, "Починить принтер")
+        url = reverse("inventory:asset_history", args=[self.asset.pk])
+        data = self.client.get(url, {"before": response.context["timeline_next"]}).json()
+        self.assertEqual(data["html"].count("<li"), 7)
+        self.assertIsNone(data["next"])
+        self.assertEqual(self.client.get(url, {"before": "bogus"}).status_code, 400)
+
+    def test_admin_inline_is_bounded(self):
+        AssetLogEntry.objects.bulk_create(
+            AssetLogEntry(asset=self.asset, action=AssetLogEntry.Action.NOTE) for _ in range(LatestEntriesFormSet.max_shown)
+        )
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("admin:inventory_asset_change", args=[self.asset.pk]))
+        formset = next(f for f in response.context["inline_admin_formsets"] if f.formset.model is AssetLogEntry).formset
+        self.assertEqual(len(formset.forms), LatestEntriesFormSet.max_shown)
+        self.assertContains(response, f"?asset__id__exact={self.asset.pk}")
+
+
+class PointInTimeTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(username="pit", email="pit@example.com", password="pass")
+        self.worker = get_user_model().objects.create_user(username="worker", password="pass")
+        category = AssetCategory.objects.create(name="Ноутбуки", slug="laptops")
+        self.asset = Asset.objects.create(name="Ноутбук", inventory_code="NB-1", category=category)
+        self.other = Asset.objects.create(name="Ноутбук запасной", inventory_code="NB-2", category=category)
+        past = timezone.now() - timedelta(days=20)
+        Asset.objects.update(created_at=past)
+        self.asset.refresh_from_db()
+        self.day = lambda days_ago: timezone.localdate() - timedelta(days=days_ago)
+
+    def change(self, days_ago: int, *, status=None, assigned_to=None) -> None:
+        previous_status, previous_assignee = self.asset.status, self.asset.assigned_to_id
+        if status:
+            self.asset.status = status
+        if assigned_to is not None:
+            self.asset.assigned_to = assigned_to or None
+        self.asset.save()
+        self.asset.log_state_change(previous_status=previous_status, previous_assignee_id=previous_assignee, by=self.admin)
+        AssetLogEntry.objects.filter(asset=self.asset, created_at__gt=timezone.now() - timedelta(minutes=1)).update(
+            created_at=timezone.now() - timedelta(days=days_ago)
+        )
+
+    def state(self, days_ago: int) -> tuple:
+        assets = with_state_as_of(Asset.objects.filter(pk=self.asset.pk), as_of_moment(self.day(days_ago)))
+        return assets.values_list("status_as_of", "assigned_as_of").get()
+
+    def test_replays_from_log_without_snapshot(self):
+        self.change(10, status=Asset.Status.IN_USE, assigned_to=self.worker)
+        self.change(5, status=Asset.Status.AVAILABLE, assigned_to=False)
+        self.assertEqual(self.state(15), (Asset.Status.AVAILABLE, None))
+        self.assertEqual(self.state(7), (Asset.Status.IN_USE, self.worker.pk))
+        self.assertEqual(self.state(2), (Asset.Status.AVAILABLE, None))
+
+    def test_replays_from_nearest_snapshot(self):
+        self.change(10, status=Asset.Status.IN_USE, assigned_to=self.worker)
+        snapshot = InventorySnapshot.objects.take()
+        InventorySnapshot.objects.filter(pk=snapshot.pk).update(taken_at=timezone.now() - timedelta(days=8))
+        self.assertEqual(snapshot.asset_count, 2)
+        # записи до снимка больше не нужны для восстановления
+        AssetLogEntry.objects.all().delete()
+        self.change(5, status=Asset.Status.MAINTENANCE)
+        self.assertEqual(self.state(7), (Asset.Status.IN_USE, self.worker.pk))
+        self.assertEqual(self.state(2), (Asset.Status.MAINTENANCE, self.worker.pk))
+
+    def test_assets_created_later_are_hidden(self):
+        Asset.objects.filter(pk=self.other.pk).update(created_at=timezone.now() - timedelta(days=3))
+        assets = with_state_as_of(Asset.objects.all(), as_of_moment(self.day(5)))
+        self.assertEqual(list(assets.values_list("pk", flat=True)), [self.asset.pk])
+
+    def test_catalogue_and_export_use_state_as_of(self):
+        self.change(10, status=Asset.Status.IN_USE, assigned_to=self.worker)
+        self.change(5, status=Asset.Status.AVAILABLE, assigned_to=False)
+        self.client.force_login(self.admin)
+        as_of = self.day(7).isoformat()
+        response = self.client.get(reverse("inventory:asset_list"), {"as_of": as_of, "status": Asset.Status.IN_USE})
+        items = response.context["assets"]
+        self.assertEqual([(item.pk, item.status, item.assigned_to) for item in items], [(self.asset.pk, "in_use", self.worker)])
+        self.assertContains(response, "Состояние на")
+        form_assets = with_state_as_of(Asset.objects.filter(pk=self.asset.pk), as_of_moment(self.day(7)))
+        row = next(export_rows(form_assets))
+        self.assertEqual(row[4], Asset.Status.IN_USE)
+
+    async def test_export_view_uses_state_as_of(self):
+        await sync_to_async(self.change)(10, status=Asset.Status.IN_USE, assigned_to=self.worker)
+        await sync_to_async(self.change)(5, status=Asset.Status.AVAILABLE, assigned_to=False)
+        await self.async_client.aforce_login(self.admin)
+        params = {"format": "jsonl", "as_of": self.day(7).isoformat(), "q": "Ноутбук"}
+        response = await self.async_client.get(reverse("inventory:asset_export"), params)
+        self.assertEqual(response.status_code, 200)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        statuses = {record["inventory_code"]: record["status"] for record in map(json.loads, body.decode().splitlines())}
+        self.assertEqual(statuses, {"NB-1": Asset.Status.IN_USE, "NB-2": Asset.Status.AVAILABLE})
+
+    def test_update_view_logs_state_changes(self):
+        self.client.force_login(self.admin)
+        data = {
+            "name": self.asset.name,
+            "category": self.asset.category_id,
+            "inventory_code": self.asset.inventory_code,
+            "status": Asset.Status.IN_USE,
+            "condition": self.asset.condition,
+            "assigned_to": self.worker.pk,
+            "specs": "{}",
+        }
+        response = self.client.post(reverse("inventory:asset_update", args=[self.asset.pk]), data)
+        self.assertEqual(response.status_code, 302)
+        actions = set(self.asset.log_entries.values_list("action", "assignee"))
+        self.assertEqual(
+            actions, {(AssetLogEntry.Action.STATUS_CHANGE, None), (AssetLogEntry.Action.ASSIGNED, self.worker.pk)}
+        )
+
+    def test_snapshot_command(self):
+        out = StringIO()
+        call_command("snapshot_inventory", stdout=out)
+        self.assertEqual(InventorySnapshot.objects.get().states.count(), 2)
+        self.assertIn("2 assets", out.getvalue())
+
+
+class AssetCheckoutTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.clerk = user_model.objects.create_user(username="clerk", email="clerk@example.com", password="pass")
+        self.clerk.promote_to_admin()
+        self.worker = user_model.objects.create_user(username="shift", password="pass")
+        category = AssetCategory.objects.create(name="Сканеры", slug="scanners")
+        self.kit = [
+            Asset.objects.create(name=f"Сканер {i}", inventory_code=f"SC-{i}", category=category) for i in range(3)
+        ]
+        self.ids = [asset.pk for asset in self.kit]
+        self.client.force_login(self.clerk)
+
+    def post(self, name: str, payload: dict):
+        return self.client.post(reverse(f"inventory:{name}"), json.dumps(payload), content_type="application/json")
+
+    def test_kit_checkout_and_return(self):
+        response = self.post("asset_checkout", {"asset_ids": self.ids, "assignee_id": self.worker.pk, "note": "Смена"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["checked_out"], self.ids)
+        self.assertEqual(set(Asset.objects.values_list("status", "assigned_to")), {("in_use", self.worker.pk)})
+        self.assertEqual(AssetLogEntry.objects.filter(action=AssetLogEntry.Action.ASSIGNED, assignee=self.worker).count(), 3)
+        self.assertEqual(Counter.objects.breakdowns(Counter.Dimension.ASSET_STATUS)[Counter.Dimension.ASSET_STATUS], {"in_use": 3})
+
+        response = self.post("asset_return", {"asset_ids": self.ids[:2]})
+        self.assertEqual(response.json()["returned"], self.ids[:2])
+        returned = AssetLogEntry.objects.filter(action=AssetLogEntry.Action.RETURNED)
+        self.assertEqual(set(returned.values_list("asset", "assignee")), {(pk, self.worker.pk) for pk in self.ids[:2]})
+        self.assertEqual(Asset.objects.filter(status="available", assigned_to=None).count(), 2)
+
+    def test_conflict_rolls_back_whole_kit(self):
+        self.kit[1].mark_status(Asset.Status.IN_USE)
+        response = self.post("asset_checkout", {"asset_ids": self.ids, "assignee_id": self.worker.pk})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["asset_ids"], [self.kit[1].pk])
+        self.assertFalse(Asset.objects.filter(assigned_to=self.worker).exists())
+        self.assertEqual(self.post("asset_return", {"asset_ids": [self.kit[0].pk]}).status_code, 409)
+        self.assertEqual(self.post("asset_return", {"asset_ids": [10**9]}).status_code, 409)
+
+    def test_rejects_bad_payload(self):
+        self.assertEqual(self.post("asset_checkout", {"asset_ids": self.ids}).status_code, 400)
+        self.assertEqual(self.post("asset_checkout", {"asset_ids": ["x"], "assignee_id": self.worker.pk}).status_code, 400)
+        self.assertEqual(self.post("asset_return", {"asset_ids": []}).status_code, 400)
+        self.client.force_login(self.worker)
+        self.assertEqual(self.post("asset_return", {"asset_ids": self.ids}).status_code, 403)
+
+    def test_base_view_requires_transfer_method(self):
+        request = RequestFactory().post("/", json.dumps({"asset_ids": self.ids}), content_type="application/json")
+        request.user = self.clerk
+        with self.assertRaises(ImproperlyConfigured):
+            AssetTransferView.as_view()(request)
+
+
+class AssetScanTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="scanner", password="pass")
+        category = AssetCategory.objects.create(name="Терминалы", slug="terminals")
+        self.first = Asset.objects.create(name="ТСД 1", inventory_code="TSD-1", serial_number="SN-A", category=category)
+        self.second = Asset.objects.create(
+            name="ТСД 2", inventory_code="TSD-2", serial_number="SN-B", category=category, status=Asset.Status.IN_USE
+        )
+        Asset.objects.create(name="ТСД 3", inventory_code="TSD-3", serial_number="SN-B", category=category)
+        self.client.force_login(self.user)
+
+    def scan(self, codes):
+        return self.client.post(reverse("inventory:asset_scan"), json.dumps({"codes": codes}), content_type="application/json")
+
+    def test_resolves_batch_in_one_query(self):
+        with self.assertNumQueries(3):  # сессия, пользователь и один запрос по кодам
+            response = self.scan(["TSD-1", " TSD-2 ", "SN-A", "SN-B", "nope", "TSD-1"])
+        data = response.json()
+        self.assertEqual(
+            data["found"],
+            {
+                "TSD-1": [self.first.pk, "available", None, None],
+                "TSD-2": [self.second.pk, "in_use", None, None],
+                "SN-A": [self.first.pk, "available", None, None],
+            },
+        )
+        self.assertEqual(data["missing"], ["SN-B", "nope"])
+        self.assertNotIn(b", ", response.content)
+
+    def test_rejects_bad_payload(self):
+        self.assertEqual(self.scan("TSD-1").status_code, 400)
+        self.assertEqual(self.scan(["x"] * 501).status_code, 400)
+
+
+class StocktakeTests(TestCase):
+    def setUp(self):
+        self.clerk = get_user_model().objects.create_user(username="counter", email="counter@example.com", password="pass")
+        self.clerk.promote_to_admin()
+        category = AssetCategory.objects.create(name="Мебель", slug="furniture")
+        self.warehouse = Location.objects.create(name="Склад", code="WH")
+        self.office = Location.objects.create(name="Офис", code="OF")
+        Asset.objects.bulk_create(
+            Asset(name=f"Стул {i}", inventory_code=f"CH-{i}", category=category, location=self.warehouse) for i in range(6)
+        )
+        Asset.objects.filter(inventory_code="CH-4").update(status=Asset.Status.IN_USE)
+        Asset.objects.filter(inventory_code="CH-5").update(status=Asset.Status.LOST)
+        Asset.objects.create(name="Стол", inventory_code="TB-1", category=category, location=self.office)
+        call_command("recount", stdout=StringIO())
+        self.stocktake = Stocktake.objects.create(location=self.warehouse, started_by=self.clerk)
+
+    def scan(self, codes):
+        self.client.force_login(self.clerk)
+        url = reverse("inventory:stocktake_scan", args=[self.stocktake.pk])
+        return self.client.post(url, json.dumps({"codes": codes}), content_type="application/json")
+
+    def test_reconcile_and_apply(self):
+        self.assertEqual(self.scan(["CH-0", "CH-1", "CH-5"]).json(), {"added": 3, "total": 3})
+        self.assertEqual(self.scan(["CH-1", "TB-1", "XX-9"]).json(), {"added": 2, "total": 5})
+        summary = self.stocktake.reconcile()
+        self.assertEqual(summary, {"pending": 0, "found": 3, "misplaced": 1, "unknown": 1, "missing": 2})
+        missing = self.stocktake.items.filter(result=StocktakeItem.Result.MISSING)
+        self.assertEqual(sorted(missing.values_list("inventory_code", flat=True)), ["CH-2", "CH-3"])
+        self.assertEqual(self.scan(["CH-2"]).status_code, 409)
+        response = self.client.get(reverse("admin:inventory_stocktake_change", args=[self.stocktake.pk]))
+        self.assertContains(response, "Не найдено: 2")
+
+        with self.assertRaises(ValueError):
+            self.stocktake.reconcile()
+        result = self.stocktake.apply_resolutions(by=self.clerk)
+        self.assertEqual(result, {"moved": 1, "lost": 2, "recovered": 1})
+        statuses = dict(Asset.objects.values_list("inventory_code", "status"))
+        self.assertEqual(statuses["CH-2"], "lost")
+        self.assertEqual(statuses["CH-5"], "available")
+        self.assertEqual(statuses["CH-4"], "in_use")
+        self.assertEqual(Asset.objects.get(inventory_code="TB-1").location, self.warehouse)
+        self.assertEqual(AssetLogEntry.objects.filter(performed_by=self.clerk).count(), 4)
+        self.assertTrue(
+            AssetLogEntry.objects.filter(asset__inventory_code="TB-1", action=AssetLogEntry.Action.UPDATED).exists()
+        )
+        self.assertEqual(
+            list(AssetMovement.objects.values_list("asset__inventory_code", "from_location", "to_location")),
+            [("TB-1", self.office.pk, self.warehouse.pk)],
+        )
+        self.assertEqual(
+            Counter.objects.breakdowns(Counter.Dimension.ASSET_STATUS)[Counter.Dimension.ASSET_STATUS],
+            {"available": 4, "in_use": 1, "lost": 2},
+        )
+
+    def test_reconcile_query_count_is_constant(self):
+        self.stocktake.add_codes([f"CH-{i}" for i in range(4)])
+        # блокировка, два UPDATE, INSERT недостач, сохранение, сводка и savepoint
+        with self.assertNumQueries(8):
+            self.stocktake.reconcile()
+
+
+class LocationTransferTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser(username="mover", email="mover@example.com", password="pass")
+        category = AssetCategory.objects.create(name="Паллеты", slug="pallets")
+        self.source = Location.objects.create(name="Склад А", code="A")
+        self.destination = Location.objects.create(name="Склад Б", code="B")
+        self.assets = [
+            Asset.objects.create(name=f"Коробка {i}", inventory_code=f"BX-{i}", category=category, location=self.source)
+            for i in range(3)
+        ]
+        self.transfer = LocationTransfer.objects.create(source=self.source, destination=self.destination)
+        self.transfer.assets.set(self.assets)
+
+    def test_post_moves_assets_and_records_history(self):
+        # блокировка документа и позиций, выборка состава, UPDATE, журнал, сохранение и savepoint
+        with self.assertNumQueries(8):
+            self.assertEqual(self.transfer.post(by=self.user), 3)
+        self.assertEqual(set(Asset.objects.values_list("location", flat=True)), {self.destination.pk})
+        self.assertEqual(self.transfer.movements.count(), 3)
+        self.assertEqual(AssetMovement.objects.for_location(self.source).count(), 3)
+        with self.assertRaises(ValueError):
+            self.transfer.post(by=self.user)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("inventory:asset_detail", args=[self.assets[0].pk]))
+        self.assertContains(response, "Склад А → Склад Б")
+
+    def test_post_refreshes_cached_depreciation_report(self):
+        cache.clear()
+        Asset.objects.update(purchase_price=Decimal("100.00"), purchase_date=date(2024, 1, 1))
+        as_of = date(2025, 1, 1)
+
+        def location_totals():
+            report = get_depreciation_report(as_of, DepreciationMethod.STRAIGHT_LINE)
+            return {row["name"]: row["assets"] for row in report["groups"]["location"]}
+
+        self.assertEqual(location_totals(), {"Склад А": 3})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.transfer.post(by=self.user)
+        self.assertEqual(location_totals(), {"Склад Б": 3})
+
+    def test_post_is_all_or_nothing(self):
+        Asset.objects.filter(pk=self.assets[1].pk).update(location=self.destination)
+        with self.assertRaises(AssetUnavailable) as raised:
+            self.transfer.post(by=self.user)
+        self.assertEqual(raised.exception.asset_ids, [self.assets[1].pk])
+        self.assertEqual(Asset.objects.filter(location=self.source).count(), 2)
+        self.assertFalse(AssetMovement.objects.exists())
+        self.assertEqual(LocationTransfer.objects.get().status, LocationTransfer.Status.DRAFT)
+
+    def test_edit_form_records_movement(self):
+        self.client.force_login(self.user)
+        asset = self.assets[0]
+        data = {
+            "name": asset.name,
+            "category": asset.category_id,
+            "inventory_code": asset.inventory_code,
+            "status": asset.status,
+            "condition": asset.condition,
+            "location": self.destination.pk,
+            "specs": "{}",
+        }
+        self.client.post(reverse("inventory:asset_update", args=[asset.pk]), data)
+        self.assertEqual(
+            list(asset.movements.values_list("from_location", "to_location", "moved_by")),
+            [(self.source.pk, self.destination.pk, self.user.pk)],
+        )
+
+
+class MaintenanceScheduleTests(TestCase):
+    def setUp(self):
+        self.printers = AssetCategory.objects.create(name="Принтеры", slug="printers")
+        self.laser = AssetCategory.objects.create(name="Лазерные", slug="laser", parent=self.printers)
+        for i in range(3):
+            Asset.objects.create(name=f"Принтер {i}", inventory_code=f"PR-{i}", category=self.laser)
+        Asset.objects.create(name="Старый", inventory_code="PR-OLD", category=self.laser, status=Asset.Status.RETIRED)
+        self.today = timezone.localdate()
+
+    def test_occurrences_follow_calendar(self):
+        rule = MaintenanceRule(title="Чистка", starts_on=date(2025, 1, 31), every=1, unit=MaintenanceRule.Unit.MONTHS)
+        self.assertEqual(
+            rule.occurrences(date(2025, 2, 1), date(2025, 4, 30)), [date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30)]
+        )
+        rule = MaintenanceRule(title="Осмотр", starts_on=date(2025, 1, 1), every=10, unit=MaintenanceRule.Unit.DAYS)
+        self.assertEqual(rule.occurrences(date(2025, 1, 15), date(2025, 2, 1)), [date(2025, 1, 21), date(2025, 1, 31)])
+
+    def test_command_is_idempotent_per_period(self):
+        MaintenanceRule.objects.create(
+            title="Чистка", category=self.printers, every=14, unit=MaintenanceRule.Unit.DAYS, starts_on=self.today, lead_days=30
+        )
+        out = StringIO()
+        call_command("schedule_maintenance", stdout=out)
+        self.assertIn("Scheduled 9 maintenance records", out.getvalue())
+        call_command("schedule_maintenance", stdout=out)
+        self.assertIn("Scheduled 0 maintenance records", out.getvalue())
+        self.assertEqual(MaintenanceRecord.objects.filter(asset__inventory_code="PR-OLD").count(), 0)
+        call_command("schedule_maintenance", horizon=45, stdout=out)
+        self.assertEqual(MaintenanceRecord.objects.count(), 12)
+
+    def test_rescheduled_record_is_not_generated_again(self):
+        rule = MaintenanceRule.objects.create(
+            title="Чистка", category=self.printers, every=14, unit=MaintenanceRule.Unit.DAYS, starts_on=self.today, lead_days=30
+        )
+        self.assertEqual(rule.generate(self.today, self.today + timedelta(days=30)), 9)
+        MaintenanceRecord.objects.filter(rule=rule, scheduled_for=self.today).update(
+            scheduled_for=self.today + timedelta(days=2)
+        )
+        self.assertEqual(rule.generate(self.today, self.today + timedelta(days=30)), 0)
+
+    def test_overdue_is_computed_in_sql(self):
+        asset = Asset.objects.get(inventory_code="PR-0")
+        past = self.today - timedelta(days=3)
+        late = MaintenanceRecord.objects.create(asset=asset, title="Просрочено", scheduled_for=past)
+        MaintenanceRecord.objects.create(asset=asset, title="Сделано", scheduled_for=past, status="done")
+        MaintenanceRecord.objects.create(asset=asset, title="Отменено", scheduled_for=past, status="canceled")
+        MaintenanceRecord.objects.create(asset=asset, title="Будущее", scheduled_for=self.today + timedelta(days=3))
+        MaintenanceRecord.objects.create(asset=asset, title="Без даты")
+        self.assertEqual(list(MaintenanceRecord.objects.overdue()), [late])
+        flags = dict(MaintenanceRecord.objects.with_overdue().values_list("title", "overdue"))
+        self.assertEqual([title for title, overdue in flags.items() if overdue], ["Просрочено"])
+        self.assertTrue(MaintenanceRecord.objects.with_overdue().get(pk=late.pk).is_overdue)
+
+        admin_user = get_user_model().objects.create_superuser(username="maint", email="m@example.com", password="pass")
+        self.client.force_login(admin_user)
+        response = self.client.get(reverse("admin:inventory_maintenancerecord_changelist"), {"overdue": "1"})
+        self.assertEqual(list(response.context["cl"].result_list), [late])
+
+
+class ExpiryAlertTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.owner = user_model.objects.create_user(username="owner", email="owner@example.com", password="pass12345")
+        self.keeper = user_model.objects.create_user(username="keeper", email="keeper@example.com", password="pass12345")
+        self.tech = user_model.objects.create_user(username="tech", email="tech@example.com", password="pass12345")
+        self.category = AssetCategory.objects.create(name="Ноутбуки", slug="laptops")
+        self.location = Location.objects.create(name="Склад", code="WH", contact=self.keeper)
+        self.today = timezone.localdate()
+
+    def make_asset(self, code, days, **extra):
+        return Asset.objects.create(
+            name=f"Ноутбук {code}",
+            inventory_code=code,
+            category=self.category,
+            custodian=self.owner,
+            location=self.location,
+            warranty_expiration=self.today + timedelta(days=days),
+            **extra,
+        )
+
+    def test_one_digest_per_recipient_and_reruns_send_nothing(self):
+        self.make_asset("NB-1", 5)
+        self.make_asset("NB-2", 20)
+        self.make_asset("NB-FAR", 90)
+        self.make_asset("NB-OLD", 5, status=Asset.Status.RETIRED)
+        asset = self.make_asset("NB-3", 200)
+        MaintenanceRecord.objects.create(
+            asset=asset, title="Чистка", scheduled_for=self.today + timedelta(days=2), responsible=self.tech
+        )
+        MaintenanceRecord.objects.create(asset=asset, title="Замена", scheduled_for=self.today + timedelta(days=3))
+        MaintenanceRecord.objects.create(
+            asset=asset, title="Готово", scheduled_for=self.today + timedelta(days=1), status=MaintenanceRecord.Status.DONE
+        )
+
+        run = send_expiry_alerts()
+        self.assertEqual((run.alerts, run.sent), (4, 3))
+        digests = {message.to[0]: message.body for message in mail.outbox}
+        self.assertEqual(set(digests), {"owner@example.com", "keeper@example.com", "tech@example.com"})
+        self.assertIn("NB-1", digests["keeper@example.com"])
+        self.assertIn("Замена", digests["owner@example.com"])
+        self.assertNotIn("Чистка", digests["owner@example.com"])
+        self.assertNotIn("NB-FAR", digests["owner@example.com"])
+        self.assertNotIn("NB-OLD", digests["owner@example.com"])
+        self.assertEqual(ExpiryNotice.objects.count(), 4)
+
+        mail.outbox.clear()
+        self.assertEqual(send_expiry_alerts().alerts, 0)
+        self.assertEqual(mail.outbox, [])
+
+        # продлённая гарантия — новый срок, о нём предупреждаем снова
+        Asset.objects.filter(inventory_code="NB-1").update(warranty_expiration=self.today + timedelta(days=25))
+        out = StringIO()
+        call_command("send_expiry_alerts", stdout=out)
+        self.assertIn("1 new alerts, 2 digests sent", out.getvalue())
+
+    def test_query_count_does_not_depend_on_volume(self):
+        for i in range(30):
+            self.make_asset(f"NB-{i}", i % 10)
+        # выборка гарантий, выборка работ, пользователи, отметки, очистка старых отметок
+        with self.assertNumQueries(5):
+            run = send_expiry_alerts()
+        self.assertEqual((run.alerts, len(mail.outbox)), (30, 2))
+
+    def test_dry_run_does_not_mark(self):
+        self.make_asset("NB-1", 5)
+        out = StringIO()
+        call_command("send_expiry_alerts", dry_run=True, stdout=out)
+        self.assertIn("owner@example.com: 1 items", out.getvalue())
+        self.assertEqual((len(mail.outbox), ExpiryNotice.objects.count()), (0, 0))
+
+
+class DepreciationReportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="finance", password="pass12345")
+        self.laptops = AssetCategory.objects.create(name="Ноутбуки", slug="laptops", useful_life_months=24)
+        self.chairs = AssetCategory.objects.create(name="Кресла", slug="chairs")
+        self.office = Location.objects.create(name="Офис", code="OF")
+        self.as_of = date(2025, 1, 1)
+
+    def make_asset(self, code, category, price, purchased, **extra):
+        return Asset.objects.create(
+            name=code, inventory_code=code, category=category, purchase_price=price, purchase_date=purchased, **extra
+        )
+
+    def test_straight_line_and_declining_balance(self):
+        self.make_asset("NB-1", self.laptops, Decimal("1200.00"), date(2024, 1, 1), location=self.office)
+        self.make_asset("NB-OLD", self.laptops, Decimal("900.00"), date(2020, 1, 1))
+        self.make_asset("CH-1", self.chairs, Decimal("600.00"), date(2024, 1, 1))
+        self.make_asset("NB-RET", self.laptops, Decimal("500.00"), date(2024, 1, 1), status=Asset.Status.RETIRED)
+        self.make_asset("NB-NEW", self.laptops, Decimal("500.00"), date(2025, 6, 1))
+        self.make_asset("NB-FREE", self.laptops, None, date(2024, 1, 1))
+        age = 366 / (365.25 / 12)
+
+        report = compute_depreciation_report(self.as_of, DepreciationMethod.STRAIGHT_LINE)
+        rows = {row["name"]: row for row in report["groups"]["category"]}
+        self.assertEqual((rows["Ноутбуки"]["assets"], rows["Ноутбуки"]["cost"]), (2, Decimal("2100.00")))
+        self.assertAlmostEqual(float(rows["Ноутбуки"]["book_value"]), 1200 * (1 - age / 24), places=2)
+        self.assertAlmostEqual(float(rows["Кресла"]["book_value"]), 600 * (1 - age / 60), places=2)
+        self.assertEqual(report["total"]["assets"], 3)
+        locations = {row["name"]: row["assets"] for row in report["groups"]["location"]}
+        self.assertEqual(locations, {"Офис": 1, "—": 2})
+
+        report = compute_depreciation_report(self.as_of, DepreciationMethod.DECLINING_BALANCE, chunk_size=1)
+        rows = {row["name"]: row for row in report["groups"]["category"]}
+        old_age = (self.as_of - date(2020, 1, 1)).days / (365.25 / 12)
+        self.assertAlmostEqual(
+            float(rows["Ноутбуки"]["book_value"]),
+            1200 * (1 - 2 / 24) ** age + 900 * (1 - 2 / 24) ** old_age,
+            places=2,
+        )
+        self.assertEqual(rows["Ноутбуки"]["depreciation"] + rows["Ноутбуки"]["book_value"], Decimal("2100.00"))
+
+    def test_book_value_stops_at_salvage(self):
+        self.laptops.salvage_percent = 10
+        self.laptops.save()
+        self.make_asset("NB-OLD", self.laptops, Decimal("900.00"), date(2020, 1, 1))
+        self.make_asset("NB-1", self.laptops, Decimal("1200.00"), date(2024, 1, 1))
+        age = 366 / (365.25 / 12)
+        for method, book in (
+            (DepreciationMethod.STRAIGHT_LINE, 1200 - 1080 * age / 24),
+            (DepreciationMethod.DECLINING_BALANCE, 1200 * (1 - 2 / 24) ** age),
+        ):
+            total = compute_depreciation_report(self.as_of, method)["total"]
+            self.assertAlmostEqual(float(total["book_value"]), 90 + book, places=2)
+
+    def test_report_is_cached_per_date_until_assets_change(self):
+        asset = self.make_asset("NB-1", self.laptops, Decimal("1200.00"), date(2024, 1, 1))
+        first = get_depreciation_report(self.as_of, DepreciationMethod.STRAIGHT_LINE)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_depreciation_report(self.as_of, DepreciationMethod.STRAIGHT_LINE), first)
+        other_day = get_depreciation_report(date(2024, 7, 1), DepreciationMethod.STRAIGHT_LINE)
+        self.assertGreater(other_day["total"]["book_value"], first["total"]["book_value"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            asset.purchase_price = Decimal("2400.00")
+            asset.save()
+        report = get_depreciation_report(self.as_of, DepreciationMethod.STRAIGHT_LINE)
+        self.assertEqual(report["total"]["cost"], Decimal("2400.00"))
+
+    def test_renaming_location_refreshes_cached_report(self):
+        self.make_asset("NB-1", self.laptops, Decimal("1200.00"), date(2024, 1, 1), location=self.office)
+        get_depreciation_report(self.as_of, DepreciationMethod.STRAIGHT_LINE)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.office.name = "Главный офис"
+            self.office.save()
+        report = get_depreciation_report(self.as_of, DepreciationMethod.STRAIGHT_LINE)
+        self.assertEqual([row["name"] for row in report["groups"]["location"]], ["Главный офис"])
+
+    def test_view_renders_and_exports_csv(self):
+        self.make_asset("NB-1", self.laptops, Decimal("1200.00"), date(2024, 1, 1), location=self.office)
+        self.client.force_login(self.user)
+        url = reverse("inventory:depreciation_report")
+        response = self.client.get(url, {"as_of": "2025-01-01", "group": "location"})
+        self.assertContains(response, "Офис")
+        response = self.client.get(url, {"as_of": "2025-01-01", "method": "declining_balance", "format": "csv"})
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        lines = response.content.decode().splitlines()
+        self.assertEqual(lines[0], "group,assets,cost,depreciation,book_value")
+        self.assertTrue(lines[1].startswith("Ноутбуки,1,1200.00,"))
+        self.assertTrue(lines[-1].startswith("Итого,1,1200.00,"))
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import heapq
+import json
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+
+from .models import Asset, AssetLogEntry, AssetMovement, MaintenanceRecord
+
+TIMELINE_PAGE_SIZE = 20
+
+
+@dataclass(frozen=True)
+class TimelineEntry:
+    kind: str
+    created_at: datetime
+    pk: int
+    obj: object
+
+    @property
+    def sort_key(self) -> tuple:
+        return self.created_at, SOURCE_RANKS[self.kind], self.pk
+
+
+def encode_timeline_cursor(entry: TimelineEntry) -> str:
+    raw = json.dumps([entry.created_at.isoformat(), SOURCE_RANKS[entry.kind], entry.pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_timeline_cursor(value: str) -> tuple[datetime, int, int]:
+    try:
+        created_at, rank, pk = json.loads(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+        created_at = parse_datetime(created_at)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if created_at is None or not isinstance(rank, int) or not isinstance(pk, int):
+        raise ValueError("Invalid cursor")
+    return created_at, rank, pk
+
+
+def before_cursor(rank: int, cursor: tuple[datetime, int, int], created_field: str = "created_at") -> Q:
+    """Условие «строго раньше курсора» для источника с рангом ``rank`` в порядке (created_at, rank, id) по убыванию."""
+    created_at, cursor_rank, pk = cursor
+    if rank < cursor_rank:
+        return Q(**{f"{created_field}__lte": created_at})
+    if rank > cursor_rank:
+        return Q(**{f"{created_field}__lt": created_at})
+    return Q(**{f"{created_field}__lt": created_at}) | Q(**{created_field: created_at, "pk__lt": pk})
+
+
+def log_entries(asset: Asset) -> QuerySet:
+    return AssetLogEntry.objects.filter(asset=asset).select_related("performed_by")
+
+
+def movements(asset: Asset) -> QuerySet:
+    return AssetMovement.objects.filter(asset=asset).select_related("from_location", "to_location", "moved_by")
+
+
+def maintenance_records(asset: Asset) -> QuerySet:
+    return MaintenanceRecord.objects.filter(asset=asset).select_related("responsible", "contractor")
+
+
+def linked_tasks(asset: Asset) -> QuerySet:
+    return asset.tasks.select_related("project", "assignee")
+
+
+# вид записи → (ранг при равном времени, источник). Журнал, перемещения и обслуживание читаются по индексу
+# (asset, created_at, id). Задачи — нет: связи находятся по индексу asset_id таблицы Task.assets, но порядок
+# задаёт Task.created_at, поэтому все связанные с позицией задачи читаются и сортируются на каждой странице.
+# Стоимость линейна по числу задач позиции (обычно единицы), а не по длине всей истории.
+SOURCES = {
+    "movement": (3, movements),
+    "log": (2, log_entries),
+    "maintenance": (1, maintenance_records),
+    "task": (0, linked_tasks),
+}
+SOURCE_RANKS = {kind: rank for kind, (rank, _) in SOURCES.items()}
+
+
+def get_timeline_page(
+    asset: Asset,
+    *,
+    before: str | None = None,
+    limit: int = TIMELINE_PAGE_SIZE,
+) -> tuple[list[TimelineEntry], str | None]:
+    """Страница общей истории позиции: журнал, перемещения, обслуживание и задачи, от новых к старым.
+
+    Из каждого источника берётся не больше ``limit + 1`` записей после курсора, затем потоки сливаются.
+    Для журнала, перемещений и обслуживания глубина страницы не зависит от длины истории; задачи
+    сортируются без индекса, см. ``SOURCES``.
+    """
+    cursor = decode_timeline_cursor(before) if before else None
+    streams = []
+    for kind, (rank, source) in SOURCES.items():
+        queryset = source(asset)
+        if cursor:
+            queryset = queryset.filter(before_cursor(rank, cursor))
+        rows = queryset.order_by("-created_at", "-pk")[: limit + 1]
+        streams.append([TimelineEntry(kind, obj.created_at, obj.pk, obj) for obj in rows])
+    merged = list(heapq.merge(*streams, key=lambda entry: entry.sort_key, reverse=True))
+    if len(merged) > limit:
+        entries = merged[:limit]
+        return entries, encode_timeline_cursor(entries[-1])
+    return merged, None
@@ -1,13 +1,21 @@
 from django.urls import path
 
 from .views import (
+    AssetCatalogueView,
     AssetCategoryCreateView,
+    AssetCheckoutView,
     AssetCreateView,
     AssetDetailView,
+    AssetExportView,
+    AssetHistoryView,
     AssetOverviewView,
+    AssetReturnView,
+    AssetScanView,
     AssetUpdateView,
+    DepreciationReportView,
     LocationCreateView,
     MaintenanceCreateView,
+    StocktakeScanView,
     VendorCreateView,
 )
 
@@ -15,11 +23,19 @@ app_name = "inventory"
 
 urlpatterns = [
     path("", AssetOverviewView.as_view(), name="asset_list"),
+    path("assets/", AssetCatalogueView.as_view(), name="asset_catalogue"),
+    path("assets/export/", AssetExportView.as_view(), name="asset_export"),
+    path("assets/checkout/", AssetCheckoutView.as_view(), name="asset_checkout"),
+    path("assets/return/", AssetReturnView.as_view(), name="asset_return"),
+    path("assets/scan/", AssetScanView.as_view(), name="asset_scan"),
     path("assets/add/", AssetCreateView.as_view(), name="asset_create"),
     path("assets/<int:pk>/", AssetDetailView.as_view(), name="asset_detail"),
+    path("assets/<int:pk>/history/", AssetHistoryView.as_view(), name="asset_history"),
     path("assets/<int:pk>/edit/", AssetUpdateView.as_view(), name="asset_update"),
     path("categories/add/", AssetCategoryCreateView.as_view(), name="category_create"),
     path("locations/add/", LocationCreateView.as_view(), name="location_create"),
     path("vendors/add/", VendorCreateView.as_view(), name="vendor_create"),
+    path("stocktakes/<int:pk>/scan/", StocktakeScanView.as_view(), name="stocktake_scan"),
     path("maintenance/add/", MaintenanceCreateView.as_view(), name="maintenance_create"),
+    path("reports/depreciation/", DepreciationReportView.as_view(), name="depreciation_report"),
 ]
@@ -1,67 +1,222 @@
+import csv
+import json
+
+from asgiref.sync import sync_to_async
 from django.contrib import messages
+from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count, Q
-from django.urls import reverse_lazy
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from django.views import View
 from django.views.generic import CreateView, DetailView, TemplateView, UpdateView
 
 from src.apps.accounts.mixins import AdminRequiredMixin
 
+from .catalogue import get_asset_page, serialize_asset
+from .depreciation import (
+    GROUPINGS,
+    DepreciationMethod,
+    get_depreciation_report,
+    report_csv_rows,
+)
+from .export import EXPORT_FORMATS, aiterate, stream_export
 from .forms import (
     AssetCategoryForm,
+    AssetFilterForm,
     AssetForm,
+    DepreciationReportForm,
     LocationForm,
     MaintenanceRecordForm,
     VendorForm,
 )
-from .models import Asset, AssetCategory, Location, MaintenanceRecord, Vendor
+from .history import apply_state_as_of
+from .models import (
+    Asset,
+    AssetCategory,
+    AssetMovement,
+    AssetUnavailable,
+    Location,
+    MaintenanceRecord,
+    Stocktake,
+    Vendor,
+)
+from .scan import SCAN_BATCH_LIMIT, normalize_codes, resolve_codes
+from .specs import flatten_specs
+from .stats import get_inventory_stats
+from .timeline import get_timeline_page
+
+
+class AssetCatalogueMixin:
+    """Фильтры каталога из GET-параметров и keyset-страница по курсору ``after``."""
+
+    def get_catalogue(self) -> dict:
+        form = AssetFilterForm(self.request.GET or None)
+        assets = form.filter(Asset.objects.select_related("category", "location", "assigned_to"))
+        items, next_cursor = get_asset_page(assets, after=self.request.GET.get("after"))
+        if "status_as_of" in assets.query.annotations:
+            apply_state_as_of(items)
+        next_query = None
+        if next_cursor:
+            query = self.request.GET.copy()
+            query["after"] = next_cursor
+            next_query = query.urlencode()
+        return {"form": form, "items": items, "next_cursor": next_cursor, "next_query": next_query}
+
+    def render_rows(self, items) -> str:
+        return render_to_string(
+            "inventory/asset_rows.html",
+            {"assets": items, "can_manage": getattr(self.request.user, "is_admin_role", False)},
+            request=self.request,
+        )
 
 
-class AssetOverviewView(LoginRequiredMixin, TemplateView):
+class AssetOverviewView(LoginRequiredMixin, AssetCatalogueMixin, TemplateView):
     template_name = "inventory/asset_overview.html"
 
+    def get(self, request, *args, **kwargs):
+        try:
+            self.catalogue = self.get_catalogue()
+        except ValueError:
+            return HttpResponseBadRequest("Invalid cursor")
+        return super().get(request, *args, **kwargs)
+
+    def get_status_filters(self, form: AssetFilterForm) -> list[dict]:
+        active = form.filters().get("status", "")
+        chips = []
+        for value, label in [("", "Все"), *Asset.Status.choices]:
+            query = self.request.GET.copy()
+            query.pop("after", None)
+            if value:
+                query["status"] = value
+            else:
+                query.pop("status", None)
+            chips.append({"value": value, "label": label, "query": query.urlencode(), "active": value == active})
+        return chips
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        assets = Asset.objects.select_related("category", "location", "assigned_to", "custodian").order_by("name")
-        status_breakdown = assets.values("status").annotate(total=Count("id")).order_by("-total")
-        category_breakdown = (
-            AssetCategory.objects.annotate(asset_total=Count("assets")).order_by("-asset_total")
+        stats = get_inventory_stats()
+        context.update(
+            {
+                "assets": self.catalogue["items"],
+                "filter_form": self.catalogue["form"],
+                "next_cursor": self.catalogue["next_cursor"],
+                "next_query": self.catalogue["next_query"],
+                "asset_total": stats["asset_total"],
+                "status_breakdown": stats["status_breakdown"],
+                "category_breakdown": stats["category_breakdown"],
+                "vendor_count": stats["vendor_count"],
+                "upcoming_maintenance": stats["upcoming_maintenance"],
+                "low_stock_assets": stats["low_stock_assets"],
+                "current_date": timezone.now().date(),
+                "can_manage": getattr(self.request.user, "is_admin_role", False),
+                "status_filters": self.get_status_filters(self.catalogue["form"]),
+            }
         )
-        upcoming_maintenance = (
-            MaintenanceRecord.objects.select_related("asset", "responsible")
-            .filter(
-                status__in=[MaintenanceRecord.Status.PLANNED, MaintenanceRecord.Status.IN_PROGRESS],
-                scheduled_for__isnull=False,
-            )
-            .order_by("scheduled_for")[:6]
+        return context
+
+
+class AssetCatalogueView(LoginRequiredMixin, AssetCatalogueMixin, View):
+    """JSON-страница каталога: данные позиций, готовые строки таблицы и курсор продолжения."""
+
+    def get(self, request):
+        try:
+            catalogue = self.get_catalogue()
+        except ValueError:
+            return HttpResponseBadRequest("Invalid cursor")
+        form = catalogue["form"]
+        if form.is_bound and not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+        next_url = None
+        if catalogue["next_query"]:
+            next_url = f"{reverse('inventory:asset_catalogue')}?{catalogue['next_query']}"
+        return JsonResponse(
+            {
+                "results": [serialize_asset(asset) for asset in catalogue["items"]],
+                "html": self.render_rows(catalogue["items"]),
+                "next_cursor": catalogue["next_cursor"],
+                "next": next_url,
+            }
         )
-        low_stock_assets = assets.filter(
-            Q(status=Asset.Status.RESERVED) | Q(status=Asset.Status.MAINTENANCE)
-        )[:6]
 
-        status_choices = [
-            (choice.value, choice.label)
-            for choice in Asset.Status
-        ]
 
+class AssetExportView(View):
+    """Потоковая выгрузка реестра в CSV или JSONL с фильтрами каталога."""
+
+    async def get(self, request):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        export_format = request.GET.get("format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            return HttpResponseBadRequest("Unsupported format")
+        form = AssetFilterForm(request.GET or None)
+        if form.is_bound and not await sync_to_async(form.is_valid)():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        # фильтры as_of и q сами обращаются к базе (ближайший снимок, наличие pg_trgm) — только в синхронном потоке
+        assets = await sync_to_async(form.filter)(Asset.objects.all())
+        response = StreamingHttpResponse(
+            aiterate(stream_export(assets, export_format)),
+            content_type=EXPORT_FORMATS[export_format],
+        )
+        filename = f"assets-{timezone.localdate():%Y%m%d}.{export_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class DepreciationReportView(LoginRequiredMixin, TemplateView):
+    """Стоимость и амортизация по категориям, локациям или поставщикам; ``format=csv`` — выгрузка разреза."""
+
+    template_name = "inventory/depreciation_report.html"
+
+    def get(self, request, *args, **kwargs):
+        self.form = DepreciationReportForm(request.GET or None)
+        self.as_of, self.method, self.group = self.form.params()
+        self.report = get_depreciation_report(self.as_of, self.method)
+        if request.GET.get("format") == "csv":
+            response = HttpResponse(content_type="text/csv; charset=utf-8")
+            response["Content-Disposition"] = f'attachment; filename="depreciation-{self.group}-{self.as_of:%Y%m%d}.csv"'
+            csv.writer(response).writerows(report_csv_rows(self.report, self.group))
+            return response
+        return super().get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
         context.update(
             {
-                "assets": assets[:25],
-                "asset_total": assets.count(),
-                "status_breakdown": status_breakdown,
-                "category_breakdown": category_breakdown,
-                "vendor_count": Vendor.objects.count(),
-                "upcoming_maintenance": upcoming_maintenance,
-                "low_stock_assets": low_stock_assets,
-                "current_date": timezone.now().date(),
-                "can_manage": getattr(self.request.user, "is_admin_role", False),
-                "status_filters": status_choices,
+                "form": self.form,
+                "report": self.report,
+                "rows": self.report["groups"][self.group],
+                "group_label": GROUPINGS[self.group],
+                "method_label": DepreciationMethod(self.method).label,
             }
         )
         return context
 
 
-class AssetDetailView(LoginRequiredMixin, DetailView):
+class AssetTimelineMixin:
+    """Страница истории позиции по курсору ``before`` и её строки для подгрузки."""
+
+    def get_timeline(self, asset: Asset) -> dict:
+        entries, next_cursor = get_timeline_page(asset, before=self.request.GET.get("before"))
+        return {"timeline": entries, "timeline_next": next_cursor}
+
+    def render_timeline(self, entries) -> str:
+        return render_to_string("inventory/asset_timeline_rows.html", {"timeline": entries}, request=self.request)
+
+
+class AssetDetailView(LoginRequiredMixin, AssetTimelineMixin, DetailView):
     model = Asset
     template_name = "inventory/asset_detail.html"
     context_object_name = "asset"
@@ -73,6 +228,144 @@ class AssetDetailView(LoginRequiredMixin, DetailView):
         "assigned_to",
     )
 
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        try:
+            context = self.get_context_data(object=self.object)
+        except ValueError:
+            return HttpResponseBadRequest("Invalid cursor")
+        return self.render_to_response(context)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        specs = self.object.specs
+        context["spec_rows"] = flatten_specs(specs) if isinstance(specs, dict) else []
+        context["category_path"] = self.object.category.breadcrumbs()
+        context.update(self.get_timeline(self.object))
+        return context
+
+
+class AssetHistoryView(LoginRequiredMixin, AssetTimelineMixin, View):
+    """JSON-страница истории: готовые строки и ссылка на продолжение."""
+
+    def get(self, request, pk):
+        asset = get_object_or_404(Asset, pk=pk)
+        try:
+            timeline = self.get_timeline(asset)
+        except ValueError:
+            return HttpResponseBadRequest("Invalid cursor")
+        next_url = None
+        if timeline["timeline_next"]:
+            next_url = f"{reverse('inventory:asset_history', args=[pk])}?before={timeline['timeline_next']}"
+        return JsonResponse({"html": self.render_timeline(timeline["timeline"]), "next": next_url})
+
+
+class AssetTransferView(AdminRequiredMixin, View):
+    """Выдача или приём комплекта позиций: JSON ``{"asset_ids": [...], "note": ""}``.
+
+    Все позиции меняются в одной транзакции; при конфликте ничего не меняется и возвращается 409
+    со списком позиций, которые уже выданы, не выданы или заняты параллельной операцией.
+    """
+
+    max_assets = 200
+    # метод AssetQuerySet, который блокирует позиции (select_for_update nowait по pk) и переводит их;
+    # задаётся в подклассах, URLconf подключает только их
+    transfer_method: str | None = None
+    result_key = "changed"
+
+    def parse_payload(self, request) -> dict | None:
+        try:
+            payload = json.loads(request.body.decode("utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        raw_ids = payload.get("asset_ids") if isinstance(payload, dict) else None
+        if not isinstance(raw_ids, list) or not raw_ids or len(raw_ids) > self.max_assets:
+            return None
+        try:
+            payload["asset_ids"] = sorted({int(asset_id) for asset_id in raw_ids})
+        except (TypeError, ValueError):
+            return None
+        payload["note"] = str(payload.get("note") or "")[:500]
+        return payload
+
+    def post(self, request):
+        if self.transfer_method is None:
+            raise ImproperlyConfigured(f"{type(self).__name__} must set transfer_method")
+        payload = self.parse_payload(request)
+        if payload is None:
+            return HttpResponseBadRequest("Invalid payload")
+        try:
+            options = self.transfer_options(payload)
+        except ValueError as exc:
+            return HttpResponseBadRequest(str(exc))
+        transfer = getattr(Asset.objects.filter(pk__in=payload["asset_ids"]), self.transfer_method)
+        try:
+            changed = transfer(by=request.user, note=payload["note"], **options)
+        except AssetUnavailable as exc:
+            return JsonResponse({"error": str(exc), "asset_ids": exc.asset_ids}, status=409)
+        return JsonResponse({self.result_key: changed, **self.response_extra(options)})
+
+    def transfer_options(self, payload: dict) -> dict:
+        """Дополнительные аргументы метода ``transfer_method``; ValueError — ответ 400."""
+        return {}
+
+    def response_extra(self, options: dict) -> dict:
+        return {}
+
+
+class AssetCheckoutView(AssetTransferView):
+    transfer_method = "checkout"
+    result_key = "checked_out"
+
+    def transfer_options(self, payload: dict) -> dict:
+        try:
+            assignee = get_user_model().objects.get(pk=int(payload.get("assignee_id")), is_active=True)
+        except (TypeError, ValueError, ObjectDoesNotExist):
+            raise ValueError("Unknown assignee") from None
+        return {"assignee": assignee}
+
+    def response_extra(self, options: dict) -> dict:
+        return {"assignee_id": options["assignee"].pk}
+
+
+class AssetReturnView(AssetTransferView):
+    transfer_method = "check_in"
+    result_key = "returned"
+
+
+class AssetScanView(LoginRequiredMixin, View):
+    """Пачка кодов со сканера: ``{"codes": [...]}`` → ``{"found": {код: [id, статус, локация, кому выдано]}, "missing": [...]}``."""
+
+    def post(self, request):
+        try:
+            payload = json.loads(request.body.decode("utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return HttpResponseBadRequest("Invalid payload")
+        raw_codes = payload.get("codes") if isinstance(payload, dict) else None
+        if not isinstance(raw_codes, list) or len(raw_codes) > SCAN_BATCH_LIMIT:
+            return HttpResponseBadRequest("Invalid payload")
+        found, missing = resolve_codes(normalize_codes(raw_codes))
+        return JsonResponse({"found": found, "missing": missing}, json_dumps_params={"separators": (",", ":")})
+
+
+class StocktakeScanView(AdminRequiredMixin, View):
+    """Пачка кодов со сканера в открытую инвентаризацию: ``{"codes": [...]}``; повторы не дублируются."""
+
+    def post(self, request, pk):
+        stocktake = get_object_or_404(Stocktake, pk=pk)
+        try:
+            payload = json.loads(request.body.decode("utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return HttpResponseBadRequest("Invalid payload")
+        raw_codes = payload.get("codes") if isinstance(payload, dict) else None
+        if not isinstance(raw_codes, list) or len(raw_codes) > SCAN_BATCH_LIMIT:
+            return HttpResponseBadRequest("Invalid payload")
+        try:
+            added = stocktake.add_codes(normalize_codes(raw_codes))
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=409)
+        return JsonResponse({"added": added, "total": stocktake.items.count()})
+
 
 class AssetCreateView(AdminRequiredMixin, CreateView):
     model = Asset
@@ -94,8 +387,18 @@ class AssetUpdateView(AdminRequiredMixin, UpdateView):
     context_object_name = "asset"
 
     def form_valid(self, form):
+        response = super().form_valid(form)
+        self.object.log_state_change(
+            previous_status=form.initial["status"],
+            previous_assignee_id=form.initial.get("assigned_to"),
+            by=self.request.user,
+        )
+        if "location" in form.changed_data:
+            AssetMovement.objects.record(
+                [(self.object.pk, form.initial.get("location"))], self.object.location_id, by=self.request.user
+            )
         messages.success(self.request, "Запись обновлена")
-        return super().form_valid(form)
+        return response
 
 
 class LocationCreateView(AdminRequiredMixin, CreateView):
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+
+from django.db.models import Count, F, Q, QuerySet, Window
+from django.db.models.functions import RowNumber
+
+from src.apps.counters.models import Counter
+
+from .models import Task
+
+BOARD_COLUMN_SIZE = 15
+BOARD_ORDERING = (F("rank").asc(), F("id").asc())
+
+
+def encode_cursor(task: Task) -> str:
+    return f"{task.rank!r}:{task.pk}"
+
+
+def decode_cursor(value: str) -> tuple[float, int]:
+    rank, pk = value.split(":")
+    return float(rank), int(pk)
+
+
+def after_cursor(cursor: tuple[float, int]) -> Q:
+    """Условие «строго после курсора» для порядка колонки (rank, id)."""
+    rank, pk = cursor
+    return Q(rank__gt=rank) | Q(rank=rank, id__gt=pk)
+
+
+def get_board_columns(tasks: QuerySet, *, per_column: int = BOARD_COLUMN_SIZE) -> OrderedDict:
+    """Первые ``per_column`` карточек каждого статуса одним запросом с ROW_NUMBER()."""
+    ranked = (
+        tasks.annotate(
+            board_position=Window(RowNumber(), partition_by=F("status"), order_by=BOARD_ORDERING)
+        )
+        .filter(board_position__lte=per_column + 1)
+        .order_by(*BOARD_ORDERING)
+    )
+
+    board_columns = OrderedDict(
+        (status_key, {"label": status_label, "items": [], "total": 0, "next_cursor": None})
+        for status_key, status_label in Task.Status.choices
+    )
+    for task in ranked:
+        column = board_columns.get(task.status)
+        if column is None:
+            continue
+        if len(column["items"]) < per_column:
+            column["items"].append(task)
+        else:
+            column["next_cursor"] = encode_cursor(column["items"][-1])
+    return board_columns
+
+
+def get_column_page(
+    tasks: QuerySet,
+    status: str,
+    *,
+    after: str | None = None,
+    limit: int = BOARD_COLUMN_SIZE,
+) -> tuple[list[Task], str | None]:
+    """Страница колонки по keyset-курсору; возвращает карточки и курсор следующей страницы."""
+    queryset = tasks.filter(status=status)
+    if after:
+        queryset = queryset.filter(after_cursor(decode_cursor(after)))
+    items = list(queryset.order_by(*BOARD_ORDERING)[: limit + 1])
+    if len(items) > limit:
+        items = items[:limit]
+        return items, encode_cursor(items[-1])
+    return items, None
+
+
+def get_board_totals(tasks: QuerySet | None = None) -> dict:
+    """Счётчики по статусам и приоритетам.
+
+    Без выборки читаются из таблицы счётчиков (O(числа корзин)); для отфильтрованной
+    выборки считаются одним GROUP BY.
+    """
+    status_totals: dict[str, int] = {}
+    priority_totals: dict[int, int] = {}
+    if tasks is None:
+        counters = Counter.objects.breakdowns(Counter.Dimension.TASK_STATUS, Counter.Dimension.TASK_PRIORITY)
+        status_totals = counters[Counter.Dimension.TASK_STATUS]
+        priority_totals = {int(value): total for value, total in counters[Counter.Dimension.TASK_PRIORITY].items()}
+    else:
+        rows = tasks.order_by().values("status", "priority").annotate(total=Count("id"))
+        for row in rows:
+            status_totals[row["status"]] = status_totals.get(row["status"], 0) + row["total"]
+            priority_totals[row["priority"]] = priority_totals.get(row["priority"], 0) + row["total"]
+
+    priority_breakdown = []
+    for priority, total in sorted(priority_totals.items(), key=lambda item: -item[1]):
+        try:
+            label = Task.Priority(priority).label
+        except ValueError:
+            label = priority
+        priority_breakdown.append({"priority": priority, "label": label, "total": total})
+
+    return {
+        "status_totals": status_totals,
+        "task_total": sum(status_totals.values()),
+        "tasks_completed": status_totals.get(Task.Status.DONE, 0),
+        "priority_breakdown": priority_breakdown,
+    }
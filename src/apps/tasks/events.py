@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from functools import lru_cache, partial
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection, connections, transaction
+from django.dispatch import receiver
+from django.template.loader import render_to_string
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = "src.apps.tasks.events.InProcessBackend"
+
+
+class Subscription:
+    def __init__(self, backend: InProcessBackend, maxsize: int) -> None:
+        self.backend = backend
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning("Board subscriber is too slow, event %s dropped", event.get("type"))
+
+    async def get(self, timeout: float | None = None) -> dict:
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self) -> None:
+        self.backend.unsubscribe(self)
+
+
+class InProcessBackend:
+    """Рассылка в пределах одного процесса; подходит для одного воркера."""
+
+    queue_size = 500
+
+    def __init__(self) -> None:
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event: dict) -> None:
+        self.dispatch(event)
+
+    def has_subscribers(self) -> bool:
+        with self._lock:
+            return bool(self._subscribers)
+
+    def dispatch(self, event: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                self.unsubscribe(subscription)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self, self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+
+class PostgresBackend(InProcessBackend):
+    """Рассылка между воркерами через PostgreSQL LISTEN/NOTIFY.
+
+    Каждый процесс держит одно соединение с LISTEN в фоновом потоке и раздаёт
+    полученные уведомления своим локальным подписчикам.
+    """
+
+    channel = "task_board_events"
+    max_payload = 7900
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._listener: threading.Thread | None = None
+
+    def publish(self, event: dict) -> None:
+        payload = json.dumps(event, ensure_ascii=False)
+        if len(payload.encode()) > self.max_payload:
+            payload = json.dumps({key: value for key, value in event.items() if key != "html"}, ensure_ascii=False)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+
+    def has_subscribers(self) -> bool:
+        # подписчики других воркеров отсюда не видны
+        return True
+
+    def subscribe(self) -> Subscription:
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name="board-events", daemon=True)
+                self._listener.start()
+        return super().subscribe()
+
+    def _listen(self) -> None:
+        import psycopg2
+
+        params = connections["default"].get_connection_params()
+        while True:
+            listener = None
+            try:
+                listener = psycopg2.connect(**params)
+                listener.autocommit = True
+                with listener.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                while True:
+                    if select.select([listener], [], [], 30) == ([], [], []):
+                        continue
+                    listener.poll()
+                    while listener.notifies:
+                        notify = listener.notifies.pop(0)
+                        self.dispatch(json.loads(notify.payload))
+            except Exception:  # pragma: no cover - reconnect loop
+                logger.exception("Board events listener failed, reconnecting")
+                time.sleep(3)
+            finally:
+                if listener is not None:
+                    listener.close()
+
+
+@lru_cache(maxsize=1)
+def get_backend() -> InProcessBackend:
+    backend_path = getattr(settings, "BOARD_EVENTS_BACKEND", DEFAULT_BACKEND)
+    return import_string(backend_path)()
+
+
+@receiver(setting_changed)
+def reset_backend(*, setting: str, **kwargs) -> None:
+    if setting == "BOARD_EVENTS_BACKEND":
+        get_backend.cache_clear()
+
+
+def publish_task_event(kind: str, task, *, previous_status: str | None = None) -> None:
+    """Отправляет событие по задаче подписчикам доски после фиксации транзакции.
+
+    Карточка общая для всех подписчиков, поэтому рендерится без элементов, зависящих от прав;
+    ссылку на редактирование доска добавляет сама. Без подписчиков карточка не рендерится.
+    """
+    backend = get_backend()
+    if not backend.has_subscribers():
+        return
+    event = {
+        "type": kind,
+        "task_id": task.pk,
+        "status": task.status,
+        "previous_status": previous_status,
+        "rank": task.rank,
+        "html": render_to_string("tasks/task_card.html", {"task": task, "can_create_task": False}),
+    }
+    transaction.on_commit(partial(backend.publish, event))
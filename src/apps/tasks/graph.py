@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from collections import defaultdict, deque
+from collections.abc import Iterable
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Q
+
+from .models import Project, Task, TaskDependency
+
+GRAPH_CACHE_TIMEOUT = 60 * 60
+
+
+class CycleError(ValueError):
+    def __init__(self, cycle: list[int]) -> None:
+        self.cycle = cycle
+        super().__init__(" → ".join(str(task_id) for task_id in cycle))
+
+
+class DependencyGraph:
+    """Граф зависимостей «блокирующая → зависимая» в памяти; все обходы O(V+E)."""
+
+    def __init__(self, edges: Iterable[tuple[int, int]] = ()) -> None:
+        self.edges: list[tuple[int, int]] = []
+        self.successors: dict[int, set[int]] = defaultdict(set)
+        self.predecessors: dict[int, set[int]] = defaultdict(set)
+        for blocking, blocked in edges:
+            self.add_edge(blocking, blocked)
+
+    def add_edge(self, blocking: int, blocked: int) -> None:
+        if blocked in self.successors[blocking]:
+            return
+        self.edges.append((blocking, blocked))
+        self.successors[blocking].add(blocked)
+        self.predecessors[blocked].add(blocking)
+
+    @property
+    def nodes(self) -> set[int]:
+        return set(self.successors) | set(self.predecessors)
+
+    def _reachable(self, start: int, adjacency: dict[int, set[int]]) -> set[int]:
+        seen: set[int] = set()
+        stack = list(adjacency.get(start, ()))
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            stack.extend(adjacency.get(node, ()))
+        return seen
+
+    def blocked_by(self, task_id: int) -> set[int]:
+        """Все задачи, которые транзитивно блокируют ``task_id``."""
+        return self._reachable(task_id, self.predecessors)
+
+    def blocks(self, task_id: int) -> set[int]:
+        """Все задачи, которые транзитивно ждут ``task_id``."""
+        return self._reachable(task_id, self.successors)
+
+    def topological_order(self) -> list[int]:
+        in_degree = {node: len(self.predecessors.get(node, ())) for node in self.nodes}
+        queue = deque(sorted(node for node, degree in in_degree.items() if degree == 0))
+        order = []
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for successor in sorted(self.successors.get(node, ())):
+                in_degree[successor] -= 1
+                if in_degree[successor] == 0:
+                    queue.append(successor)
+        if len(order) != len(in_degree):
+            raise CycleError(self.find_cycle() or [])
+        return order
+
+    def find_cycle(self) -> list[int] | None:
+        white, grey, black = 0, 1, 2
+        color = dict.fromkeys(self.nodes, white)
+        parent: dict[int, int] = {}
+        for root in sorted(color):
+            if color[root] != white:
+                continue
+            stack = [(root, iter(sorted(self.successors.get(root, ()))))]
+            color[root] = grey
+            while stack:
+                node, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    color[node] = black
+                    stack.pop()
+                elif color[child] == white:
+                    parent[child] = node
+                    color[child] = grey
+                    stack.append((child, iter(sorted(self.successors.get(child, ())))))
+                elif color[child] == grey:
+                    cycle = [child]
+                    while node != child:
+                        cycle.append(node)
+                        node = parent[node]
+                    cycle.append(child)
+                    return cycle[::-1]
+        return None
+
+    def critical_path(self, durations: dict[int, int]) -> tuple[int, list[int]]:
+        """Самая длинная по сумме длительностей цепочка зависимостей: (дни, задачи)."""
+        finish: dict[int, int] = {}
+        previous: dict[int, int | None] = {}
+        for node in self.topological_order():
+            best = max(self.predecessors.get(node, ()), key=lambda pred: finish[pred], default=None)
+            finish[node] = durations.get(node, 1) + (finish[best] if best is not None else 0)
+            previous[node] = best
+        if not finish:
+            return 0, []
+        node = max(finish, key=finish.get)
+        length = finish[node]
+        path = []
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        return length, path[::-1]
+
+
+def task_durations(task_ids: Iterable[int]) -> dict[int, int]:
+    """Длительность задач в днях по start_date/due_date; без дат задача занимает один день."""
+    durations = {}
+    for pk, start_date, due_date in Task.objects.filter(pk__in=list(task_ids)).values_list(
+        "pk", "start_date", "due_date"
+    ):
+        if start_date and due_date and due_date >= start_date:
+            durations[pk] = (due_date - start_date).days + 1
+        else:
+            durations[pk] = 1
+    return durations
+
+
+def dependency_overview(task: Task) -> dict:
+    """Зависимости задачи и критический путь её проекта для страницы задачи.
+
+    Граф берётся из кэша проекта; задачи для вывода читаются одним запросом и идут в топологическом порядке.
+    """
+    graph = get_project_graph(task.project_id)
+    if not graph.edges:
+        return {"blocked_by": [], "blocks": [], "critical_path": [], "critical_days": 0}
+    order = {pk: index for index, pk in enumerate(graph.topological_order())}
+    critical_days, path = graph.critical_path(task_durations(graph.nodes))
+    blocked_by, blocks = graph.blocked_by(task.pk), graph.blocks(task.pk)
+    tasks = Task.objects.in_bulk(blocked_by | blocks | set(path))
+
+    def ordered(ids: set[int]) -> list[Task]:
+        return [tasks[pk] for pk in sorted(ids, key=order.__getitem__) if pk in tasks]
+
+    return {
+        "blocked_by": ordered(blocked_by),
+        "blocks": ordered(blocks),
+        "critical_path": [tasks[pk] for pk in path if pk in tasks],
+        "critical_days": critical_days,
+    }
+
+
+def _graph_cache_key(project_id: int) -> str:
+    version = Project.objects.filter(pk=project_id).values_list("graph_version", flat=True).first()
+    return f"tasks:dependency-graph:{project_id}:{version}"
+
+
+def get_project_graph(project_id: int) -> DependencyGraph:
+    """Граф проекта: рёбра, у которых хотя бы одна задача из проекта.
+
+    Версия графа хранится в проекте, поэтому изменение зависимостей видно всем процессам сразу,
+    даже если у каждого свой локальный кэш.
+    """
+    key = _graph_cache_key(project_id)
+    edges = cache.get(key)
+    if edges is None:
+        edges = list(
+            TaskDependency.objects.filter(Q(blocking__project_id=project_id) | Q(blocked__project_id=project_id))
+            .order_by("pk")
+            .values_list("blocking_id", "blocked_id")
+        )
+        cache.set(key, edges, GRAPH_CACHE_TIMEOUT)
+    return DependencyGraph(edges)
+
+
+def path_exists(source: int, target: int, *, exclude_pk: int | None = None) -> bool:
+    """Есть ли цепочка зависимостей ``source`` → … → ``target`` по всем проектам.
+
+    Рекурсивный CTE по таблице зависимостей, без кэша: проверка цикла не должна зависеть от
+    свежести графа в памяти процесса. ``exclude_pk`` — редактируемая зависимость, её старое ребро не учитывается.
+    """
+    table = connection.ops.quote_name(TaskDependency._meta.db_table)
+    exclude_pk = exclude_pk or 0
+    sql = f"""
+        WITH RECURSIVE reachable(task_id) AS (
+            SELECT blocked_id FROM {table} WHERE blocking_id = %s AND id <> %s
+            UNION
+            SELECT dependency.blocked_id FROM {table} dependency
+            JOIN reachable ON dependency.blocking_id = reachable.task_id
+            WHERE dependency.id <> %s
+        )
+        SELECT 1 FROM reachable WHERE task_id = %s LIMIT 1
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [source, exclude_pk, exclude_pk, target])
+        return cursor.fetchone() is not None
+
+
+def invalidate_graphs(*task_ids: int) -> None:
+    """Сдвигает версию графа у проектов задач; старые записи кэша просто перестают читаться."""
+    projects = Task.objects.filter(pk__in=task_ids).values("project_id")
+    Project.objects.filter(pk__in=projects).update(graph_version=F("graph_version") + 1)
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from src.apps.tasks.models import Task
+
+REBALANCE_GAP = 1e-3
+
+
+class Command(BaseCommand):
+    help = "Renumber board ranks in columns where fractional ranks have become too dense"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--status", choices=Task.Status.values, help="Only rebalance this column")
+        parser.add_argument("--force", action="store_true", help="Rebalance even if ranks are still sparse")
+
+    def handle(self, *args, **options):
+        statuses = [options["status"]] if options["status"] else Task.Status.values
+        for status in statuses:
+            gap = self._smallest_gap(status)
+            if not options["force"] and (gap is None or gap >= REBALANCE_GAP):
+                continue
+            total = Task.objects.rebalance_ranks(status)
+            self.stdout.write(f"{status}: {total} tasks renumbered")
+        self.stdout.write(self.style.SUCCESS("Ranks are balanced."))
+
+    def _smallest_gap(self, status: str) -> float | None:
+        smallest = None
+        previous = None
+        ranks = Task.objects.filter(status=status).order_by("rank", "id").values_list("rank", flat=True)
+        for rank in ranks.iterator(chunk_size=2000):
+            if previous is not None:
+                gap = rank - previous
+                smallest = gap if smallest is None else min(smallest, gap)
+            previous = rank
+        return smallest
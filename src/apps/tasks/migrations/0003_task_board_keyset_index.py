@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ("tasks", "0002_remove_task_tags_and_metrics"),
+    )
+
+    operations = (
+        migrations.RemoveIndex(
+            model_name="task",
+            name="tasks_task_status_01b536_idx",
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["status", "priority", "due_date", "id"], name="tasks_task_status_bd2632_idx"),
+        ),
+    )
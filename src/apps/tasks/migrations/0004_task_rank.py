@@ -0,0 +1,41 @@
+from django.db import migrations, models
+from django.db.models import F
+
+RANK_STEP = 1024.0
+
+
+def fill_ranks(apps, schema_editor):
+    Task = apps.get_model("tasks", "Task")
+    for status in Task.objects.values_list("status", flat=True).distinct():
+        tasks = list(
+            Task.objects.filter(status=status)
+            .order_by("priority", F("due_date").asc(nulls_last=True), "id")
+            .only("pk")
+        )
+        for position, task in enumerate(tasks, start=1):
+            task.rank = position * RANK_STEP
+        Task.objects.bulk_update(tasks, ["rank"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ("tasks", "0003_task_board_keyset_index"),
+    )
+
+    operations = (
+        migrations.RemoveIndex(
+            model_name="task",
+            name="tasks_task_status_bd2632_idx",
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="rank",
+            field=models.FloatField(default=0, verbose_name="Порядок на доске"),
+        ),
+        migrations.RunPython(fill_ranks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["status", "rank", "id"], name="tasks_task_status_44437e_idx"),
+        ),
+    )
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ("tasks", "0004_task_rank"),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name="project",
+            name="graph_version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    )
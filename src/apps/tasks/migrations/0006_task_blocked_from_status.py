@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ("tasks", "0005_project_graph_version"),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name="task",
+            name="blocked_from_status",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("backlog", "Бэклог"),
+                    ("todo", "К выполнению"),
+                    ("in_progress", "В работе"),
+                    ("review", "На проверке"),
+                    ("blocked", "Заблокировано"),
+                    ("done", "Завершено"),
+                ],
+                default="",
+                editable=False,
+                max_length=20,
+                verbose_name="Статус до блокировки",
+            ),
+            preserve_default=False,
+        ),
+    )
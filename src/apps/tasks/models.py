@@ -1,10 +1,18 @@
 from __future__ import annotations
 
 from django.conf import settings
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Exists, Max, OuterRef, Q
+from django.db.models.expressions import RawSQL
 from django.utils import timezone
 from django.utils.text import slugify
 
+from src.apps.counters.models import CountedModel, Counter
+
+from .events import publish_task_event
+from .ranking import RANK_STEP, rank_between
+
 User = settings.AUTH_USER_MODEL
 
 
@@ -24,6 +32,8 @@ class Project(models.Model):
     is_active = models.BooleanField("Активен", default=True)
     start_date = models.DateField("Старт", null=True, blank=True)
     due_date = models.DateField("Дедлайн", null=True, blank=True)
+    # растёт при каждом изменении зависимостей проекта; входит в ключ кэша графа, общий для всех процессов
+    graph_version = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -41,7 +51,270 @@ class Project(models.Model):
         super().save(*args, **kwargs)
 
 
-class Task(models.Model):
+class TaskQuerySet(models.QuerySet):
+    def editable_by(self, user) -> TaskQuerySet:
+        """Задачи, статус которых пользователь может менять, — одним запросом без DISTINCT."""
+        if getattr(user, "is_admin_role", False):
+            return self
+        is_member = Project.members.through.objects.filter(project_id=OuterRef("project_id"), user_id=user.pk)
+        is_watcher = Task.watchers.through.objects.filter(task_id=OuterRef("pk"), user_id=user.pk)
+        return self.filter(Exists(is_member) | Q(assignee=user) | Q(created_by=user) | Exists(is_watcher))
+
+    def next_rank(self, status: str) -> float:
+        top = self.model.objects.filter(status=status).aggregate(top=Max("rank"))["top"]
+        return rank_between(top, None) if top is not None else RANK_STEP
+
+    def rebalance_ranks(self, status: str) -> int:
+        """Перенумеровывает колонку с шагом RANK_STEP, сохраняя текущий порядок карточек."""
+        with transaction.atomic():
+            tasks = list(
+                self.model.objects.select_for_update()
+                .filter(status=status)
+                .order_by("rank", "id")
+                .only("pk", "rank")
+            )
+            for position, task in enumerate(tasks, start=1):
+                task.rank = position * RANK_STEP
+            self.model.objects.bulk_update(tasks, ["rank"], batch_size=1000)
+        return len(tasks)
+
+    def apply_moves(self, moves: list[dict], *, user: User | None = None) -> list[Task]:
+        """Переносит и переупорядочивает задачи.
+
+        Каждый ход — ``{"task_id", "status"}`` и необязательные соседи ``after_id``/``before_id``
+        в целевой колонке. Меняются только строки перемещённых задач: один UPDATE на пакет,
+        активность пишется через bulk_create.
+        """
+        now = timezone.now()
+        task_ids = {move["task_id"] for move in moves}
+        neighbour_ids = {move.get(key) for move in moves for key in ("after_id", "before_id")} - {None}
+        changed: dict[int, Task] = {}
+        moved_ids: set[int] = set()
+        crowded: list[tuple[Task, dict]] = []
+
+        with transaction.atomic():
+            tasks = {
+                task.pk: task
+                for task in self.select_for_update(of=("self",))
+                .select_related("project", "assignee")
+                .filter(pk__in=task_ids)
+            }
+            previous_statuses = {pk: task.status for pk, task in tasks.items()}
+            neighbours = {
+                pk: (status, rank)
+                for pk, status, rank in self.model.objects.filter(pk__in=neighbour_ids - set(tasks)).values_list(
+                    "pk", "status", "rank"
+                )
+            }
+            tails: dict[str, float] = {}
+
+            def neighbour_rank(pk: int | None, status: str) -> float | None:
+                if pk in tasks:
+                    neighbour_status, rank = tasks[pk].status, tasks[pk].rank
+                elif pk in neighbours:
+                    neighbour_status, rank = neighbours[pk]
+                else:
+                    return None
+                return rank if neighbour_status == status else None
+
+            for move in moves:
+                task = tasks.get(move["task_id"])
+                if task is None:
+                    continue
+                status = move["status"]
+                status_changed = task.status != status
+                lower = neighbour_rank(move.get("after_id"), status)
+                upper = neighbour_rank(move.get("before_id"), status)
+                if lower is None and upper is None:
+                    if not status_changed:
+                        continue
+                    if status in tails:
+                        tails[status] += RANK_STEP
+                    else:
+                        tails[status] = self.model.objects.next_rank(status)
+                    task.rank = tails[status]
+                else:
+                    rank = rank_between(lower, upper)
+                    if rank is None:
+                        crowded.append((task, move))
+                    else:
+                        task.rank = rank
+                        if status in tails:
+                            tails[status] = max(tails[status], rank)
+                if status_changed:
+                    task.status = status
+                    task.blocked_from_status = ""
+                    if status == Task.Status.DONE and not task.completed_at:
+                        task.completed_at = now
+                    moved_ids.add(task.pk)
+                task.updated_at = now
+                changed[task.pk] = task
+
+            if changed:
+                self.model.objects.bulk_update(
+                    changed.values(), ["status", "blocked_from_status", "rank", "completed_at", "updated_at"]
+                )
+                _record_status_transitions((previous_statuses[pk], changed[pk].status) for pk in moved_ids)
+                TaskActivity.objects.bulk_create(
+                    TaskActivity(
+                        task=task,
+                        author=user,
+                        action=TaskActivity.Action.STATUS,
+                        payload={"status": task.status},
+                    )
+                    for task in changed.values()
+                    if task.pk in moved_ids
+                )
+
+            for task, move in crowded:
+                self._place_after_rebalance(task, move)
+            for task in changed.values():
+                publish_task_event("status", task, previous_status=previous_statuses[task.pk])
+            self.model.objects.propagate_blocking(
+                **_done_transitions({pk: (previous_statuses[pk], changed[pk].status) for pk in moved_ids}),
+                user=user,
+            )
+        return list(changed.values())
+
+    def propagate_blocking(
+        self,
+        *,
+        finished: set[int] = frozenset(),
+        reopened: set[int] = frozenset(),
+        user: User | None = None,
+    ) -> list[Task]:
+        """Ставит или снимает BLOCKED у зависимых задач, когда блокирующие завершены или переоткрыты.
+
+        Переоткрытие блокирует всех транзитивно зависимых — они находятся одним рекурсивным CTE;
+        прежний статус запоминается в ``blocked_from_status``. Завершение проходит тот же CTE и разблокирует
+        автоматически заблокированных зависимых без оставшихся открытых блокеров: они возвращаются в
+        запомненный статус. Вручную заблокированные задачи не трогаются. Статусы меняются одним UPDATE,
+        активность — bulk_create.
+        """
+        if not finished and not reopened:
+            return []
+        changed: list[Task] = []
+        with transaction.atomic():
+            locked = self.model.objects.select_for_update(of=("self",)).select_related("project", "assignee")
+            if reopened:
+                to_block = locked.filter(pk__in=_dependents_cte(reopened)).exclude(
+                    Q(pk__in=reopened) | Q(status__in=(Task.Status.DONE, Task.Status.BLOCKED))
+                )
+                changed += self._move_to_column(list(to_block.order_by("rank", "id")), Task.Status.BLOCKED)
+            if finished:
+                by_status: dict[str, list[Task]] = {}
+                for task in self._unblockable(locked, finished):
+                    by_status.setdefault(task.blocked_from_status, []).append(task)
+                for status, tasks in by_status.items():
+                    changed += self._move_to_column(tasks, status)
+            if changed:
+                self.model.objects.bulk_update(changed, ["status", "blocked_from_status", "rank", "updated_at"])
+                _record_status_transitions((task.previous_status, task.status) for task in changed)
+                TaskActivity.objects.bulk_create(
+                    TaskActivity(
+                        task=task,
+                        author=user,
+                        action=TaskActivity.Action.STATUS,
+                        payload={"status": task.status, "dependencies": True},
+                    )
+                    for task in changed
+                )
+                for task in changed:
+                    publish_task_event("status", task, previous_status=task.previous_status)
+        return changed
+
+    def _unblockable(self, locked: TaskQuerySet, finished: set[int]) -> list[Task]:
+        """Автоматически заблокированные транзитивно зависимые, у которых не осталось открытых блокеров.
+
+        Кандидаты находятся тем же рекурсивным CTE, что и при блокировке. Открытый блокер — незавершённая
+        задача вне кандидатов; задержанный кандидат держит и всех кандидатов ниже себя по цепочке.
+        """
+        candidates = {
+            task.pk: task
+            for task in locked.filter(status=Task.Status.BLOCKED, pk__in=_dependents_cte(finished))
+            .exclude(blocked_from_status="")
+            .order_by("rank", "id")
+        }
+        if not candidates:
+            return []
+        edges = TaskDependency.objects.filter(blocked_id__in=candidates).values_list(
+            "blocking_id", "blocked_id", "blocking__status"
+        )
+        held, successors = set(), {}
+        for blocking, blocked, status in edges:
+            if blocking in candidates:
+                successors.setdefault(blocking, []).append(blocked)
+            elif status != Task.Status.DONE:
+                held.add(blocked)
+        pending = list(held)
+        while pending:
+            for blocked in successors.get(pending.pop(), ()):
+                if blocked not in held:
+                    held.add(blocked)
+                    pending.append(blocked)
+        return [task for pk, task in candidates.items() if pk not in held]
+
+    def _move_to_column(self, tasks: list[Task], status: str) -> list[Task]:
+        if not tasks:
+            return []
+        now = timezone.now()
+        rank = self.model.objects.next_rank(status)
+        for task in tasks:
+            task.previous_status = task.status
+            task.blocked_from_status = task.status if status == Task.Status.BLOCKED else ""
+            task.status = status
+            task.rank = rank
+            task.updated_at = now
+            rank += RANK_STEP
+        return tasks
+
+    def _place_after_rebalance(self, task: Task, move: dict) -> None:
+        self.rebalance_ranks(task.status)
+        neighbours = dict(
+            self.model.objects.filter(
+                pk__in=[move.get("after_id"), move.get("before_id")],
+                status=task.status,
+            ).values_list("pk", "rank")
+        )
+        lower, upper = neighbours.get(move.get("after_id")), neighbours.get(move.get("before_id"))
+        rank = rank_between(lower, upper) if lower is not None or upper is not None else None
+        task.rank = rank if rank is not None else self.model.objects.next_rank(task.status)
+        self.model.objects.filter(pk=task.pk).update(rank=task.rank)
+
+
+def _dependents_cte(task_ids: set[int]) -> RawSQL:
+    """Подзапрос с id всех задач, транзитивно зависящих от ``task_ids``."""
+    table = TaskDependency._meta.db_table
+    blocking = TaskDependency._meta.get_field("blocking").column
+    blocked = TaskDependency._meta.get_field("blocked").column
+    placeholders = ", ".join(["%s"] * len(task_ids))
+    sql = (
+        f"WITH RECURSIVE dependents(id) AS ("
+        f"SELECT {blocked} FROM {table} WHERE {blocking} IN ({placeholders}) "
+        f"UNION SELECT d.{blocked} FROM {table} d JOIN dependents ON d.{blocking} = dependents.id"
+        f") SELECT id FROM dependents"
+    )
+    return RawSQL(sql, sorted(task_ids))
+
+
+def _record_status_transitions(transitions) -> None:
+    """Переносит массовые смены статуса (bulk_update минует save()) в счётчики."""
+    totals: dict[tuple[str, str], int] = {}
+    for transition in transitions:
+        totals[transition] = totals.get(transition, 0) + 1
+    Counter.objects.record_transitions(Counter.Dimension.TASK_STATUS, totals)
+
+
+def _done_transitions(statuses: dict[int, tuple[str, str]]) -> dict[str, set[int]]:
+    """Разбирает переходы ``{pk: (было, стало)}`` на завершённые и переоткрытые задачи."""
+    done = Task.Status.DONE
+    return {
+        "finished": {pk for pk, (before, after) in statuses.items() if before != done and after == done},
+        "reopened": {pk for pk, (before, after) in statuses.items() if before == done and after != done},
+    }
+
+
+class Task(CountedModel):
     class Status(models.TextChoices):
         BACKLOG = "backlog", "Бэклог"
         TODO = "todo", "К выполнению"
@@ -65,6 +338,10 @@ class Task(models.Model):
     title = models.CharField("Название", max_length=200)
     description = models.TextField("Описание", blank=True)
     status = models.CharField("Статус", max_length=20, choices=Status.choices, default=Status.BACKLOG)
+    # пусто, если задача не заблокирована автоматически; иначе статус, в который она вернётся
+    blocked_from_status = models.CharField(
+        "Статус до блокировки", max_length=20, choices=Status.choices, blank=True, editable=False
+    )
     priority = models.PositiveSmallIntegerField(
         "Приоритет", choices=Priority.choices, default=Priority.NORMAL
     )
@@ -89,30 +366,44 @@ class Task(models.Model):
     start_date = models.DateField("Старт", null=True, blank=True)
     due_date = models.DateField("Дедлайн", null=True, blank=True)
     completed_at = models.DateTimeField("Завершено", null=True, blank=True)
+    rank = models.FloatField("Порядок на доске", default=0)
     is_archived = models.BooleanField("Архив", default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TaskQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Задача"
         verbose_name_plural = "Задачи"
         ordering = ("-created_at",)
-        indexes = [models.Index(fields=("status", "priority"))]
+        indexes = (models.Index(fields=("status", "rank", "id")),)
 
     def __str__(self) -> str:
         return self.title
 
+    def save(self, *args, **kwargs) -> None:
+        if self._state.adding and not self.rank:
+            self.rank = Task.objects.next_rank(self.status)
+        super().save(*args, **kwargs)
+
     def set_status(self, status: str, *, user: User | None = None) -> None:
+        previous_status = self.status
+        if status != previous_status:
+            self.rank = Task.objects.next_rank(status)
+            self.blocked_from_status = ""
         self.status = status
         if status == self.Status.DONE and not self.completed_at:
             self.completed_at = timezone.now()
-        self.save()
+        self.save(update_fields=["status", "blocked_from_status", "rank", "completed_at", "updated_at"])
         TaskActivity.objects.create(
             task=self,
             author=user,
             action=TaskActivity.Action.STATUS,
             payload={"status": status},
         )
+        publish_task_event("status", self, previous_status=previous_status)
+        Task.objects.propagate_blocking(**_done_transitions({self.pk: (previous_status, status)}), user=user)
 
 class TaskAssignment(models.Model):
     task = models.ForeignKey(Task, verbose_name="Задача", related_name="assignments", on_delete=models.CASCADE)
@@ -220,6 +511,16 @@ class TaskDependency(models.Model):
     def __str__(self) -> str:
         return f"{self.blocking} → {self.blocked}"
 
+    def clean(self) -> None:
+        from .graph import path_exists
+
+        if not (self.blocking_id and self.blocked_id):
+            return
+        if self.blocking_id == self.blocked_id:
+            raise ValidationError("Задача не может блокировать саму себя")
+        if path_exists(self.blocked_id, self.blocking_id, exclude_pk=self.pk):
+            raise ValidationError("Зависимость создаёт цикл: задача уже транзитивно зависит от зависимой")
+
 
 class TaskActivity(models.Model):
     class Action(models.TextChoices):
@@ -250,9 +551,9 @@ class TaskActivity(models.Model):
         return f"{self.get_action_display()} для {self.task}"
 
 
-# signals to log comments & attachments as activity
-from django.db.models.signals import post_save  # noqa  E402  pylint: disable=wrong-import-position
-from django.dispatch import receiver  # noqa  E402  pylint: disable=wrong-import-position
+# signals to log comments & attachments as activity and to keep the dependency graph cache and counters fresh
+from django.db.models.signals import post_delete, post_save, pre_delete  # pylint: disable=wrong-import-position
+from django.dispatch import receiver  # pylint: disable=wrong-import-position
 
 
 @receiver(post_save, sender=TaskComment)
@@ -275,3 +576,17 @@ def log_attachment_activity(sender, instance: TaskAttachment, created: bool, **k
             action=TaskActivity.Action.ATTACHMENT,
             payload={"attachment": instance.pk},
         )
+
+
+@receiver(post_delete, sender=Task)
+def decrement_task_counters(sender, instance: Task, **kwargs) -> None:
+    Counter.objects.record_delete(instance)
+
+
+@receiver(post_save, sender=TaskDependency)
+@receiver(pre_delete, sender=TaskDependency)
+def invalidate_dependency_graph(sender, instance: TaskDependency, **kwargs) -> None:
+    # pre_delete: при каскадном удалении задачи её проект ещё можно найти
+    from .graph import invalidate_graphs
+
+    invalidate_graphs(instance.blocking_id, instance.blocked_id)
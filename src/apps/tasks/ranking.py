@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+RANK_STEP = 1024.0
+MIN_RANK_GAP = 1e-6
+
+
+def rank_between(lower: float | None, upper: float | None) -> float | None:
+    """Ранг между соседними карточками или ``None``, если места между ними не осталось."""
+    if lower is None and upper is None:
+        return RANK_STEP
+    if lower is None:
+        return upper - RANK_STEP
+    if upper is None:
+        return lower + RANK_STEP
+    if upper - lower < MIN_RANK_GAP * 2:
+        return None
+    return (lower + upper) / 2
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Project, Task
+
+STATS_CACHE_KEY = "tasks:stats"
+STATS_CACHE_TIMEOUT = 60
+
+
+def get_task_stats() -> dict:
+    """Счётчики задач и проектов для главной; кэш с коротким TTL, без явной инвалидации."""
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        stats = Task.objects.aggregate(task_count=Count("id", filter=Q(is_archived=False)))
+        stats.update(Project.objects.aggregate(project_total=Count("id", filter=Q(is_active=True))))
+        cache.set(STATS_CACHE_KEY, stats, STATS_CACHE_TIMEOUT)
+    return stats
@@ -1,10 +1,28 @@
+import asyncio
 import json
+import re
+from datetime import timedelta
+from io import StringIO
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
-from .models import Project, Task, TaskActivity, TaskComment
+from src.apps.counters.models import Counter
+
+from .board import (
+    BOARD_COLUMN_SIZE,
+    BOARD_ORDERING,
+    get_board_columns,
+    get_board_totals,
+)
+from .events import InProcessBackend, get_backend, publish_task_event
+from .graph import CycleError, DependencyGraph, get_project_graph, task_durations
+from .models import Project, Task, TaskActivity, TaskComment, TaskDependency
+from .ranking import RANK_STEP
 
 
 class TaskBoardViewTests(TestCase):
@@ -46,6 +64,64 @@ class TaskBoardViewTests(TestCase):
         self.assertIn("in_progress", board_columns)
         self.assertIn(self.task, list(board_columns["in_progress"]["items"]))
 
+    def test_board_column_total_is_not_capped(self):
+        Task.objects.bulk_create(
+            Task(project=self.project, title=f"Бэклог {index}", created_by=self.user, status=Task.Status.BACKLOG)
+            for index in range(BOARD_COLUMN_SIZE + 5)
+        )
+        call_command("recount", stdout=StringIO())
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("tasks:board"))
+        backlog = response.context["board_columns"]["backlog"]
+        self.assertEqual(len(backlog["items"]), BOARD_COLUMN_SIZE)
+        self.assertEqual(backlog["total"], BOARD_COLUMN_SIZE + 5)
+        self.assertEqual(response.context["task_total"], BOARD_COLUMN_SIZE + 7)
+
+    def test_board_columns_load_in_single_query(self):
+        with self.assertNumQueries(1):
+            board_columns = get_board_columns(Task.objects.select_related("project", "assignee"))
+            # карточке нужны только проект и исполнитель — они приходят тем же запросом
+            cards = [(task.project.name, task.assignee) for task in board_columns["in_progress"]["items"]]
+        self.assertEqual(cards, [(self.project.name, self.user)])
+        self.assertEqual([task.pk for task in board_columns["todo"]["items"]], [self.todo_task.pk])
+
+    def test_board_column_endpoint_pages_with_cursor(self):
+        today = timezone.now().date()
+        Task.objects.bulk_create(
+            Task(
+                project=self.project,
+                title=f"Бэклог {index}",
+                status=Task.Status.BACKLOG,
+                priority=Task.Priority.LOW if index % 2 else Task.Priority.NORMAL,
+                due_date=None if index % 3 == 0 else today + timedelta(days=index % 4),
+            )
+            for index in range(40)
+        )
+        expected = list(
+            Task.objects.filter(status=Task.Status.BACKLOG)
+            .order_by(*BOARD_ORDERING)
+            .values_list("pk", flat=True)
+        )
+
+        self.client.force_login(self.user)
+        board = self.client.get(reverse("tasks:board")).context["board_columns"]
+        loaded = [task.pk for task in board["backlog"]["items"]]
+        cursor = board["backlog"]["next_cursor"]
+        while cursor:
+            response = self.client.get(reverse("tasks:board_column", args=["backlog"]), {"after": cursor})
+            self.assertEqual(response.status_code, 200)
+            payload = response.json()
+            loaded.extend(int(pk) for pk in re.findall(r'data-task-id="(\d+)"', payload["html"]))
+            cursor = payload["next_cursor"]
+        self.assertEqual(loaded, expected)
+
+    def test_board_column_endpoint_rejects_bad_input(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("tasks:board_column", args=["unknown"]))
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse("tasks:board_column", args=["backlog"]), {"after": "broken"})
+        self.assertEqual(response.status_code, 400)
+
     def test_recent_activity_and_comments(self):
         self.client.force_login(self.user)
         response = self.client.get(reverse("tasks:board"))
@@ -116,3 +192,328 @@ class TaskBoardViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.task.refresh_from_db()
         self.assertEqual(self.task.status, Task.Status.REVIEW)
+
+    def test_bulk_status_update_moves_tasks_in_one_batch(self):
+        payload = {
+            "moves": [
+                {"task_id": self.task.pk, "status": Task.Status.DONE},
+                {"task_id": self.todo_task.pk, "status": Task.Status.IN_PROGRESS},
+            ]
+        }
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("tasks:task_status_bulk_update"),
+            data=json.dumps(payload),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["updated"]), 2)
+        self.task.refresh_from_db()
+        self.todo_task.refresh_from_db()
+        self.assertEqual(self.task.status, Task.Status.DONE)
+        self.assertIsNotNone(self.task.completed_at)
+        self.assertEqual(self.todo_task.status, Task.Status.IN_PROGRESS)
+        self.assertEqual(
+            TaskActivity.objects.filter(action=TaskActivity.Action.STATUS, author=self.user).count(),
+            3,
+        )
+
+    def test_bulk_status_update_rejects_foreign_tasks(self):
+        outsider = get_user_model().objects.create_user(
+            username="outsider",
+            email="outsider@example.com",
+            password="task-pass",
+        )
+        payload = {"moves": [{"task_id": self.task.pk, "status": Task.Status.DONE}]}
+        self.client.force_login(outsider)
+        response = self.client.post(
+            reverse("tasks:task_status_bulk_update"),
+            data=json.dumps(payload),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["task_ids"], [self.task.pk])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, Task.Status.IN_PROGRESS)
+
+    def test_reorder_between_cards_updates_only_moved_task(self):
+        first = Task.objects.create(project=self.project, title="Первая", created_by=self.user, status=Task.Status.TODO)
+        second = Task.objects.create(project=self.project, title="Вторая", created_by=self.user, status=Task.Status.TODO)
+        ranks_before = dict(Task.objects.values_list("pk", "rank"))
+        self.assertLess(self.todo_task.rank, first.rank)
+
+        payload = {
+            "moves": [
+                {"task_id": second.pk, "status": Task.Status.TODO, "after_id": self.todo_task.pk, "before_id": first.pk},
+                {"task_id": self.task.pk, "status": Task.Status.TODO, "after_id": None, "before_id": self.todo_task.pk},
+            ]
+        }
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("tasks:task_status_bulk_update"),
+            data=json.dumps(payload),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        ranks_after = dict(Task.objects.values_list("pk", "rank"))
+        self.assertEqual(
+            {pk for pk in ranks_before if ranks_before[pk] != ranks_after[pk]},
+            {second.pk, self.task.pk},
+        )
+        column = get_board_columns(Task.objects.all())["todo"]["items"]
+        self.assertEqual([task.pk for task in column], [self.task.pk, self.todo_task.pk, second.pk, first.pk])
+
+    def test_rebalance_command_keeps_order(self):
+        dense = [
+            Task.objects.create(project=self.project, title=f"Плотная {index}", status=Task.Status.REVIEW, rank=1 + index * 1e-7)
+            for index in range(3)
+        ]
+        call_command("rebalance_task_ranks", stdout=StringIO())
+        ranks = list(Task.objects.filter(status=Task.Status.REVIEW).order_by("rank").values_list("pk", "rank"))
+        self.assertEqual([pk for pk, _ in ranks], [task.pk for task in dense])
+        self.assertEqual([rank for _, rank in ranks], [RANK_STEP, RANK_STEP * 2, RANK_STEP * 3])
+
+
+class RecordingBackend(InProcessBackend):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def publish(self, event):
+        self.events.append(event)
+        super().publish(event)
+
+    def has_subscribers(self):
+        return True
+
+
+@override_settings(BOARD_EVENTS_BACKEND="src.apps.tasks.tests.RecordingBackend")
+class TaskBoardEventsTests(TestCase):
+    def setUp(self):
+        get_backend.cache_clear()
+        self.user = get_user_model().objects.create_user(
+            username="watcher",
+            email="watcher@example.com",
+            password="task-pass",
+        )
+        self.project = Project.objects.create(name="События", code="events", owner=self.user)
+        self.task = Task.objects.create(project=self.project, title="Живая задача", created_by=self.user)
+
+    def test_set_status_publishes_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.task.set_status(Task.Status.REVIEW, user=self.user)
+        self.assertEqual(get_backend().events, [])
+        for callback in callbacks:
+            callback()
+        event = get_backend().events[0]
+        self.assertEqual(event["type"], "status")
+        self.assertEqual(event["previous_status"], Task.Status.BACKLOG)
+        self.assertIn(f'data-task-id="{self.task.pk}"', event["html"])
+        self.assertNotIn("Изменить", event["html"])
+
+    def test_status_and_assignee_change_publish_both_events(self):
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("tasks:task_update", args=[self.task.pk]),
+                {
+                    "project": self.project.pk,
+                    "title": self.task.title,
+                    "status": Task.Status.REVIEW,
+                    "priority": self.task.priority,
+                    "assignee": self.user.pk,
+                },
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual([event["type"] for event in get_backend().events], ["status", "assignee"])
+
+    @override_settings(BOARD_EVENTS_BACKEND="src.apps.tasks.events.InProcessBackend")
+    def test_nothing_is_published_without_subscribers(self):
+        get_backend.cache_clear()
+        with self.captureOnCommitCallbacks() as callbacks:
+            publish_task_event("status", self.task)
+        self.assertEqual(callbacks, [])
+
+    async def test_in_process_backend_fans_out_to_subscribers(self):
+        backend = InProcessBackend()
+        first, second = backend.subscribe(), backend.subscribe()
+        await asyncio.to_thread(backend.publish, {"type": "created", "task_id": 1})
+        self.assertEqual((await first.get(timeout=1))["task_id"], 1)
+        self.assertEqual((await second.get(timeout=1))["task_id"], 1)
+        first.close()
+        second.close()
+
+    async def test_event_stream_delivers_published_events(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("tasks:board_events"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b"retry: 3000\n\n")
+        get_backend().publish({"type": "assignee", "task_id": self.task.pk})
+        chunk = await anext(stream)
+        self.assertTrue(chunk.startswith(b"event: assignee\ndata: "))
+        await stream.aclose()
+
+
+class DependencyGraphTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(name="Граф", code="graph")
+        today = timezone.now().date()
+        self.design, self.build, self.test, self.docs = (
+            Task.objects.create(project=self.project, title=title, start_date=today, due_date=today + timedelta(days=days))
+            for title, days in (("Проект", 2), ("Сборка", 4), ("Тесты", 1), ("Документация", 0))
+        )
+        for blocking, blocked in ((self.design, self.build), (self.build, self.test), (self.design, self.docs)):
+            TaskDependency.objects.create(blocking=blocking, blocked=blocked)
+
+    def test_graph_answers_order_and_transitive_questions(self):
+        graph = get_project_graph(self.project.pk)
+        order = graph.topological_order()
+        self.assertLess(order.index(self.design.pk), order.index(self.build.pk))
+        self.assertLess(order.index(self.build.pk), order.index(self.test.pk))
+        self.assertEqual(graph.blocked_by(self.test.pk), {self.design.pk, self.build.pk})
+        length, path = graph.critical_path(task_durations(graph.nodes))
+        self.assertEqual(length, 3 + 5 + 2)
+        self.assertEqual(path, [self.design.pk, self.build.pk, self.test.pk])
+
+    def test_task_page_shows_dependencies_and_critical_path(self):
+        self.client.force_login(get_user_model().objects.create_user(username="planner", password="pass"))
+        response = self.client.get(reverse("tasks:task_update", args=[self.build.pk]))
+        dependencies = response.context["dependencies"]
+        self.assertEqual(dependencies["blocked_by"], [self.design])
+        self.assertEqual(dependencies["blocks"], [self.test])
+        self.assertEqual(dependencies["critical_path"], [self.design, self.build, self.test])
+        self.assertEqual(dependencies["critical_days"], 10)
+        self.assertContains(response, "Критический путь проекта: 10 дн.")
+
+    def test_cycle_is_rejected_on_validation(self):
+        dependency = TaskDependency(blocking=self.test, blocked=self.design)
+        with self.assertRaises(ValidationError):
+            dependency.full_clean()
+        with self.assertRaises(CycleError):
+            DependencyGraph([(1, 2), (2, 3), (3, 1)]).topological_order()
+
+    def test_cycle_through_another_project_is_rejected(self):
+        other = Project.objects.create(name="Соседний", code="other")
+        bridge = Task.objects.create(project=other, title="Мост")
+        TaskDependency.objects.create(blocking=self.test, blocked=bridge)
+        with self.assertRaises(ValidationError):
+            TaskDependency(blocking=bridge, blocked=self.design).full_clean()
+        # изменение существующего ребра не считается циклом с самим собой
+        edge = TaskDependency.objects.get(blocking=self.test, blocked=bridge)
+        edge.blocked = self.docs
+        edge.full_clean()
+
+    def test_graph_cache_is_invalidated_on_change(self):
+        get_project_graph(self.project.pk)
+        # только версия графа из проекта
+        with self.assertNumQueries(1):
+            get_project_graph(self.project.pk)
+        TaskDependency.objects.create(blocking=self.docs, blocked=self.test)
+        self.assertEqual(get_project_graph(self.project.pk).blocked_by(self.test.pk), {self.design.pk, self.build.pk, self.docs.pk})
+        self.docs.delete()
+        self.assertEqual(get_project_graph(self.project.pk).blocked_by(self.test.pk), {self.design.pk, self.build.pk})
+
+
+class DependencyPropagationTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(name="Цепочка", code="chain")
+        self.first = Task.objects.create(project=self.project, title="Фундамент", status=Task.Status.DONE)
+        self.second = Task.objects.create(project=self.project, title="Стены", status=Task.Status.TODO)
+        self.third = Task.objects.create(project=self.project, title="Крыша", status=Task.Status.IN_PROGRESS)
+        self.unrelated = Task.objects.create(project=self.project, title="Забор", status=Task.Status.TODO)
+        TaskDependency.objects.create(blocking=self.first, blocked=self.second)
+        TaskDependency.objects.create(blocking=self.second, blocked=self.third)
+
+    def statuses(self):
+        return dict(Task.objects.values_list("title", "status"))
+
+    def test_reopening_blocks_all_transitive_dependents(self):
+        self.first.set_status(Task.Status.IN_PROGRESS)
+        self.assertEqual(
+            self.statuses(),
+            {
+                "Фундамент": Task.Status.IN_PROGRESS,
+                "Стены": Task.Status.BLOCKED,
+                "Крыша": Task.Status.BLOCKED,
+                "Забор": Task.Status.TODO,
+            },
+        )
+        self.assertEqual(
+            TaskActivity.objects.filter(payload__dependencies=True, payload__status=Task.Status.BLOCKED).count(), 2
+        )
+
+    def test_propagation_query_count_does_not_grow_with_depth(self):
+        previous = self.third
+        for index in range(5):
+            task = Task.objects.create(project=self.project, title=f"Этап {index}", status=Task.Status.TODO)
+            TaskDependency.objects.create(blocking=previous, blocked=task)
+            previous = task
+        # CTE select, tail rank, bulk UPDATE, counter upsert pair, activity INSERT, plus the savepoint pair
+        with self.assertNumQueries(8):
+            blocked = Task.objects.propagate_blocking(reopened={self.first.pk})
+        self.assertEqual(len(blocked), 7)
+
+    def test_finishing_unblocks_all_transitive_dependents(self):
+        self.first.set_status(Task.Status.IN_PROGRESS)
+        self.assertEqual(Task.objects.get(pk=self.third.pk).blocked_from_status, Task.Status.IN_PROGRESS)
+        self.first.set_status(Task.Status.DONE)
+        self.assertEqual(
+            self.statuses(),
+            {
+                "Фундамент": Task.Status.DONE,
+                "Стены": Task.Status.TODO,
+                "Крыша": Task.Status.IN_PROGRESS,
+                "Забор": Task.Status.TODO,
+            },
+        )
+        self.assertFalse(Task.objects.exclude(blocked_from_status="").exists())
+
+    def test_open_blocker_keeps_its_dependents_blocked(self):
+        estimate = Task.objects.create(project=self.project, title="Смета", status=Task.Status.DONE)
+        TaskDependency.objects.create(blocking=estimate, blocked=self.second)
+        estimate.set_status(Task.Status.REVIEW)
+        self.first.set_status(Task.Status.IN_PROGRESS)
+        self.first.set_status(Task.Status.DONE)
+        statuses = self.statuses()
+        self.assertEqual((statuses["Стены"], statuses["Крыша"]), (Task.Status.BLOCKED, Task.Status.BLOCKED))
+        estimate.set_status(Task.Status.DONE)
+        statuses = self.statuses()
+        self.assertEqual((statuses["Стены"], statuses["Крыша"]), (Task.Status.TODO, Task.Status.IN_PROGRESS))
+
+    def test_manually_blocked_tasks_stay_blocked(self):
+        TaskDependency.objects.create(blocking=self.first, blocked=self.unrelated)
+        Task.objects.get(pk=self.unrelated.pk).set_status(Task.Status.BLOCKED)
+        self.first.set_status(Task.Status.IN_PROGRESS)
+        self.first.set_status(Task.Status.DONE)
+        statuses = self.statuses()
+        self.assertEqual(statuses["Стены"], Task.Status.TODO)
+        self.assertEqual(statuses["Забор"], Task.Status.BLOCKED)
+
+    def test_board_move_propagates_blocking(self):
+        Task.objects.apply_moves([{"task_id": self.first.pk, "status": Task.Status.REVIEW}])
+        self.assertEqual(self.statuses()["Крыша"], Task.Status.BLOCKED)
+
+
+class TaskCounterTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(name="Счётчики", code="counters")
+        self.task = Task.objects.create(project=self.project, title="Первая", status=Task.Status.TODO)
+        self.other = Task.objects.create(project=self.project, title="Вторая", status=Task.Status.TODO)
+
+    def status_counters(self):
+        return Counter.objects.breakdowns(Counter.Dimension.TASK_STATUS)[Counter.Dimension.TASK_STATUS]
+
+    def test_status_changes_move_counters(self):
+        self.task.set_status(Task.Status.REVIEW)
+        Task.objects.apply_moves([{"task_id": self.other.pk, "status": Task.Status.DONE}])
+        self.assertEqual(self.status_counters(), {Task.Status.REVIEW: 1, Task.Status.DONE: 1})
+        Task.objects.get(pk=self.other.pk).delete()
+        self.assertEqual(self.status_counters(), {Task.Status.REVIEW: 1})
+
+    def test_board_totals_read_counters(self):
+        with self.assertNumQueries(1):
+            totals = get_board_totals()
+        self.assertEqual(totals["status_totals"], {Task.Status.TODO: 2})
+        self.assertEqual(totals["priority_breakdown"][0]["total"], 2)
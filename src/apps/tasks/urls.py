@@ -2,9 +2,12 @@ from django.urls import path
 
 from .views import (
     ProjectCreateView,
+    TaskBoardColumnView,
+    TaskBoardEventsView,
     TaskBoardView,
     TaskCreateView,
     TaskUpdateView,
+    TaskStatusBulkUpdateView,
     TaskStatusUpdateView,
 )
 
@@ -12,8 +15,11 @@ app_name = "tasks"
 
 urlpatterns = [
     path("", TaskBoardView.as_view(), name="board"),
+    path("board/events/", TaskBoardEventsView.as_view(), name="board_events"),
+    path("board/<str:status>/", TaskBoardColumnView.as_view(), name="board_column"),
     path("tasks/add/", TaskCreateView.as_view(), name="task_create"),
     path("tasks/<int:pk>/edit/", TaskUpdateView.as_view(), name="task_update"),
     path("projects/add/", ProjectCreateView.as_view(), name="project_create"),
     path("tasks/<int:pk>/status/", TaskStatusUpdateView.as_view(), name="task_status_update"),
+    path("tasks/status/", TaskStatusBulkUpdateView.as_view(), name="task_status_bulk_update"),
 ]
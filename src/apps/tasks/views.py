@@ -1,17 +1,19 @@
-from collections import OrderedDict
 import json
 
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.http import HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
 from django.views import View
 from django.views.generic import CreateView, TemplateView, UpdateView
 
 from src.apps.accounts.mixins import AdminRequiredMixin
 
+from .board import get_board_columns, get_board_totals, get_column_page
+from .events import get_backend, publish_task_event
 from .forms import ProjectForm, TaskForm
+from .graph import dependency_overview
 from .models import Project, Task, TaskActivity, TaskComment
 
 
@@ -20,38 +22,22 @@ class TaskBoardView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        tasks = (
-            Task.objects.select_related("project", "assignee", "created_by")
-            .prefetch_related("watchers", "assets")
-            .order_by("priority", "due_date")
-        )
-
-        board_columns = OrderedDict()
-        for status_key, status_label in Task.Status.choices:
-            board_columns[status_key] = {
-                "label": status_label,
-                "items": tasks.filter(status=status_key)[:15],
-            }
-
-        priority_data = []
-        for item in tasks.values("priority").annotate(total=Count("id")).order_by("-total"):
-            try:
-                label = Task.Priority(item["priority"]).label
-            except ValueError:
-                label = item["priority"]
-            priority_data.append({"priority": item["priority"], "label": label, "total": item["total"]})
+        board_columns = get_board_columns(Task.objects.select_related("project", "assignee"))
+        totals = get_board_totals()
+        for status_key, column in board_columns.items():
+            column["total"] = totals["status_totals"].get(status_key, 0)
 
         context.update(
             {
                 "board_columns": board_columns,
                 "project_count": Project.objects.filter(is_active=True).count(),
-                "task_total": tasks.count(),
-                "tasks_completed": tasks.filter(status=Task.Status.DONE).count(),
+                "task_total": totals["task_total"],
+                "tasks_completed": totals["tasks_completed"],
                 "recent_activity": TaskActivity.objects.select_related("task", "author")
                 .order_by("-created_at")[:10],
                 "recent_comments": TaskComment.objects.select_related("task", "author")
                 .order_by("-created_at")[:5],
-                "priority_breakdown": priority_data,
+                "priority_breakdown": totals["priority_breakdown"],
                 "can_create_task": self.request.user.is_authenticated,
                 "can_create_project": getattr(self.request.user, "is_admin_role", False),
             }
@@ -59,6 +45,54 @@ class TaskBoardView(LoginRequiredMixin, TemplateView):
         return context
 
 
+class TaskBoardColumnView(LoginRequiredMixin, View):
+    def get(self, request, status):
+        if status not in Task.Status.values:
+            return HttpResponseBadRequest("Unsupported status")
+
+        tasks = Task.objects.select_related("project", "assignee")
+        try:
+            items, next_cursor = get_column_page(tasks, status, after=request.GET.get("after"))
+        except ValueError:
+            return HttpResponseBadRequest("Invalid cursor")
+
+        html = "".join(
+            render_to_string(
+                "tasks/task_card.html",
+                {"task": task, "can_create_task": request.user.is_authenticated},
+                request=request,
+            )
+            for task in items
+        )
+        return JsonResponse({"html": html, "count": len(items), "next_cursor": next_cursor})
+
+
+class TaskBoardEventsView(View):
+    keepalive_interval = 15
+
+    async def get(self, request):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponseForbidden()
+        response = StreamingHttpResponse(self.stream(get_backend().subscribe()), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def stream(self, subscription):
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await subscription.get(timeout=self.keepalive_interval)
+                except TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        finally:
+            subscription.close()
+
+
 class TaskCreateView(LoginRequiredMixin, CreateView):
     model = Task
     form_class = TaskForm
@@ -73,8 +107,10 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.created_by = self.request.user
+        response = super().form_valid(form)
+        publish_task_event("created", self.object)
         messages.success(self.request, "Задача создана")
-        return super().form_valid(form)
+        return response
 
 
 class TaskUpdateView(LoginRequiredMixin, UpdateView):
@@ -89,9 +125,29 @@ class TaskUpdateView(LoginRequiredMixin, UpdateView):
         kwargs["user"] = self.request.user
         return kwargs
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["dependencies"] = dependency_overview(self.object)
+        return context
+
     def form_valid(self, form):
+        status_changed = "status" in form.changed_data
+        if status_changed:
+            form.instance.rank = Task.objects.next_rank(form.instance.status)
+            form.instance.blocked_from_status = ""
+        response = super().form_valid(form)
+        if status_changed:
+            previous_status = form.initial.get("status")
+            publish_task_event("status", self.object, previous_status=previous_status)
+            Task.objects.propagate_blocking(
+                finished={self.object.pk} if self.object.status == Task.Status.DONE else set(),
+                reopened={self.object.pk} if previous_status == Task.Status.DONE else set(),
+                user=self.request.user,
+            )
+        if "assignee" in form.changed_data:
+            publish_task_event("assignee", self.object)
         messages.success(self.request, "Задача обновлена")
-        return super().form_valid(form)
+        return response
 
 
 class ProjectCreateView(AdminRequiredMixin, CreateView):
@@ -125,17 +181,68 @@ class TaskStatusUpdateView(LoginRequiredMixin, View):
         if status not in Task.Status.values:
             return HttpResponseBadRequest("Unsupported status")
 
-        task = Task.objects.select_related("project").filter(pk=pk).first()
+        task = Task.objects.filter(pk=pk).first()
         if task is None:
             return HttpResponseBadRequest("Task not found")
 
-        if not request.user.is_admin_role:
-            is_project_member = task.project.members.filter(pk=request.user.pk).exists()
-            is_assignee = task.assignee_id == request.user.id
-            is_creator = task.created_by_id == request.user.id
-            is_watcher = task.watchers.filter(pk=request.user.pk).exists()
-            if not (is_project_member or is_assignee or is_creator or is_watcher):
-                return HttpResponseBadRequest("Forbidden")
+        if not Task.objects.editable_by(request.user).filter(pk=pk).exists():
+            return HttpResponseBadRequest("Forbidden")
 
         task.set_status(status, user=request.user)
         return JsonResponse({"status": task.get_status_display()})
+
+
+class TaskStatusBulkUpdateView(LoginRequiredMixin, View):
+    max_moves = 200
+
+    def post(self, request):
+        try:
+            payload = json.loads(request.body.decode("utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return HttpResponseBadRequest("Invalid payload")
+
+        raw_moves = payload.get("moves") if isinstance(payload, dict) else None
+        if not isinstance(raw_moves, list) or not raw_moves:
+            return HttpResponseBadRequest("Invalid payload")
+        if len(raw_moves) > self.max_moves:
+            return HttpResponseBadRequest("Too many moves")
+
+        moves = []
+        for move in raw_moves:
+            if not isinstance(move, dict):
+                return HttpResponseBadRequest("Invalid payload")
+            status = move.get("status")
+            if status not in Task.Status.values:
+                return HttpResponseBadRequest("Unsupported status")
+            try:
+                moves.append(
+                    {
+                        "task_id": int(move.get("task_id")),
+                        "status": status,
+                        "after_id": int(move["after_id"]) if move.get("after_id") else None,
+                        "before_id": int(move["before_id"]) if move.get("before_id") else None,
+                    }
+                )
+            except (TypeError, ValueError):
+                return HttpResponseBadRequest("Invalid task id")
+
+        task_ids = {move["task_id"] for move in moves}
+        allowed = set(Task.objects.editable_by(request.user).filter(pk__in=task_ids).values_list("pk", flat=True))
+        rejected = sorted(task_ids - allowed)
+        if rejected:
+            return JsonResponse({"error": "Forbidden", "task_ids": rejected}, status=400)
+
+        changed = Task.objects.filter(pk__in=allowed).apply_moves(moves, user=request.user)
+        return JsonResponse(
+            {
+                "updated": [
+                    {
+                        "task_id": task.pk,
+                        "status": task.status,
+                        "status_display": task.get_status_display(),
+                        "rank": task.rank,
+                    }
+                    for task in changed
+                ]
+            }
+        )
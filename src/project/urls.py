@@ -4,23 +4,20 @@ from django.contrib import admin
 from django.shortcuts import render
 from django.urls import include, path
 
-from src.apps.inventory.models import Asset, MaintenanceRecord
-from src.apps.tasks.models import Project, Task
+from src.apps.inventory.stats import get_inventory_stats
+from src.apps.tasks.stats import get_task_stats
 
 
 def index(request):
+    inventory = get_inventory_stats()
+    tasks = get_task_stats()
     context = {
         "homepage": {
-            "task_count": Task.objects.filter(is_archived=False).count(),
-            "project_total": Project.objects.filter(is_active=True).count(),
-            "asset_count": Asset.objects.count(),
-            "maintenance_planned": MaintenanceRecord.objects.filter(
-                status=MaintenanceRecord.Status.PLANNED
-            ).count(),
-            "next_maintenance": MaintenanceRecord.objects.filter(
-                status=MaintenanceRecord.Status.PLANNED,
-                scheduled_for__isnull=False,
-            ).order_by("scheduled_for").values_list("scheduled_for", flat=True).first(),
+            "task_count": tasks["task_count"],
+            "project_total": tasks["project_total"],
+            "asset_count": inventory["asset_total"],
+            "maintenance_planned": inventory["maintenance"]["planned"],
+            "next_maintenance": inventory["maintenance"]["next_planned"],
         }
     }
     return render(request, "index.html", context)